@@ -1,14 +1,16 @@
 import streamlit as st
-import sounddevice as sd
-import wave
-import tempfile
 import os
-import json
-import difflib
-from gtts import gTTS
-import pygame
-import time
-from vosk import Model, KaldiRecognizer
+import threading
+from vosk import Model
+from audio_capture import Endpointer, capture_utterance
+from audio_frontend import probe_input_device
+from streaming_asr import StreamingDecoder
+from asr_client import RemoteDecoder
+import assistant
+from tts_cache import TTSCache
+from playback import PlaybackService
+from session_archive import archive_from_env
+import web_capture
 
 # Load Vosk model once
 @st.cache_resource
@@ -19,89 +21,114 @@ def load_model():
         st.stop()
     return Model(model_path)
 
-model = load_model()
+# Set JEEVA_ASR_SERVER (e.g. ws://127.0.0.1:2700) to decode on asr_server.py instead
+asr_server = os.environ.get("JEEVA_ASR_SERVER")
+model = None if asr_server else load_model()
 samplerate = 16000
-duration = 5  # seconds
+duration = 5  # longest utterance, in seconds
+# The browser microphone is the default; JEEVA_SERVER_MIC=1 records on this machine instead
+server_mic = os.environ.get("JEEVA_SERVER_MIC") == "1"
+web_asr_port = int(os.environ.get("JEEVA_WEB_ASR_PORT", "2701"))
+web_asr_url = os.environ.get("JEEVA_WEB_ASR_URL")  # As the browser must see it, e.g. behind a proxy
 
-# 🎧 Record audio
-def record_audio():
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmpfile:
-        file_path = tmpfile.name
-    recording = sd.rec(int(samplerate * duration), samplerate=samplerate, channels=1, dtype='int16')
-    sd.wait()
-    with wave.open(file_path, 'wb') as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(samplerate)
-        wf.writeframes(recording.tobytes())
-    return file_path
+# 🎧 Pick the microphone once; capture at its own rate, resampled to 16 kHz
+@st.cache_resource
+def input_device():
+    try:
+        return probe_input_device()
+    except Exception as e:
+        st.warning(f"Using default microphone ({e})")
+        return None
 
-# 🧠 Recognize with Vosk
-def recognize_audio(wav_path):
-    rec = KaldiRecognizer(model, samplerate)
-    rec.SetWords(True)
-    with wave.open(wav_path, "rb") as wf:
-        rec.AcceptWaveform(wf.readframes(wf.getnframes()))
-        final_result = json.loads(rec.FinalResult())
-    return final_result.get("text", "")
+def capture_kwargs():
+    device = input_device()
+    if not device:
+        return {}
+    return {"device": device["index"], "device_samplerate": device["samplerate"],
+            "channels": device["channels"]}
+
+# 🗄️ Keep utterances, word confidences and intents, only when JEEVA_ARCHIVE_DIR is set
+# (written by a background thread, so the reply is never kept waiting)
+@st.cache_resource
+def session_archive():
+    return archive_from_env()
 
-# 🧠 Correct common misrecognitions
-def improve_recognition(text):
-    corrections_map = {
-        "vash": "varsham", "vasham": "varsham", "versham": "varsham",
-        "help": "sahayam", "helo": "namaskaram", "fertalizer": "eruvu",
-        "price": "dhara", "desease": "vyadi", "varsha": "varsham"
-    }
-    words = text.lower().split()
-    for i, word in enumerate(words):
-        for wrong, correct in corrections_map.items():
-            if difflib.SequenceMatcher(None, word, wrong).ratio() > 0.75:
-                words[i] = correct
-                return " ".join(words)
-    return text
+def archive(audio, result, reply, response):
+    if not session_archive():
+        return
+    words = [(w.get("word"), w.get("conf")) for w in result.get("result", [])]
+    if reply is None:
+        session_archive().submit(audio, result.get("text", ""), words, response=response, source="streamlit")
+        return
+    session_archive().submit(audio, result.get("text", ""), words, reply.corrected, reply.intent,
+                             reply.score, response, reply.corrections, source="streamlit")
 
-# 🤖 Generate response
-def generate_response(text):
-    if "varsham" in text:
-        return "నేడు వర్షం పడే అవకాశం 60% ఉంది."
-    elif "sahayam" in text:
-        return "నేను వ్యవసాయంపై సహాయం చేస్తాను."
-    elif "eruvu" in text:
-        return "ఈ పంటకు ఆర్గానిక్ ఎరువులు వాడండి."
-    elif "vyadi" in text:
-        return "నీం ఆయిల్ వాడండి వ్యాధులు నివారించేందుకు."
-    elif "dhara" in text:
-        return "ఈ రోజు ధర రూ.20 కిలోకు ఉంది."
-    elif "namaskaram" in text:
-        return "నమస్తే! నేను జీవ, మీకు సహాయం చేస్తాను."
+# 🎧🧠 Record and recognize at the same time
+def listen_and_recognize(on_partial=None):
+    if asr_server:
+        decoder = RemoteDecoder(asr_server, samplerate, on_partial=on_partial)
     else:
-        return "దయచేసి మరింత స్పష్టంగా చెప్పండి."
+        decoder = StreamingDecoder(model, samplerate, on_partial=on_partial)
+    endpointer = Endpointer(samplerate=samplerate, max_utterance_s=duration)
+    audio = capture_utterance(samplerate=samplerate, endpointer=endpointer, on_block=decoder.accept,
+                              **capture_kwargs())
+    return decoder.finish(), audio
+
+# 🧠 Correct common misrecognitions and 🤖 pick the reply
+# (same knowledge base and matcher as the Kivy app; repeated phrases come from the reply cache)
+@st.cache_resource
+def knowledge_watcher():
+    return assistant.KNOWLEDGE.start()
+
+def understand(text):
+    kb = knowledge_watcher().current
+    if not text.strip():
+        return "", kb.replies["web_unclear"], None
+    reply = assistant.understand(text, kb, web=True)
+    return reply.corrected, reply.response, reply
+
+# 🔈 Speak response (canned replies are synthesized once and reused)
+@st.cache_resource
+def tts_cache():
+    cache = TTSCache()
+    threading.Thread(target=cache.prewarm, args=(assistant.knowledge().canned_responses(),), daemon=True).start()
+    return cache
+
+@st.cache_resource
+def player():
+    return PlaybackService(tts_cache())
 
-# 🔈 Speak response
 def speak(text):
-    tts = gTTS(text=text, lang='te')
-    temp_mp3 = os.path.join(tempfile.gettempdir(), "response.mp3")
-    tts.save(temp_mp3)
-    try:
-        pygame.mixer.init()
-        pygame.mixer.music.load(temp_mp3)
-        pygame.mixer.music.play()
-        while pygame.mixer.music.get_busy():
-            time.sleep(0.1)
-    except Exception as e:
-        st.error(f"Audio playback failed: {e}")
+    player().say(text, 'te')
+
+# 🌐 Browser microphone: each visitor's page streams audio to one shared ASR server,
+# which sends back partial transcripts, the reply and its speech
+@st.cache_resource
+def web_asr_server():
+    return web_capture.start_server(model, port=web_asr_port,
+                                    pool_size=int(os.environ.get("JEEVA_WEB_ASR_POOL", "4")),
+                                    tts_cache=tts_cache(), archive=session_archive())
 
 # 🎯 Streamlit UI
 st.title("🗣️ Jeeva Telugu Voice Assistant (Web Demo)")
 st.markdown("Click below to record your voice in Telugu. Jeeva will understand and reply accordingly.")
 
-if st.button("🎙️ Speak Now"):
-    with st.spinner("Recording..."):
-        wav_path = record_audio()
+if not server_mic:
+    knowledge_watcher()
+    if web_asr_url or asr_server:
+        web_capture.render(url=web_asr_url or asr_server, max_seconds=duration)
+    else:
+        web_asr_server()
+        web_capture.render(port=web_asr_port, max_seconds=duration)
+elif st.button("🎙️ Speak Now"):
+    partial_box = st.empty()
+    with st.spinner("Listening..."):
+        result, audio = listen_and_recognize(
+            on_partial=lambda text: partial_box.markdown(f"🎧 *{text}...*"))
+    partial_box.empty()
     with st.spinner("Processing..."):
-        raw_text = recognize_audio(wav_path)
-        improved_text = improve_recognition(raw_text)
-        response = generate_response(improved_text)
+        improved_text, response, reply = understand(result.get("text", ""))
+    archive(audio, result, reply, response)
     st.success("✅ Done")
     st.write(f"**You said:** {improved_text}")
     st.write(f"**Jeeva says:** {response}")
@@ -0,0 +1,73 @@
+import json
+import queue
+import threading
+
+import numpy as np
+
+from intent_engine import IntentMatch
+from response_cache import Reply
+
+
+class RemoteDecoder:
+    """Drop-in for StreamingDecoder that decodes on an asr_server instead.
+
+    `accept()` forwards blocks as they are captured, partial transcripts
+    arrive on a reader thread, and `finish()` returns the server's final
+    result, which already includes the corrected text, intent and response.
+    """
+
+    def __init__(self, url, samplerate=16000, on_partial=None, timeout=10.0):
+        from websockets.sync.client import connect
+
+        self.on_partial = on_partial
+        self.timeout = timeout
+        self.ws = connect(url, open_timeout=timeout)
+        self._final = queue.Queue()
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+        self.ws.send(json.dumps({"type": "start", "samplerate": samplerate}))
+
+    def _read(self):
+        try:
+            for message in self.ws:
+                reply = json.loads(message)
+                if reply["type"] == "partial":
+                    if self.on_partial:
+                        self.on_partial(reply["text"])
+                else:
+                    self._final.put(reply)
+        except Exception as e:
+            self._final.put({"type": "error", "error": str(e)})
+            return
+        # Closed (e.g. by close() from another thread): don't leave finish() waiting
+        self._final.put({"type": "error", "error": "connection closed"})
+
+    def accept(self, block):
+        self.ws.send(np.ascontiguousarray(block, dtype=np.int16).tobytes())
+
+    def close(self):
+        """Abandon the utterance without waiting for a result."""
+        self.ws.close()
+
+    def finish(self):
+        """Return {"text", "result", "corrected", "intent", "score", "response"}."""
+        try:
+            self.ws.send(json.dumps({"type": "end"}))
+            reply = self._final.get(timeout=self.timeout)
+        finally:
+            self.ws.close()
+        if reply["type"] == "error":
+            raise RuntimeError(f"ASR server error: {reply['error']}")
+        reply["result"] = reply.pop("words", [])
+        return reply
+
+
+def server_reply(result):
+    """The Reply the server already picked for a `finish()` result, or None without a transcript.
+
+    It is not a response cache entry, so attaching audio to it is a no-op.
+    """
+    if not result.get("corrected"):
+        return None
+    match = IntentMatch(result["intent"], result["score"], None, None) if result.get("intent") else None
+    return Reply(None, result["corrected"], match, (), result["response"], None)
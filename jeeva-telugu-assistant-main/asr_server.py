@@ -0,0 +1,228 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import assistant
+from audio_buffer import AudioBuffer
+from speculation import Speculator
+from streaming_asr import StreamingDecoder
+
+# Protocol (one WebSocket connection can carry many utterances):
+#   client -> {"type": "start", "samplerate": 16000, "web": false, "tts": false}
+#   client -> binary frames of mono int16 PCM
+#   client -> {"type": "end"}
+#   server -> {"type": "partial", "text": ...} while audio is arriving
+#   server -> {"type": "final", "text", "corrected", "intent", "score", "response", "words"}
+#   server -> one binary frame with the spoken reply (MP3), only when "tts" was requested
+#   server -> {"type": "error", "error": ...}
+# "web" selects the short replies of the Streamlit demo.
+
+
+class RecognizerPool:
+    """A bounded set of KaldiRecognizers over one shared vosk.Model."""
+
+    def __init__(self, model, size=4, samplerate=16000):
+        self.model = model
+        self.size = size
+        self.samplerate = samplerate
+        self.created = 0
+        self._free = asyncio.Queue()
+
+    async def acquire(self, timeout=None):
+        if self._free.empty() and self.created < self.size:
+            import vosk
+            self.created += 1
+            return vosk.KaldiRecognizer(self.model, self.samplerate)
+        return await asyncio.wait_for(self._free.get(), timeout)
+
+    def release(self, rec):
+        rec.Reset()
+        self._free.put_nowait(rec)
+
+    @property
+    def in_use(self):
+        return self.created - self._free.qsize()
+
+
+class ASRServer:
+    """Streams many sessions through one model.
+
+    Each session borrows a recognizer from the pool for the length of one
+    utterance; when the pool is exhausted new sessions wait up to
+    `acquire_timeout` and are then refused with a "busy" error. Decoding runs
+    on a thread pool, and a session's next frame is only read once its
+    previous chunk has been decoded, so a slow server pushes back on clients
+    through the WebSocket instead of buffering their audio.
+    """
+
+    def __init__(self, model, pool_size=4, workers=4, acquire_timeout=5.0, samplerate=16000,
+                 tts_cache=None, archive=None):
+        self.pool = RecognizerPool(model, pool_size, samplerate)
+        self.tts_cache = tts_cache
+        self.archive = archive  # A SessionArchive keeps every utterance it is given
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jeeva-asr")
+        # Speculative synthesis waits on the TTS backend; keep it off the decode threads
+        self.prefetch = None
+        if tts_cache is not None:
+            self.prefetch = ThreadPoolExecutor(max_workers=2, thread_name_prefix="jeeva-prefetch")
+        self.acquire_timeout = acquire_timeout
+        self.samplerate = samplerate
+        self.sessions = 0
+
+    async def handle(self, ws):
+        self.sessions += 1
+        try:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    await self._send(ws, type="error", error="audio before start")
+                    continue
+                request = json.loads(message)
+                if request.get("type") == "start":
+                    await self._utterance(ws, request)
+        finally:
+            self.sessions -= 1
+
+    async def _utterance(self, ws, request):
+        samplerate = int(request.get("samplerate", self.samplerate))
+        if samplerate != self.samplerate:
+            await self._send(ws, type="error", error=f"samplerate must be {self.samplerate}")
+            return
+        try:
+            rec = await self.pool.acquire(self.acquire_timeout)
+        except asyncio.TimeoutError:
+            await self._send(ws, type="error", error="busy")
+            return
+
+        loop = asyncio.get_running_loop()
+        partials = []
+        blocks = [] if self.archive else None
+        # With spoken replies requested, start synthesizing the likely reply from partials
+        speculator = None
+        if request.get("tts") and self.tts_cache:
+            speculator = Speculator(self.tts_cache, web=bool(request.get("web")), executor=self.prefetch)
+        try:
+            decoder = StreamingDecoder(None, samplerate, recognizer=rec,
+                                       on_partial=partials.append)
+            async for message in ws:
+                if isinstance(message, bytes):
+                    block = np.frombuffer(message, dtype=np.int16)
+                    if blocks is not None:
+                        blocks.append(block)
+                    await loop.run_in_executor(self.executor, decoder.accept, block)
+                    if partials:
+                        await self._send(ws, type="partial", text=partials[-1])
+                        if speculator:
+                            # Correction and fuzzy matching would stall every connection on the loop
+                            await loop.run_in_executor(None, self._speculate, speculator, partials[-1])
+                        partials.clear()
+                elif json.loads(message).get("type") == "end":
+                    break
+            result = await loop.run_in_executor(self.executor, decoder.finish)
+            reply = await loop.run_in_executor(self.executor, assistant.respond, result["text"],
+                                               bool(request.get("web")))
+            await self._send(ws, type="final", words=result["result"], **reply)
+            if speculator:
+                speculator.resolve(reply["response"])
+            if blocks:
+                self._archive(blocks, result, reply, bool(request.get("web")))
+        finally:
+            self.pool.release(rec)
+        if request.get("tts") and self.tts_cache:
+            try:
+                audio = await loop.run_in_executor(self.executor, self._read_tts, reply["response"])
+            except Exception as e:
+                await self._send(ws, type="error", error=f"tts: {e}")
+                return
+            await ws.send(audio)
+
+    @staticmethod
+    def _speculate(speculator, partial):
+        try:
+            speculator.observe(partial)
+        except Exception as e:
+            print(f"🔮 Speculation failed: {e}")
+
+    def _archive(self, blocks, result, reply, web):
+        audio = AudioBuffer.from_array(np.concatenate(blocks), self.samplerate)
+        words = [(w.get("word"), w.get("conf")) for w in result["result"]]
+        self.archive.submit(audio, reply["text"], words, reply["corrected"], reply["intent"],
+                            reply["score"], reply["response"], source="web" if web else "server")
+
+    def _read_tts(self, text):
+        with open(self.tts_cache.get_file(text, "te"), "rb") as f:
+            return f.read()
+
+    @staticmethod
+    async def _send(ws, **message):
+        await ws.send(json.dumps(message, ensure_ascii=False))
+
+    async def serve(self, host="127.0.0.1", port=2700, sock=None):
+        """Serve forever on `host`:`port`, or on an already listening `sock` (pre-fork workers)."""
+        from websockets.asyncio.server import serve
+
+        # max_queue bounds how many unread frames a fast client can park on us
+        if sock is not None:
+            async with serve(self.handle, sock=sock, max_size=1 << 20, max_queue=8):
+                await asyncio.get_running_loop().create_future()
+        async with serve(self.handle, host, port, max_size=1 << 20, max_queue=8):
+            print(f"🛰️ ASR server listening on ws://{host}:{port}")
+            await asyncio.get_running_loop().create_future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-model streaming ASR server for Jeeva")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2700)
+    parser.add_argument("--pool", type=int, default=4, help="recognizers (concurrent utterances)")
+    parser.add_argument("--workers", type=int, default=4, help="decode threads")
+    parser.add_argument("--model", help="model directory (downloaded if omitted)")
+    parser.add_argument("--tts", action="store_true", help="send spoken replies to clients that ask")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="fork this many worker processes sharing the loaded model")
+    parser.add_argument("--report-interval", type=float, default=60.0,
+                        help="seconds between per-worker memory reports (with --processes)")
+    args = parser.parse_args()
+
+    import vosk
+    from metrics import start_exporter_from_env
+    from model_loader import ensure_model
+    from session_archive import archive_from_env
+
+    print("📦 Loading Vosk model...")
+    model = vosk.Model(args.model or ensure_model())
+    if args.processes > 1:
+        from prefork import PreforkServer
+
+        # TTS caches hold threads and open files, so each worker makes its own after the fork
+        make_tts_cache = None
+        if args.tts:
+            from tts_cache import TTSCache
+            make_tts_cache = TTSCache
+        server = PreforkServer(model, args.processes, args.host, args.port, make_tts_cache,
+                               pool_size=args.pool, workers=args.workers)
+        server.start().supervise(args.report_interval)
+        return
+    tts_cache = None
+    if args.tts:
+        from tts_cache import TTSCache
+        tts_cache = TTSCache()
+    archive = archive_from_env()
+    server = ASRServer(model, pool_size=args.pool, workers=args.workers, tts_cache=tts_cache,
+                       archive=archive)
+    start_exporter_from_env()
+    assistant.KNOWLEDGE.start()
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        assistant.KNOWLEDGE.stop()
+        if archive:
+            archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Headless language understanding shared by the UI, the web demo and the server
+
+from corrections import CorrectionEngine
+from grammar_mode import build_grammar
+from knowledge_base import KnowledgeBaseWatcher
+from metrics import METRICS
+from response_cache import Reply, ResponseCache
+
+# Intents, keywords and replies live in knowledge_base.json. Every call reads
+# KNOWLEDGE.current once, so a background reload never splits a request
+# across two versions. Front ends call KNOWLEDGE.start() to watch the file.
+KNOWLEDGE = KnowledgeBaseWatcher()
+CORRECTIONS = CorrectionEngine.load()
+
+# Repeat transcripts skip the NLU stage; entries from an old knowledge base are dropped
+RESPONSE_CACHE = ResponseCache()
+KNOWLEDGE.subscribe(lambda kb: RESPONSE_CACHE.clear())
+
+
+def knowledge():
+    return KNOWLEDGE.current
+
+
+def grammar_phrases(model=None, kb=None):
+    """Vosk grammar for grammar mode: the Telugu synonyms of every intent."""
+    return build_grammar((kb or knowledge()).synonyms, model)
+
+
+def correct(text):
+    """Return (corrected text, [(wrong, correct, similarity), ...])."""
+    with METRICS.stage("correction"):
+        return CORRECTIONS.correct(text)
+
+
+def match_intent(query, kb=None):
+    with METRICS.stage("intent"):
+        match = (kb or knowledge()).match(query.lower().strip())
+    METRICS.inc("intent_total", intent=match.intent if match else "none")
+    return match
+
+
+def response_for(query, match, kb=None, web=False):
+    return (kb or knowledge()).response_for(query, match, web)
+
+
+def understand(text, kb=None, web=False):
+    """Reply for a non-empty transcript, memoized on its normalized text."""
+    kb = kb or knowledge()
+    version = kb.version + ("/web" if web else "")
+    reply = RESPONSE_CACHE.get(text, version)
+    if reply is None:
+        corrected, applied = correct(text)
+        match = match_intent(corrected, kb) if corrected else None
+        if corrected or web:
+            response = response_for(corrected, match, kb, web)
+        else:
+            response = kb.replies["no_speech"]
+        reply = Reply(ResponseCache.key(text, version), corrected, match, tuple(applied), response, None)
+        RESPONSE_CACHE.put(reply)
+    else:
+        METRICS.inc("intent_total", intent=reply.intent or "none")
+    return reply
+
+
+def respond(text, web=False):
+    """Run correction, intent matching and response selection on one transcript."""
+    kb = knowledge()
+    if not text:
+        return {"text": text, "corrected": "", "intent": None, "score": 0.0,
+                "response": kb.replies["web_unclear" if web else "no_speech"]}
+    reply = understand(text, kb, web)
+    return {
+        "text": text,
+        "corrected": reply.corrected,
+        "intent": reply.intent,
+        "score": reply.score,
+        "response": reply.response,
+    }
@@ -0,0 +1,82 @@
+import wave
+
+import numpy as np
+
+
+class AudioBuffer:
+    """Preallocated mono int16 PCM buffer.
+
+    Capture writes blocks straight into one array that the recognizer is fed
+    from, so an utterance stays in memory instead of going through a WAV file
+    on disk.
+    """
+
+    def __init__(self, samplerate=16000, capacity_s=10.0):
+        self.samplerate = samplerate
+        self._data = np.empty(max(int(samplerate * capacity_s), 1), dtype=np.int16)
+        self._len = 0
+
+    @classmethod
+    def from_array(cls, samples, samplerate=16000):
+        samples = np.ascontiguousarray(samples, dtype=np.int16).reshape(-1)
+        buf = cls.__new__(cls)
+        buf.samplerate = samplerate
+        buf._data = samples
+        buf._len = len(samples)
+        return buf
+
+    @classmethod
+    def from_wav(cls, path):
+        with wave.open(path, "rb") as wf:
+            if wf.getsampwidth() != 2:
+                raise ValueError(f"{path}: expected 16-bit PCM, got {8 * wf.getsampwidth()}-bit")
+            samples = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            if wf.getnchannels() > 1:
+                samples = samples.reshape(-1, wf.getnchannels())[:, 0]
+            return cls.from_array(samples, wf.getframerate())
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def duration(self):
+        return self._len / self.samplerate
+
+    def append(self, block):
+        block = np.asarray(block, dtype=np.int16).reshape(-1)
+        end = self._len + len(block)
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=np.int16)
+            grown[:self._len] = self._data[:self._len]
+            self._data = grown
+        self._data[self._len:end] = block
+        self._len = end
+
+    def clear(self):
+        self._len = 0
+
+    def view(self):
+        """The captured samples as an int16 array, without copying."""
+        return self._data[:self._len]
+
+    def pcm(self):
+        """The captured samples as a byte memoryview, without copying."""
+        return pcm_view(self.view())
+
+    def save_wav(self, path):
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.samplerate)
+            wf.writeframes(self.pcm())
+        return path
+
+
+def pcm_view(samples):
+    samples = np.ascontiguousarray(samples, dtype=np.int16)
+    return memoryview(samples).cast("B")
+
+
+def accept_pcm(recognizer, samples):
+    """AcceptWaveform on int16 samples; vosk's char* argument only takes bytes."""
+    return recognizer.AcceptWaveform(np.ascontiguousarray(samples, dtype=np.int16).tobytes())
@@ -0,0 +1,186 @@
+import collections
+import queue
+
+import numpy as np
+
+from audio_buffer import AudioBuffer
+from audio_frontend import Resampler
+from metrics import METRICS, trace
+
+
+class Endpointer:
+    """Energy based voice-activity endpointer.
+
+    Blocks of int16 audio are fed in one at a time. While waiting for speech a
+    short pre-roll is kept so the first syllable is not clipped; once speech
+    starts every block is kept until `silence_ms` of trailing silence (the
+    hangover) or `max_utterance_s` is reached. Speech is `threshold_db` above
+    the noise floor, the quietest block of the last `floor_window_ms`, so the
+    floor drops at once and rises with steady noise (wind, an engine) as soon
+    as the quieter blocks age out. Once speech has started the window is three
+    times longer, so the gaps between words keep the floor down, while noise
+    that started together with the "speech" still ends the utterance.
+    """
+
+    def __init__(self, samplerate=16000, silence_ms=700, max_utterance_s=10,
+                 pre_roll_ms=300, min_speech_ms=120, no_speech_timeout_s=6,
+                 threshold_db=12.0, min_level_db=-50.0, floor_window_ms=1000):
+        self.samplerate = samplerate
+        self.silence_samples = int(samplerate * silence_ms / 1000)
+        self.max_samples = int(samplerate * max_utterance_s)
+        self.pre_roll_samples = int(samplerate * pre_roll_ms / 1000)
+        self.min_speech_samples = int(samplerate * min_speech_ms / 1000)
+        self.no_speech_samples = int(samplerate * no_speech_timeout_s)
+        self.threshold_db = threshold_db
+        self.min_level_db = min_level_db
+        self.floor_window_samples = int(samplerate * floor_window_ms / 1000)
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = self.min_level_db - self.threshold_db
+        # Sliding minimum over the short and the long window: (end sample, level), levels ascending
+        self.floor_short = collections.deque()
+        self.floor_long = collections.deque()
+        self.pre_roll = collections.deque()
+        self.pre_roll_len = 0
+        self.buffer = AudioBuffer(self.samplerate,
+                                  (self.max_samples + self.pre_roll_samples) / self.samplerate)
+        self.total_samples = 0
+        self.utterance_samples = 0
+        self.speech_samples = 0
+        self.silence_run = 0
+        self.triggered = False
+        self.done = False
+        self.reason = None
+
+    @staticmethod
+    def level_db(block):
+        samples = np.asarray(block, dtype=np.float32)
+        if samples.size == 0:
+            return -120.0
+        rms = np.sqrt(np.mean(samples * samples)) / 32768.0
+        return float(20.0 * np.log10(rms + 1e-9))
+
+    def is_speech(self, level):
+        return level > max(self.noise_floor_db + self.threshold_db, self.min_level_db)
+
+    def seed_noise_floor(self, level_db):
+        """Start from a floor measured elsewhere; it counts as one window of quiet audio."""
+        self._track_floor(level_db)
+
+    def _track_floor(self, level):
+        now = self.total_samples
+        for window, mins in ((self.floor_window_samples, self.floor_short),
+                             (3 * self.floor_window_samples, self.floor_long)):
+            while mins and mins[-1][1] >= level:
+                mins.pop()
+            mins.append((now, level))
+            while mins[0][0] <= now - window:
+                mins.popleft()
+        self.noise_floor_db = (self.floor_long if self.triggered else self.floor_short)[0][1]
+
+    def feed(self, block):
+        """Consume one block and return the blocks newly added to the utterance."""
+        if self.done:
+            return []
+        block = np.asarray(block, dtype=np.int16).reshape(-1)
+        n = len(block)
+        self.total_samples += n
+        level = self.level_db(block)
+        self._track_floor(level)
+        speech = self.is_speech(level)
+
+        if not self.triggered:
+            self.pre_roll.append(block)
+            self.pre_roll_len += n
+            while self.pre_roll and self.pre_roll_len - len(self.pre_roll[0]) >= self.pre_roll_samples:
+                self.pre_roll_len -= len(self.pre_roll.popleft())
+            if speech:
+                self.speech_samples += n
+                if self.speech_samples >= self.min_speech_samples:
+                    self.triggered = True
+                    emitted = list(self.pre_roll)
+                    self.pre_roll.clear()
+                    self.pre_roll_len = 0
+                    self._keep(emitted)
+                    return emitted
+            else:
+                self.speech_samples = 0
+            if self.total_samples >= self.no_speech_samples:
+                self._finish("no_speech")
+            return []
+
+        self._keep([block])
+        if speech:
+            self.silence_run = 0
+        else:
+            self.silence_run += n
+            if self.silence_run >= self.silence_samples:
+                self._finish("silence")
+        if self.utterance_samples >= self.max_samples:
+            self._finish("max_length")
+        return [block]
+
+    def _keep(self, blocks):
+        for b in blocks:
+            self.buffer.append(b)
+            self.utterance_samples += len(b)
+
+    def _finish(self, reason):
+        self.done = True
+        self.reason = reason
+
+    def audio(self):
+        """Return the captured utterance as an AudioBuffer."""
+        return self.buffer
+
+
+def capture_utterance(samplerate=16000, endpointer=None, device=None,
+                      block_ms=30, on_block=None, timeout=1.0,
+                      device_samplerate=None, channels=1, stop_event=None):
+    """Record from the microphone until the endpointer says the speaker stopped.
+
+    Audio arrives through an `sd.InputStream` callback and is handed to the
+    capture thread through a queue, so nothing heavy runs in the audio
+    callback. The stream runs at the device's own rate and channel count;
+    blocks are downmixed and resampled to `samplerate` on the capture thread.
+    `on_block` is called with every block that becomes part of the
+    utterance, which lets a decoder start work before capture ends. Setting
+    `stop_event` ends the capture early with reason "stopped".
+    """
+    import sounddevice as sd
+
+    ep = endpointer or Endpointer(samplerate=samplerate)
+    ep.reset()
+    blocks = queue.Queue()
+    stream_rate = device_samplerate or samplerate
+    resampler = Resampler(stream_rate, samplerate)
+
+    def callback(indata, frames, time_info, status):
+        if status:
+            METRICS.inc("input_stream_status_total")
+        # indata is reused by PortAudio after the callback returns
+        blocks.put(indata.copy())
+
+    blocksize = int(stream_rate * block_ms / 1000)
+    with METRICS.stage("capture"), \
+            sd.InputStream(samplerate=stream_rate, blocksize=blocksize, device=device,
+                           channels=channels, dtype='int16', callback=callback):
+        while not ep.done:
+            if stop_event is not None and stop_event.is_set():
+                ep.reason = "stopped"
+                break
+            try:
+                block = blocks.get(timeout=timeout)
+            except queue.Empty:
+                print("🎤 No audio from input stream")
+                METRICS.inc("input_stream_timeouts_total")
+                ep.reason = "timeout"
+                break
+            for kept in ep.feed(resampler.process(block)):
+                if on_block:
+                    on_block(kept)
+
+    METRICS.inc(f"capture_{ep.reason}_total")
+    trace("🎤 Capture stopped (%s), %.2fs kept", ep.reason, ep.utterance_samples / samplerate)
+    return ep.audio()
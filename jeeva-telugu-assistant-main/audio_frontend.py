@@ -0,0 +1,137 @@
+import json
+import math
+import os
+
+import numpy as np
+
+MODEL_RATE = 16000
+DEVICE_FILE = os.environ.get(
+    "JEEVA_AUDIO_DEVICE_FILE", os.path.join(os.path.expanduser("~"), ".cache", "jeeva", "audio_device.json"))
+
+
+class Resampler:
+    """Streaming polyphase resampler from `in_rate` to `out_rate`, with downmixing.
+
+    The rational ratio L/M is applied with one windowed-sinc low-pass split
+    into L phases. Each call handles one capture block: all of its output
+    samples are computed with a single gather and multiply-add in NumPy, and
+    the last few input samples are carried over so consecutive blocks join
+    without clicks.
+    """
+
+    def __init__(self, in_rate, out_rate=MODEL_RATE, zero_crossings=16, beta=8.6):
+        g = math.gcd(int(in_rate), int(out_rate))
+        self.up = int(out_rate) // g
+        self.down = int(in_rate) // g
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.passthrough = self.up == self.down
+        if self.passthrough:
+            return
+        # Taps per phase: enough input samples to span the sinc's zero crossings
+        taps = 2 * zero_crossings * max(1, math.ceil(self.down / self.up))
+        n = taps * self.up
+        cutoff = 0.5 / max(self.up, self.down) * 0.95  # cycles per upsampled sample
+        t = np.arange(n) - (n - 1) / 2
+        h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n, beta) * self.up
+        # phases[p, k] = h[p + k * up], applied to x[i - k]
+        self.phases = h.reshape(taps, self.up).T.astype(np.float32)
+        self.taps = taps
+        self.history = np.zeros(taps - 1, dtype=np.float32)
+        self.consumed = 0   # input samples before self.history[0] + len(history)
+        self.produced = 0   # output samples emitted so far
+
+    @staticmethod
+    def downmix(block):
+        block = np.asarray(block)
+        if block.ndim == 2:
+            if block.shape[1] == 1:
+                return block[:, 0]
+            return block.mean(axis=1)
+        return block
+
+    def process(self, block):
+        """Resample one block (frames or frames x channels) to mono int16."""
+        mono = self.downmix(block)
+        if self.passthrough:
+            return np.asarray(mono, dtype=np.int16)
+        x = np.concatenate([self.history, np.asarray(mono, dtype=np.float32)])
+        end = self.consumed + len(mono)   # absolute index one past the newest input sample
+        base = end - len(x)               # absolute index of x[0]
+        # Output n needs input index (n * down) // up, which must already be here
+        last = (end * self.up - 1) // self.down
+        n = np.arange(self.produced, last + 1, dtype=np.int64)
+        self.consumed = end
+        self.history = x[len(x) - (self.taps - 1):]
+        if len(n) == 0:
+            return np.zeros(0, dtype=np.int16)
+        self.produced = last + 1
+        pos = n * self.down
+        newest = pos // self.up - base
+        window = x[np.clip(newest[:, None] - np.arange(self.taps)[None, :], 0, None)]
+        y = np.einsum("ij,ij->i", window, self.phases[pos % self.up])
+        return np.clip(np.rint(y), -32768, 32767).astype(np.int16)
+
+
+def _describe(index, device, hostapis):
+    return {
+        "index": index,
+        "name": device["name"],
+        "hostapi": hostapis[device["hostapi"]]["name"],
+        "samplerate": int(device["default_samplerate"]),
+        "channels": min(int(device["max_input_channels"]), 2),
+    }
+
+
+def probe_input_device(preferred=None, path=DEVICE_FILE, refresh=None):
+    """Pick the input device once and remember it.
+
+    `preferred` (or JEEVA_INPUT_DEVICE) picks the first device whose name
+    contains it, WASAPI variants first, and replaces a different saved
+    choice. Without one, a saved choice is reused as long as a device with
+    that name still has inputs, then the system default is used. `refresh`
+    (or JEEVA_AUDIO_REPROBE=1) ignores the saved choice.
+    """
+    import sounddevice as sd
+
+    hostapis = sd.query_hostapis()
+    devices = sd.query_devices()
+    inputs = [(i, d) for i, d in enumerate(devices) if d["max_input_channels"] > 0]
+    if not inputs:
+        raise RuntimeError("no audio input devices found")
+    if refresh is None:
+        refresh = os.environ.get("JEEVA_AUDIO_REPROBE") == "1"
+
+    preferred = preferred or os.environ.get("JEEVA_INPUT_DEVICE")
+    choice = None
+    if preferred:
+        matches = [(i, d) for i, d in inputs if preferred.lower() in d["name"].lower()]
+        matches.sort(key=lambda m: "WASAPI" not in hostapis[m[1]["hostapi"]]["name"])
+        choice = matches[0] if matches else None
+        if choice is None:
+            print(f"📱 No input device matches '{preferred}'")
+
+    if choice is None and not refresh and os.path.exists(path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            for i, d in inputs:
+                if d["name"] == saved["name"] and hostapis[d["hostapi"]]["name"] == saved["hostapi"]:
+                    return _describe(i, d, hostapis)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    if choice is None:
+        default = sd.default.device[0]
+        if default is None or default < 0:
+            default = sd.query_hostapis(sd.default.hostapi)["default_input_device"]
+        choice = next(((i, d) for i, d in inputs if i == default), inputs[0])
+
+    info = _describe(choice[0], choice[1], hostapis)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(info, f, indent=1)
+    except OSError as e:
+        print(f"📱 Could not save device choice: {e}")
+    return info
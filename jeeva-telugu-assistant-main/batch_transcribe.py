@@ -0,0 +1,108 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+_model = None
+
+
+def find_inputs(source):
+    """WAV paths from a directory (recursively) or a manifest file.
+
+    A manifest is either plain text with one path per line or JSONL with a
+    "path" field; relative paths are resolved against the manifest's folder.
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(".wav"))
+        return sorted(paths)
+
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            path = json.loads(line)["path"] if line.startswith("{") else line
+            paths.append(path if os.path.isabs(path) else os.path.join(base, path))
+    return paths
+
+
+def _init_worker(model_path):
+    global _model
+    import vosk
+    vosk.SetLogLevel(-1)
+    _model = vosk.Model(model_path)
+
+
+def transcribe_file(path):
+    import assistant
+    from audio_buffer import AudioBuffer
+    from streaming_asr import decode_array
+
+    started = time.perf_counter()
+    try:
+        audio = AudioBuffer.from_wav(path)
+        result = decode_array(_model, audio)
+        decoded = time.perf_counter()
+        reply = assistant.respond(result["text"])
+    except Exception as e:
+        return {"path": path, "error": str(e)}
+    finished = time.perf_counter()
+    return {
+        "path": path,
+        "duration": round(audio.duration, 3),
+        "words": [(w.get("word"), w.get("conf")) for w in result["result"]],
+        **reply,
+        "decode_s": round(decoded - started, 4),
+        "nlu_s": round(finished - decoded, 4),
+        "rtf": round((decoded - started) / audio.duration, 4) if audio.duration else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe and label recorded queries in bulk")
+    parser.add_argument("source", help="directory of WAV files or a manifest")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output (default stdout)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--model", help="model directory (downloaded if omitted)")
+    args = parser.parse_args()
+
+    from model_loader import ensure_model
+
+    paths = find_inputs(args.source)
+    model_path = args.model or ensure_model()
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    started = time.perf_counter()
+    audio_s = decode_s = 0.0
+    done = errors = 0
+    try:
+        with multiprocessing.Pool(args.jobs, initializer=_init_worker, initargs=(model_path,)) as pool:
+            for record in pool.imap_unordered(transcribe_file, paths, chunksize=4):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                done += 1
+                if "error" in record:
+                    errors += 1
+                    continue
+                audio_s += record["duration"]
+                decode_s += record["decode_s"]
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    wall = time.perf_counter() - started
+    print(f"📊 {done} files ({errors} failed) in {wall:.1f}s with {args.jobs} workers: "
+          f"{done / wall:.2f} files/s, {audio_s:.1f}s of audio, "
+          f"per-worker RTF {decode_s / audio_s if audio_s else 0:.3f}, "
+          f"wall-clock RTF {wall / audio_s if audio_s else 0:.3f}", file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
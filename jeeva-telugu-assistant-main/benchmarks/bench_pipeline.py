@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import assistant  # noqa: E402
+from audio_buffer import AudioBuffer  # noqa: E402
+from audio_capture import Endpointer  # noqa: E402
+from batch_transcribe import find_inputs  # noqa: E402
+from streaming_asr import decode_array  # noqa: E402
+from tts_cache import TTSCache  # noqa: E402
+
+DEFAULT_FIXTURES = os.path.join(HERE, "fixtures", "manifest.jsonl")
+DEFAULT_BASELINE = os.path.join(HERE, "baseline.json")
+
+
+def local_tts(text, lang):
+    """Offline stand-in for gTTS: deterministic bytes, roughly MP3-sized for the text."""
+    rng = np.random.default_rng(len(text))
+    return rng.integers(0, 256, 600 * max(len(text), 1), dtype=np.uint8).tobytes()
+
+
+def load_fixtures(manifest):
+    transcripts = {}
+    with open(manifest, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                transcripts[entry["path"]] = entry.get("transcript", "")
+    base = os.path.dirname(os.path.abspath(manifest))
+    return [(path, transcripts[os.path.relpath(path, base)]) for path in find_inputs(manifest)]
+
+
+def timed(samples, stage, fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    samples.setdefault(stage, []).append(time.perf_counter() - started)
+    return result
+
+
+def endpoint(audio, block_ms=30):
+    ep = Endpointer(samplerate=audio.samplerate)
+    block = int(audio.samplerate * block_ms / 1000)
+    samples = audio.view()
+    for start in range(0, len(samples), block):
+        ep.feed(samples[start:start + block])
+        if ep.done:
+            break
+    return ep.audio()
+
+
+def run(fixtures, repeat, model=None):
+    samples = {}
+    audio_seconds = {}
+    with tempfile.TemporaryDirectory(prefix="jeeva-bench-tts-") as cache_dir:
+        cache = TTSCache(cache_dir, backend="local", synthesize=local_tts)
+        for i in range(repeat):
+            for path, transcript in fixtures:
+                audio = timed(samples, "file_load", AudioBuffer.from_wav, path)
+                utterance = timed(samples, "capture_endpoint", endpoint, audio)
+                audio_seconds.setdefault("file_load", []).append(audio.duration)
+                audio_seconds.setdefault("capture_endpoint", []).append(audio.duration)
+                if model is not None:
+                    result = timed(samples, "vosk_decode", decode_array, model, utterance)
+                    audio_seconds.setdefault("vosk_decode", []).append(utterance.duration)
+                    transcript = result["text"] or transcript
+                if not transcript:
+                    continue
+                corrected, _ = timed(samples, "improve_recognition", assistant.correct, transcript)
+                match = timed(samples, "intent_match", assistant.match_intent, corrected)
+                response = assistant.response_for(corrected, match)
+                # First pass synthesizes every reply once, later passes hit the memory tier
+                stage = "tts_synthesis" if i == 0 else "tts_cached"
+                timed(samples, stage, cache.get_bytes, response, "te")
+    return samples, audio_seconds
+
+
+def summarize(samples, audio_seconds):
+    report = {}
+    for stage, values in samples.items():
+        ms = np.array(values) * 1000
+        entry = {
+            "n": len(values),
+            "p50_ms": round(float(np.percentile(ms, 50)), 4),
+            "p95_ms": round(float(np.percentile(ms, 95)), 4),
+            "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        }
+        if stage in audio_seconds and sum(audio_seconds[stage]):
+            entry["rtf"] = round(sum(values) / sum(audio_seconds[stage]), 5)
+        report[stage] = entry
+    return report
+
+
+def too_few_samples(report, baseline, min_samples):
+    """Stages left out of the comparison: a p95 of fewer than `min_samples` values is noise."""
+    return [stage for stage, base in baseline.get("stages", {}).items()
+            if stage in report and min(base["n"], report[stage]["n"]) < min_samples]
+
+
+def compare(report, baseline, tolerance, min_delta_ms=0.1, min_samples=20):
+    """Stages whose p95 got slower than baseline * (1 + tolerance) and by at least min_delta_ms.
+
+    Stages with fewer than `min_samples` timings on either side are skipped.
+    """
+    regressions = []
+    skipped = too_few_samples(report, baseline, min_samples)
+    for stage, base in baseline.get("stages", {}).items():
+        if stage not in report or stage in skipped:
+            continue
+        limit = max(base["p95_ms"] * (1 + tolerance), base["p95_ms"] + min_delta_ms)
+        if report[stage]["p95_ms"] > limit:
+            regressions.append((stage, report[stage]["p95_ms"], base["p95_ms"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage latency benchmark for the Jeeva pipeline")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="manifest or directory of WAVs")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--model", help="Vosk model directory; the decode stage is skipped without it")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed p95 slowdown before failing (0.5 = 50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1,
+                        help="ignore p95 changes smaller than this, for sub-millisecond stages")
+    parser.add_argument("--min-samples", type=int, default=20,
+                        help="only compare stages timed at least this many times (tts_synthesis "
+                             "runs once per distinct reply)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    model = None
+    if args.model:
+        import vosk
+        vosk.SetLogLevel(-1)
+        model = vosk.Model(args.model)
+
+    samples, audio_seconds = run(load_fixtures(args.fixtures), args.repeat, model)
+    report = summarize(samples, audio_seconds)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'stage':<22}{'n':>6}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'RTF':>10}")
+        for stage, r in report.items():
+            rtf = f"{r['rtf']:.4f}" if "rtf" in r else "-"
+            print(f"{stage:<22}{r['n']:>6}{r['p50_ms']:>11.3f}{r['p95_ms']:>11.3f}{r['p99_ms']:>11.3f}{rtf:>10}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"stages": report}, f, indent=2)
+            f.write("\n")
+        print(f"📌 Baseline written to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        for stage in too_few_samples(report, baseline, args.min_samples):
+            print(f"ℹ️ {stage}: fewer than {args.min_samples} samples, not compared")
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms, args.min_samples)
+        for stage, now, before in regressions:
+            print(f"❌ {stage}: p95 {now:.3f} ms vs baseline {before:.3f} ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("✅ No stage slower than baseline")
+
+
+if __name__ == "__main__":
+    main()
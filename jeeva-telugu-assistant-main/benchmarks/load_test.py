@@ -0,0 +1,293 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from asr_client import server_reply  # noqa: E402
+import assistant  # noqa: E402
+from audio_buffer import AudioBuffer  # noqa: E402
+from audio_capture import Endpointer, capture_utterance  # noqa: E402
+from bench_pipeline import DEFAULT_FIXTURES, load_fixtures, local_tts  # noqa: E402
+from prefork import memory_usage  # noqa: E402
+from tts_cache import TTSCache  # noqa: E402
+
+# Simulated users replay recorded utterances through the same capture ->
+# decode -> understand -> speak path as main.py, with the microphone replaced
+# by a replayed input stream. Each user thread captures and decodes as the
+# audio "arrives"; the work after the endpoint (final decode, NLU, TTS) runs
+# on a shared pool of --workers threads, like the app's request scheduler.
+
+_session = threading.local()
+
+
+class ReplayInputStream:
+    """Stands in for sounddevice.InputStream: plays the current session's audio into the callback.
+
+    The audio is whatever the creating thread put in `_session.audio`, sent in
+    `blocksize` blocks at `speed` times real time (0 = as fast as possible),
+    followed by up to `tail_s` of silence so the endpointer can close (or time out).
+    """
+
+    def __init__(self, samplerate, blocksize, callback, channels=1, tail_s=10.0, **kwargs):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.channels = channels
+        self.audio = _session.audio
+        self.speed = _session.speed
+        self.tail = int(samplerate * tail_s)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="replay-stream", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        audio = np.concatenate([self.audio, np.zeros(self.tail, dtype=np.int16)])
+        started = time.perf_counter()
+        for fed in range(0, len(audio) - self.blocksize + 1, self.blocksize):
+            if self._stop.is_set():
+                return
+            if self.speed:
+                delay = started + fed / self.samplerate / self.speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            block = audio[fed:fed + self.blocksize, None]
+            self.callback(np.repeat(block, self.channels, axis=1), self.blocksize, None, None)
+
+
+def install_replay_input():
+    """Make `import sounddevice` (done inside capture_utterance) return the replay stub."""
+    module = types.ModuleType("sounddevice")
+    module.InputStream = ReplayInputStream
+    sys.modules["sounddevice"] = module
+
+
+class ScriptedDecoder:
+    """Decoder stand-in without a model: returns the fixture's transcript."""
+
+    def __init__(self, transcript):
+        self.transcript = transcript
+
+    def accept(self, block):
+        pass
+
+    def finish(self):
+        words = [{"word": w, "conf": 1.0} for w in self.transcript.split()]
+        return {"text": self.transcript, "result": words}
+
+
+def make_decoder_factory(model=None, url=None):
+    def make(transcript):
+        if url:
+            from asr_client import RemoteDecoder
+            return RemoteDecoder(url)
+        if model is not None:
+            from streaming_asr import StreamingDecoder
+            return StreamingDecoder(model)
+        return ScriptedDecoder(transcript)
+    return make
+
+
+def slow_tts(delay_s):
+    """local_tts plus a fixed delay per synthesis, to mimic a network TTS backend."""
+    def synthesize(text, lang):
+        time.sleep(delay_s)
+        return local_tts(text, lang)
+    return synthesize
+
+
+def session(audio, transcript, make_decoder, pool, tts_cache, speed):
+    """One utterance from one user; returns its timings in seconds."""
+    _session.audio = audio.view()
+    _session.speed = speed
+    started = time.perf_counter()
+    decoder = make_decoder(transcript)
+    connected = time.perf_counter()
+    capture_utterance(samplerate=16000, endpointer=Endpointer(16000), on_block=decoder.accept,
+                      device_samplerate=audio.samplerate)
+    endpoint = time.perf_counter()
+
+    def respond():
+        begun = time.perf_counter()
+        result = decoder.finish()
+        if "response" in result:
+            # The ASR server already did the NLU; don't time it twice
+            reply = server_reply(result)
+        else:
+            reply = assistant.understand(result["text"]) if result["text"].strip() else None
+        if reply is not None:
+            tts_cache.get_bytes(reply.response, "te")
+        return begun
+
+    begun = pool.submit(respond).result()
+    done = time.perf_counter()
+    return {"connect": connected - started, "queue": begun - endpoint, "e2e": done - endpoint,
+            "audio": audio.duration}
+
+
+def cpu_seconds(pids=()):
+    """CPU time of this process, or of `pids` (from /proc, Linux) when given."""
+    if not pids:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return usage.ru_utime + usage.ru_stime
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0.0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += (int(fields[11]) + int(fields[12])) / ticks  # utime, stime
+    return total
+
+
+def rss_bytes(pids=()):
+    """Resident memory of this process or of `pids`; PSS when several share pages."""
+    if not pids:
+        usage = memory_usage()
+        if usage is None:  # Not Linux: peak RSS is the best available
+            scale = 1 if sys.platform == "darwin" else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        return usage["rss"]
+    usages = [u for u in map(memory_usage, pids) if u]
+    key = "pss" if len(usages) > 1 else "rss"
+    return sum(u[key] for u in usages)
+
+
+def run_level(fixtures, users, utterances, make_decoder, workers, tts_cache, speed, think_s,
+              server_pids=()):
+    """Run `users` concurrent users for `utterances` each; returns the level's report."""
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def user(index):
+        for i in range(utterances):
+            audio, transcript = fixtures[(index + i) % len(fixtures)]
+            try:
+                timing = session(audio, transcript, make_decoder, pool, tts_cache, speed)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                results.append(timing)
+            if think_s:
+                time.sleep(think_s)
+
+    cpu_before, server_cpu_before = cpu_seconds(), cpu_seconds(server_pids)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="load-worker") as pool:
+        threads = [threading.Thread(target=user, args=(i,), name=f"load-user-{i}")
+                   for i in range(users)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    wall = time.perf_counter() - started
+
+    def pct(key, q):
+        values = [r[key] for r in results]
+        return round(float(np.percentile(values, q)) * 1000, 2) if values else None
+
+    report = {
+        "users": users,
+        "completed": len(results),
+        "errors": len(errors),
+        "throughput_per_s": round(len(results) / wall, 3),
+        "audio_x_realtime": round(sum(r["audio"] for r in results) / wall, 3),
+        "connect_p50_ms": pct("connect", 50),
+        "queue_p50_ms": pct("queue", 50),
+        "queue_p99_ms": pct("queue", 99),
+        "e2e_p50_ms": pct("e2e", 50),
+        "e2e_p95_ms": pct("e2e", 95),
+        "e2e_p99_ms": pct("e2e", 99),
+        "cpu_cores": round((cpu_seconds() - cpu_before) / wall, 3),
+        "rss_mb": round(rss_bytes() / 2 ** 20, 1),
+    }
+    if server_pids:
+        report["server_cpu_cores"] = round((cpu_seconds(server_pids) - server_cpu_before) / wall, 3)
+        report["server_rss_mb"] = round(rss_bytes(server_pids) / 2 ** 20, 1)
+    if errors:
+        report["first_error"] = errors[0]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded utterances as concurrent simulated users")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="manifest or directory of WAVs")
+    parser.add_argument("--concurrency", default="1,2,4,8",
+                        help="comma-separated numbers of simultaneous users, one run each")
+    parser.add_argument("--utterances", type=int, default=10, help="utterances per user per run")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed (1 = real time, 0 = as fast as possible)")
+    parser.add_argument("--think-ms", type=float, default=0, help="pause between a user's utterances")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="threads for the work after the endpoint (in-process pipeline)")
+    parser.add_argument("--model", help="Vosk model directory; without it and --url the "
+                                        "fixture transcripts stand in for decoding")
+    parser.add_argument("--url", help="decode on this asr_server instead of in-process")
+    parser.add_argument("--server-pid", default="",
+                        help="comma-separated server process IDs to report CPU and memory for")
+    parser.add_argument("--tts-ms", type=float, default=0,
+                        help="added latency per synthesized reply (local TTS stand-in)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    install_replay_input()
+    model = None
+    if args.model and not args.url:
+        import vosk
+        vosk.SetLogLevel(-1)
+        model = vosk.Model(args.model)
+    fixtures = [(AudioBuffer.from_wav(path), transcript)
+                for path, transcript in load_fixtures(args.fixtures)]
+    tts_cache = TTSCache(tempfile.mkdtemp(prefix="jeeva-load-tts-"), backend="local",
+                         synthesize=slow_tts(args.tts_ms / 1000))
+    make_decoder = make_decoder_factory(model, args.url)
+    server_pids = [int(p) for p in args.server_pid.split(",") if p.strip()]
+
+    reports = []
+    if not args.json:
+        target = args.url or ("in-process" + ("" if model is not None else ", scripted decoding"))
+        print(f"🧪 Load test against {target}, {args.utterances} utterances per user, "
+              f"speed {args.speed or 'max'}")
+        print(f"{'users':>6}{'done':>7}{'err':>5}{'utt/s':>8}{'xRT':>7}{'queue p99':>11}"
+              f"{'e2e p50':>9}{'e2e p99':>9}{'CPU':>7}{'RSS MB':>8}")
+    for users in (int(n) for n in args.concurrency.split(",")):
+        r = run_level(fixtures, users, args.utterances, make_decoder, args.workers, tts_cache,
+                      args.speed, args.think_ms / 1000, server_pids)
+        reports.append(r)
+        if not args.json:
+            print(f"{r['users']:>6}{r['completed']:>7}{r['errors']:>5}{r['throughput_per_s']:>8.2f}"
+                  f"{r['audio_x_realtime']:>7.2f}{r['queue_p99_ms'] or 0:>11.1f}"
+                  f"{r['e2e_p50_ms'] or 0:>9.1f}{r['e2e_p99_ms'] or 0:>9.1f}"
+                  f"{r['cpu_cores']:>7.2f}{r['rss_mb']:>8.1f}")
+            if "server_cpu_cores" in r:
+                print(f"{'':>6}server: CPU {r['server_cpu_cores']:.2f} cores, "
+                      f"memory {r['server_rss_mb']:.1f} MB")
+            if r["errors"]:
+                print(f"{'':>6}❌ {r['errors']} failed, first: {r['first_error']}")
+    if args.json:
+        print(json.dumps({"levels": reports}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_buffer import AudioBuffer  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SAMPLERATE = 16000
+
+# name, transcript used for the text stages, speech seconds, noise level
+UTTERANCES = [
+    ("varsham_short", "varsham paduthunda", 1.2, 30),
+    ("bigg_boss_misheard", "bigg boss paduthunda", 1.6, 30),
+    ("eruvu_dhara_long", "eruvu dhara enti cheppandi tomato ki", 3.5, 30),
+    ("namaskaram_noisy", "hello namaskaram", 1.0, 600),
+    ("silence", "", 0.0, 30),
+]
+
+
+def synth_speech(seconds, rng):
+    """Syllable-rate modulated harmonics: enough like speech for the endpointer and decoder timing."""
+    t = np.arange(int(seconds * SAMPLERATE)) / SAMPLERATE
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLERATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)), 0, None) ** 0.5
+    return 6000 * voiced * envelope
+
+
+def main():
+    """Regenerate the synthetic fixtures. Real recordings can be dropped in alongside them."""
+    rng = np.random.default_rng(42)
+    os.makedirs(FIXTURES, exist_ok=True)
+    with open(os.path.join(FIXTURES, "manifest.jsonl"), "w", encoding="utf-8") as manifest:
+        for name, transcript, speech_s, noise in UTTERANCES:
+            lead, tail = 0.4, 0.9
+            total = int((lead + speech_s + tail) * SAMPLERATE)
+            audio = rng.normal(0, noise, total)
+            start = int(lead * SAMPLERATE)
+            speech = synth_speech(speech_s, rng)
+            audio[start:start + len(speech)] += speech
+            samples = np.clip(audio, -32768, 32767).astype(np.int16)
+            AudioBuffer.from_array(samples, SAMPLERATE).save_wav(os.path.join(FIXTURES, name + ".wav"))
+            manifest.write(json.dumps({"path": name + ".wav", "transcript": transcript}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 title = Jeeva
 package.name = jeeva
 package.domain = org.jeeva
-source.include_exts = py,kv,wav,mp3,zip
-requirements = kivy, vosk, sounddevice, gtts
+source.include_exts = py,kv,wav,mp3,zip,json
+requirements = kivy, vosk, sounddevice, gtts, numpy
 android.permissions = RECORD_AUDIO, INTERNET
 orientation = portrait
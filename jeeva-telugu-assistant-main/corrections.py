@@ -0,0 +1,72 @@
+import json
+import os
+
+from intent_engine import IntentIndex, normalize
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corrections.json")
+
+
+class CorrectionEngine:
+    """Rewrite common Vosk misrecognitions in one pass over the transcript.
+
+    Phrases are stored in a trie keyed by whole words, so matching is word
+    boundary aware by construction ("v" only fixes the word "v", never the v
+    in "vyadi"). At each position the longest phrase wins and matching resumes
+    after it, giving leftmost-longest, non-overlapping replacements in time
+    linear in the number of words. Words no phrase covers are tried against a
+    fuzzy index of the single-word entries.
+    """
+
+    def __init__(self, corrections, fuzzy_threshold=0.75):
+        self.trie = {}
+        self.phrase_count = 0
+        self.targets = list(corrections)
+        fuzzy = {}
+        for correct, wrongs in corrections.items():
+            for wrong in wrongs:
+                words = normalize(wrong).split()
+                if not words:
+                    continue
+                node = self.trie
+                for word in words:
+                    node = node.setdefault(word, {})
+                node[None] = correct
+                self.phrase_count += 1
+                if len(words) == 1:
+                    fuzzy.setdefault(correct, (fuzzy_threshold, []))[1].append(words[0])
+        self.fuzzy = IntentIndex(fuzzy)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["corrections"], data.get("fuzzy_threshold", 0.75))
+
+    def correct(self, text):
+        """Return (corrected text, [(wrong, correct, similarity), ...])."""
+        words = normalize(text).split()
+        out = []
+        applied = []
+        i = 0
+        while i < len(words):
+            node = self.trie
+            replacement, end = None, i
+            j = i
+            while j < len(words) and words[j] in node:
+                node = node[words[j]]
+                j += 1
+                if None in node:
+                    replacement, end = node[None], j
+            if replacement is not None:
+                out.append(replacement)
+                applied.append((" ".join(words[i:end]), replacement, 1.0))
+                i = end
+                continue
+            match = self.fuzzy.match(words[i])
+            if match and match.intent != words[i]:
+                out.append(match.intent)
+                applied.append((words[i], match.intent, match.score))
+            else:
+                out.append(words[i])
+            i += 1
+        return " ".join(out), applied
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import threading
+
+UNK = "[unk]"
+
+
+def is_telugu(phrase):
+    """True for a phrase written in Telugu script (the model's own vocabulary)."""
+    letters = [c for c in phrase if c.isalpha()]
+    return bool(letters) and all("\u0c00" <= c <= "\u0c7f" for c in letters)
+
+
+def build_grammar(synonyms, model=None):
+    """Phrase list for a Vosk grammar from the Telugu intent synonyms.
+
+    Romanized and English synonyms are left out, as are aliases and the
+    correction lists: those describe what Vosk mishears, and in the grammar
+    they would only pull Telugu speech onto English words. Phrases with words
+    the model does not know are dropped up front (Vosk would only warn and
+    ignore them), and "[unk]" is appended so speech outside the grammar does
+    not get forced onto the nearest keyword.
+    """
+    seen = []
+    for phrases in synonyms.values():
+        for phrase in phrases:
+            phrase = " ".join(phrase.lower().split())
+            if not is_telugu(phrase) or phrase in seen:
+                continue
+            if model is not None and any(model.find_word(w) < 0 for w in phrase.split()):
+                continue
+            seen.append(phrase)
+    return seen + [UNK]
+
+
+def clean_text(text):
+    return " ".join(w for w in text.split() if w != UNK)
+
+
+def mean_confidence(result):
+    words = [w for w in result.get("result", []) if w.get("word") != UNK]
+    if not words:
+        return 0.0
+    return sum(w.get("conf", 0.0) for w in words) / len(words)
+
+
+class GrammarRecognizers:
+    """KaldiRecognizers constrained to the current grammar, cached per grammar version.
+
+    Building a grammar recognizer compiles a small decoding graph, so idle
+    recognizers are kept and reused; a new version (changed vocabulary)
+    simply starts a fresh cache and the old one is dropped.
+    """
+
+    def __init__(self, model, samplerate=16000, min_confidence=0.6):
+        self.model = model
+        self.samplerate = samplerate
+        self.min_confidence = min_confidence
+        self.version = None
+        self.grammar_json = None
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def set_grammar(self, phrases):
+        grammar_json = json.dumps(phrases, ensure_ascii=False)
+        version = hashlib.sha1(grammar_json.encode("utf-8")).hexdigest()[:12]
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self.grammar_json = grammar_json
+                self._idle = []
+        return version
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            grammar_json, version = self.grammar_json, self.version
+        import vosk
+        rec = vosk.KaldiRecognizer(self.model, self.samplerate, grammar_json)
+        rec.grammar_version = version
+        return rec
+
+    def release(self, rec):
+        rec.Reset()
+        with self._lock:
+            if getattr(rec, "grammar_version", None) == self.version:
+                self._idle.append(rec)
+
+    def confident(self, result):
+        """Whether a grammar result is good enough to skip the open-vocabulary pass."""
+        return bool(clean_text(result.get("text", ""))) and mean_confidence(result) >= self.min_confidence
@@ -0,0 +1,147 @@
+import collections
+from difflib import SequenceMatcher
+
+
+def normalize(text):
+    return " ".join(text.lower().split())
+
+
+def _grams(term):
+    padded = f"^{term}$"
+    return collections.Counter(padded[i:i + 2] for i in range(len(padded) - 1))
+
+
+def min_shared_grams(a, b, threshold):
+    """Fewest padded bigrams two terms of lengths `a` and `b` share when their ratio > threshold.
+
+    difflib's ratio is 2M/(a+b) for M matched characters in k blocks. A block
+    of L characters shares L-1 bigrams, and so does an empty gap before the
+    first or after the last block (through the padding). Every gap between
+    blocks costs at least one of the a+b-2M unmatched characters, and so does
+    every non-empty end gap, which leaves at least 3M-(a+b)+1 shared bigrams.
+    """
+    matched = int(threshold * (a + b) / 2) + 1
+    return 3 * matched - (a + b) + 1
+
+
+IntentMatch = collections.namedtuple("IntentMatch", "intent score query_term vocab_term")
+
+
+class IntentIndex:
+    """Fuzzy keyword matcher for all intents at once.
+
+    `vocabulary` maps intent name -> (threshold, keywords), in priority order.
+    Keywords are normalised and indexed by padded character bigrams and
+    length when the index is built. A term can only clear its threshold if it
+    shares at least `min_shared_grams()` bigrams with the query word, so a
+    query word counts the bigrams it shares with the terms of plausible
+    lengths only and scores just the terms reaching that bound: most of the
+    vocabulary is never compared. Those go through `real_quick_ratio` and
+    `quick_ratio` before the full `SequenceMatcher.ratio`. Term lengths for
+    which the bound is zero (only possible below a 2/3 threshold) are
+    compared directly.
+    """
+
+    def __init__(self, vocabulary):
+        self.priority = list(vocabulary)
+        self.thresholds = {}
+        self.terms = []                 # term id -> normalised term
+        self.term_intents = []          # term id -> [intent, ...]
+        self.term_thresholds = []       # term id -> lowest threshold of its intents
+        # bigram -> term length -> [term id, ...], an id once per occurrence of the bigram
+        self.postings = collections.defaultdict(lambda: collections.defaultdict(list))
+        self.by_length = collections.defaultdict(list)
+        self.ngram_sizes = set()
+        ids = {}
+        for intent, (threshold, keywords) in vocabulary.items():
+            self.thresholds[intent] = threshold
+            for keyword in keywords:
+                term = normalize(keyword)
+                if not term:
+                    continue
+                if term in ids:
+                    term_id = ids[term]
+                    if intent not in self.term_intents[term_id]:
+                        self.term_intents[term_id].append(intent)
+                        self.term_thresholds[term_id] = min(self.term_thresholds[term_id], threshold)
+                    continue
+                term_id = ids[term] = len(self.terms)
+                self.terms.append(term)
+                self.term_intents.append([intent])
+                self.term_thresholds.append(threshold)
+                self.ngram_sizes.add(term.count(" ") + 1)
+                self.by_length[len(term)].append(term_id)
+                for gram, count in _grams(term).items():
+                    self.postings[gram][len(term)].extend([term_id] * count)
+        self.min_threshold = min(self.thresholds.values(), default=1.0)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _query_terms(self, query):
+        words = normalize(query).split()
+        for n in sorted(self.ngram_sizes):
+            for i in range(len(words) - n + 1):
+                yield " ".join(words[i:i + n])
+
+    def _candidates(self, q_term):
+        q_len = len(q_term)
+        q_grams = [self.postings[gram] for gram in _grams(q_term) if gram in self.postings]
+        shared = collections.Counter()
+        candidates = []
+        for t_len, term_ids in self.by_length.items():
+            if 2.0 * min(q_len, t_len) / (q_len + t_len) <= self.min_threshold:
+                continue
+            if min_shared_grams(q_len, t_len, self.min_threshold) <= 0:
+                candidates.extend(term_ids)
+                continue
+            for postings in q_grams:
+                # Counts a bigram the term repeats more often than the query too: an
+                # upper bound, so no term that could match is dropped
+                shared.update(postings.get(t_len, ()))
+        needed = {}
+        for term_id, count in shared.items():
+            key = (len(self.terms[term_id]), self.term_thresholds[term_id])
+            if key not in needed:
+                needed[key] = min_shared_grams(q_len, *key)
+            if count >= needed[key]:
+                candidates.append(term_id)
+        # Keyword order, so equal scores keep resolving to the first keyword listed
+        return sorted(candidates)
+
+    def scores(self, query):
+        """Best (score, query_term, vocab_term) per intent that clears its threshold."""
+        best = {}
+        matcher = SequenceMatcher(None)
+        for q_term in self._query_terms(query):
+            # seq2 is the side difflib preprocesses, so set it once per query term
+            matcher.set_seq2(q_term)
+            q_len = len(q_term)
+            for term_id in self._candidates(q_term):
+                term = self.terms[term_id]
+                t_len = len(term)
+                if 2.0 * min(q_len, t_len) / (q_len + t_len) <= self.min_threshold:
+                    continue
+                matcher.set_seq1(term)
+                if matcher.real_quick_ratio() <= self.min_threshold:
+                    continue
+                if matcher.quick_ratio() <= self.min_threshold:
+                    continue
+                score = matcher.ratio()
+                for intent in self.term_intents[term_id]:
+                    if score <= self.thresholds[intent]:
+                        continue
+                    if intent not in best or score > best[intent][0]:
+                        best[intent] = (score, q_term, term)
+        return best
+
+    def match(self, query):
+        """Return the best IntentMatch, or None. Ties go to the earlier intent."""
+        best = self.scores(query)
+        winner = None
+        for intent in self.priority:
+            if intent in best and (winner is None or best[intent][0] > best[winner][0]):
+                winner = intent
+        if winner is None:
+            return None
+        return IntentMatch(winner, *best[winner])
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import threading
+import types
+
+from intent_engine import IntentIndex
+
+DEFAULT_PATH = os.environ.get(
+    "JEEVA_KNOWLEDGE_BASE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "knowledge_base.json"))
+
+# File format:
+#   {"replies": {"no_speech", "unclear", "unclear_echo" (with {query}), "web_unclear"},
+#    "intents": [{"name", "priority", "threshold", "synonyms": [...], "aliases": [...],
+#                 "response", "web_response"}, ...]}
+# Synonyms are real ways of saying the intent, aliases are Vosk misrecognitions of
+# them; both are matched the same way. On a tie the higher priority wins.
+REPLY_KEYS = ("no_speech", "unclear", "unclear_echo", "web_unclear")
+
+
+class KnowledgeBase:
+    """Intents, keywords and replies compiled into one read-only matcher.
+
+    Built once per file version and never modified afterwards, so any number
+    of threads can use the same instance; a reload builds a new one instead.
+    """
+
+    __slots__ = ("version", "intents", "vocabulary", "synonyms", "index", "responses", "web_responses",
+                 "replies")
+
+    def __init__(self, data, version=None):
+        intents = data.get("intents")
+        if not intents:
+            raise ValueError("knowledge base has no intents")
+        missing = [key for key in REPLY_KEYS if key not in data.get("replies", {})]
+        if missing:
+            raise ValueError(f"knowledge base is missing replies: {', '.join(missing)}")
+        names = [intent["name"] for intent in intents]
+        if len(set(names)) != len(names):
+            raise ValueError("duplicate intent names in knowledge base")
+
+        ordered = sorted(intents, key=lambda intent: -intent.get("priority", 0))
+        vocabulary = {}
+        for intent in ordered:
+            keywords = tuple(intent.get("synonyms", ())) + tuple(intent.get("aliases", ()))
+            vocabulary[intent["name"]] = (float(intent.get("threshold", 0.75)), keywords)
+        set_ = object.__setattr__
+        set_(self, "version", version or hashlib.sha1(
+            json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()[:12])
+        set_(self, "intents", tuple(vocabulary))
+        set_(self, "vocabulary", types.MappingProxyType(vocabulary))
+        set_(self, "synonyms", types.MappingProxyType(
+            {intent["name"]: tuple(intent.get("synonyms", ())) for intent in ordered}))
+        set_(self, "index", IntentIndex(vocabulary))
+        set_(self, "responses", types.MappingProxyType({i["name"]: i["response"] for i in intents}))
+        set_(self, "web_responses", types.MappingProxyType(
+            {i["name"]: i.get("web_response", i["response"]) for i in intents}))
+        set_(self, "replies", types.MappingProxyType(dict(data["replies"])))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("KnowledgeBase is read-only")
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path, "rb") as f:
+            raw = f.read()
+        return cls(json.loads(raw.decode("utf-8")), hashlib.sha1(raw).hexdigest()[:12])
+
+    def match(self, query):
+        return self.index.match(query)
+
+    def response_for(self, query, match, web=False):
+        if match:
+            return (self.web_responses if web else self.responses)[match.intent]
+        if web:
+            return self.replies["web_unclear"]
+        # Check if query contains any meaningful words
+        if len(query.strip()) > 2:
+            return self.replies["unclear_echo"].format(query=query)
+        return self.replies["unclear"]
+
+    def canned_responses(self):
+        """Every reply that does not depend on what the user said."""
+        texts = list(self.responses.values()) + [self.replies["no_speech"], self.replies["unclear"]]
+        texts += list(self.web_responses.values()) + [self.replies["web_unclear"]]
+        return list(dict.fromkeys(texts))
+
+
+class KnowledgeBaseWatcher:
+    """Holds the current KnowledgeBase and swaps in a new one when the file changes.
+
+    The file is polled on a daemon thread; a changed file is compiled there and
+    published with a single reference assignment, so readers see either the
+    old or the new knowledge base, never a mix. A file that fails to parse is
+    reported and the previous version stays in use.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, interval=2.0):
+        self.path = path
+        self.interval = interval
+        self.current = KnowledgeBase.load(path)
+        self._stamp = self._file_stamp()
+        self._listeners = []
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def subscribe(self, callback):
+        """Call `callback(kb)` on the watcher thread after every successful reload."""
+        self._listeners.append(callback)
+
+    def reload(self):
+        """Recompile if the file changed; returns True when a new version was published."""
+        with self._lock:
+            stamp = self._file_stamp()
+            if stamp is None or stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            try:
+                kb = KnowledgeBase.load(self.path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                print(f"📚 Keeping knowledge base {self.current.version}, could not load {self.path}: {e}")
+                return False
+            if kb.version == self.current.version:
+                return False
+            self.current = kb
+        print(f"📚 Knowledge base reloaded: version {kb.version}, {len(kb.intents)} intents")
+        for callback in self._listeners:
+            try:
+                callback(kb)
+            except Exception as e:
+                print(f"📚 Knowledge base listener failed: {e}")
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="jeeva-kb-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Stop polling; `start` may be called again afterwards."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.reload()
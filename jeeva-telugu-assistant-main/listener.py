@@ -0,0 +1,311 @@
+import collections
+import json
+import queue
+import threading
+import time
+
+import numpy as np
+
+from audio_capture import Endpointer
+from audio_frontend import Resampler
+from metrics import METRICS, trace
+
+
+class SpeechGate:
+    """Cheap speech/no-speech decision for every block of an always-open stream.
+
+    Each block is cut into `frame_ms` frames and their energies and
+    zero-crossing rates are computed in one pass with NumPy. A frame counts
+    as speech when it is `threshold_db` above the noise floor (the quietest
+    frame of the last `floor_window_ms`, so it can rise with steady noise as
+    well as fall) and its zero-crossing rate is below `max_zcr` (hiss and wind cross zero far more
+    often than voiced speech). The gate opens after `min_speech_ms` of
+    consecutive speech frames. An `echo` suppressor, when set and active,
+    further vetoes frames that are only Jeeva's own reply.
+    """
+
+    def __init__(self, samplerate=16000, frame_ms=10, threshold_db=12.0, min_level_db=-50.0,
+                 max_zcr=0.35, min_speech_ms=120, floor_window_ms=1500):
+        self.frame = int(samplerate * frame_ms / 1000)
+        self.floor_window_frames = max(1, floor_window_ms // frame_ms)
+        self.threshold_db = threshold_db
+        self.min_level_db = min_level_db
+        self.max_zcr = max_zcr
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.echo = None
+        self.reset()
+
+    def reset(self):
+        self.noise_floor_db = self.min_level_db - self.threshold_db
+        self.floor_mins = collections.deque()  # Sliding minimum: (end frame, level), levels ascending
+        self.frames_seen = 0
+        self.run = 0
+
+    def speech_frames(self, block):
+        """Boolean speech decision per frame of `block` (int16 mono)."""
+        n = len(block) // self.frame * self.frame
+        if n == 0:
+            return np.zeros(0, dtype=bool)
+        frames = np.asarray(block[:n], dtype=np.float32).reshape(-1, self.frame)
+        rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+        level = 20.0 * np.log10(rms + 1e-9)
+        zcr = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / self.frame
+        self.frames_seen += len(level)
+        quietest = float(level.min())
+        while self.floor_mins and self.floor_mins[-1][1] >= quietest:
+            self.floor_mins.pop()
+        self.floor_mins.append((self.frames_seen, quietest))
+        while self.floor_mins[0][0] <= self.frames_seen - self.floor_window_frames:
+            self.floor_mins.popleft()
+        self.noise_floor_db = self.floor_mins[0][1]
+        loud = level > max(self.noise_floor_db + self.threshold_db, self.min_level_db)
+        speech = loud & (zcr < self.max_zcr)
+        if self.echo is not None and self.echo.active:
+            speech &= self.echo.user_frames(level, self.noise_floor_db + self.threshold_db)
+        return speech
+
+    def update(self, block):
+        """Feed one block; True once speech has lasted long enough to wake the recognizer."""
+        for speech in self.speech_frames(block):
+            self.run = self.run + 1 if speech else 0
+        return self.run >= self.min_speech_frames
+
+
+class EchoSuppressor:
+    """Tells the user's voice apart from Jeeva's reply coming back through the microphone.
+
+    The reply being played is known, so its level is tabulated per frame when
+    playback starts. Each microphone frame is compared with the loudest
+    reply frame of the last `max_delay_ms` (the speaker-to-mic path delay is
+    unknown), shifted by the measured speaker-to-mic gain; only frames
+    `margin_db` above that expected echo count as the user. The gain is
+    learned from frames that are not the user. Without a reference signal the
+    gate threshold is just raised by `fallback_db` during playback.
+    """
+
+    def __init__(self, samplerate=16000, frame_ms=10, max_delay_ms=300, margin_db=6.0,
+                 fallback_db=15.0, gain_db=0.0, tail_ms=300):
+        self.samplerate = samplerate
+        self.frame = int(samplerate * frame_ms / 1000)
+        self.frame_s = frame_ms / 1000
+        self.window = max(1, max_delay_ms // frame_ms)
+        self.margin_db = margin_db
+        self.fallback_db = fallback_db
+        self.gain_db = gain_db
+        self.tail_s = tail_ms / 1000
+        self.expected = None
+        self.started_at = None
+        self.until = 0.0
+
+    def start(self, reference=None, started_at=None):
+        self.started_at = started_at or time.monotonic()
+        self.expected = None
+        duration = 30.0  # Unknown length: stays active until stop()
+        if reference is not None and len(reference) >= self.frame:
+            n = len(reference) // self.frame * self.frame
+            frames = np.asarray(reference[:n], dtype=np.float32).reshape(-1, self.frame)
+            level = 20.0 * np.log10(np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0 + 1e-9)
+            # Sliding max over the delay window, so any delay up to max_delay_ms is covered
+            padded = np.concatenate([np.full(self.window - 1, -120.0), level])
+            self.expected = np.lib.stride_tricks.sliding_window_view(padded, self.window).max(axis=1)
+            duration = len(level) * self.frame_s
+        self.until = self.started_at + duration + self.tail_s
+
+    def stop(self):
+        # Keep suppressing briefly: the room still rings after the player stops
+        self.until = min(self.until, time.monotonic() + self.tail_s)
+
+    @property
+    def active(self):
+        return time.monotonic() < self.until
+
+    def user_frames(self, level, threshold_db):
+        """Mask of the frames in `level` (dB, newest last) that are louder than the echo."""
+        if self.expected is None:
+            return level > threshold_db + self.fallback_db
+        now = time.monotonic()
+        idx = ((now - self.started_at) / self.frame_s - np.arange(len(level))[::-1]).astype(int)
+        idx = np.clip(idx, 0, len(self.expected) - 1)
+        expected = self.expected[idx]
+        user = level > expected + self.gain_db + self.margin_db
+        # Learn the gain from non-user frames while the reply is loud. It rises fast and
+        # decays slowly, settling near the upper end of the measured gains (more echo, not less).
+        # Frames under the gate threshold (pauses between the reply's syllables, while the
+        # window still holds the last loud frame) say nothing about the gain and are skipped.
+        for measured in (level - expected)[~user & (expected > -45.0) & (level > threshold_db)]:
+            rate = 0.3 if measured > self.gain_db else 0.02
+            self.gain_db = float(np.clip(self.gain_db + rate * (measured - self.gain_db), -40.0, 10.0))
+        return user
+
+
+class WakeWordSpotter:
+    """Tiny grammar recognizer that only listens for the wake word.
+
+    It runs on gated speech only, and costs a fraction of the full decoder
+    because its search space is a handful of words plus [unk].
+    """
+
+    def __init__(self, model, samplerate=16000, words=("jeeva", "జీవ")):
+        import vosk
+        self.words = set(words)
+        self.rec = vosk.KaldiRecognizer(model, samplerate, json.dumps(list(words) + ["[unk]"],
+                                                                      ensure_ascii=False))
+
+    def accept(self, block):
+        if self.rec.AcceptWaveform(np.asarray(block, dtype=np.int16).tobytes()):
+            text = json.loads(self.rec.Result()).get("text", "")
+        else:
+            text = json.loads(self.rec.PartialResult()).get("partial", "")
+        return any(word in self.words for word in text.split())
+
+    def reset(self):
+        self.rec.Reset()
+
+
+class ContinuousListener:
+    """Hands-free capture over one always-open input stream.
+
+    While idle only the SpeechGate runs on each block. When it opens (and,
+    with a wake word spotter, once the wake word was heard) a decoder from
+    `make_decoder()` and an Endpointer take over, starting with the pre-roll,
+    until the speaker stops; `on_utterance(decoder, audio)` then runs on the
+    listener thread. `pause()` drops incoming audio, e.g. while Jeeva itself
+    is talking, without closing the stream. `on_wake()` runs as soon as the
+    gate opens, before the utterance is captured (used for barge-in).
+    """
+
+    def __init__(self, make_decoder, on_utterance, samplerate=16000, device=None,
+                 device_samplerate=None, channels=1, block_ms=30, pre_roll_ms=300,
+                 silence_ms=700, max_utterance_s=10, gate=None, wake=None, wake_timeout_s=3.0,
+                 on_wake=None):
+        self.make_decoder = make_decoder
+        self.on_utterance = on_utterance
+        self.samplerate = samplerate
+        self.device = device
+        self.stream_rate = device_samplerate or samplerate
+        self.channels = channels
+        self.block_ms = block_ms
+        self.pre_roll_blocks = max(1, pre_roll_ms // block_ms)
+        self.silence_ms = silence_ms
+        self.max_utterance_s = max_utterance_s
+        self.gate = gate or SpeechGate(samplerate)
+        self.wake = wake
+        self.on_wake = on_wake
+        self.wake_blocks = int(wake_timeout_s * 1000 / block_ms)
+        self.paused = threading.Event()
+        self._stop = threading.Event()
+        self._blocks = queue.Queue(maxsize=100)
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="jeeva-listener", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def pause(self):
+        self.paused.set()
+
+    def resume(self):
+        if not self.paused.is_set():
+            return
+        # Start from a clean slate so audio from before the pause cannot trigger
+        while True:
+            try:
+                self._blocks.get_nowait()
+            except queue.Empty:
+                break
+        self.gate.run = 0
+        self.paused.clear()
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            METRICS.inc("input_stream_status_total")
+        if self.paused.is_set():
+            return
+        try:
+            self._blocks.put_nowait(indata.copy())
+        except queue.Full:
+            METRICS.inc("listener_dropped_blocks_total")
+
+    def _run(self):
+        import sounddevice as sd
+
+        resampler = Resampler(self.stream_rate, self.samplerate)
+        pre_roll = collections.deque(maxlen=self.pre_roll_blocks)
+        blocksize = int(self.stream_rate * self.block_ms / 1000)
+        with sd.InputStream(samplerate=self.stream_rate, blocksize=blocksize, device=self.device,
+                            channels=self.channels, dtype='int16', callback=self._callback):
+            print("👂 Continuous listening started")
+            while not self._stop.is_set():
+                try:
+                    block = self._blocks.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                block = resampler.process(block)
+                pre_roll.append(block)
+                if not self.gate.update(block):
+                    continue
+                METRICS.inc("listener_gate_open_total")
+                if self.wake and not self._spot_wake_word(pre_roll, resampler):
+                    pre_roll.clear()
+                    self.gate.run = 0
+                    continue
+                if self.on_wake:
+                    self.on_wake()
+                self._utterance(list(pre_roll), resampler)
+                pre_roll.clear()
+                self.gate.run = 0
+
+    def _spot_wake_word(self, pre_roll, resampler):
+        self.wake.reset()
+        blocks = list(pre_roll)
+        for i in range(self.wake_blocks):
+            block = blocks[i] if i < len(blocks) else self._next(resampler)
+            if block is None:
+                return False
+            if i >= len(blocks):
+                pre_roll.append(block)
+            if self.wake.accept(block):
+                trace("👂 Wake word heard")
+                METRICS.inc("listener_wake_total")
+                pre_roll.clear()  # The command follows the wake word
+                return True
+        return False
+
+    def _next(self, resampler):
+        while not self._stop.is_set():
+            try:
+                return resampler.process(self._blocks.get(timeout=0.5))
+            except queue.Empty:
+                continue
+        return None
+
+    def _utterance(self, blocks, resampler):
+        endpointer = Endpointer(self.samplerate, silence_ms=self.silence_ms,
+                                max_utterance_s=self.max_utterance_s,
+                                pre_roll_ms=self.pre_roll_blocks * self.block_ms, min_speech_ms=0,
+                                no_speech_timeout_s=self.max_utterance_s)
+        endpointer.seed_noise_floor(self.gate.noise_floor_db)  # Already measured while idle
+        decoder = self.make_decoder()
+        with METRICS.stage("capture"):
+            while not endpointer.done:
+                block = blocks.pop(0) if blocks else self._next(resampler)
+                if block is None or self.paused.is_set():
+                    break
+                for kept in endpointer.feed(block):
+                    decoder.accept(kept)
+        if endpointer.reason in (None, "no_speech"):
+            # Stopped, paused, or the gate fired on a noise burst: drop the decoder unfinished
+            if hasattr(decoder, "close"):
+                decoder.close()
+            return
+        METRICS.inc(f"capture_{endpointer.reason}_total")
+        trace("🎤 Capture stopped (%s), %.2fs kept", endpointer.reason,
+              endpointer.utterance_samples / self.samplerate)
+        self.on_utterance(decoder, endpointer.audio())
@@ -1,7 +1,6 @@
+from startup import PROFILE, load_in_background  # First, so startup timing begins at process start
 import os
 import sys
-import difflib
-import time # Added for sleep to ensure audio playback
 
 print("🔥 main.py is starting")
 
@@ -24,28 +23,31 @@ sys.setrecursionlimit(10000)
 try:
     print("📦 Importing model_loader...")
     from model_loader import ensure_model
+    from audio_capture import Endpointer, capture_utterance
+    from audio_frontend import Resampler, probe_input_device
+    from streaming_asr import StreamingDecoder, decode_array
+    from grammar_mode import UNK, GrammarRecognizers, clean_text
+    from listener import ContinuousListener, EchoSuppressor, SpeechGate, WakeWordSpotter
+    from speculation import Speculator
+    from scheduler import RequestScheduler, RequestTimeout
+    from asr_client import RemoteDecoder, server_reply
+    from audio_buffer import AudioBuffer, accept_pcm
+    import assistant
+    from tts_cache import TTSCache
+    from playback import PlaybackService
+    from session_archive import archive_from_env
+    from metrics import METRICS, trace, start_exporter_from_env
     print("✅ model_loader imported successfully")
 except ImportError as e:
     print(f"❌ Failed to import model_loader: {e}")
     exit(1)
 
-try:
-    print("📦 Importing vosk...")
-    import vosk
-    print("✅ vosk imported successfully")
-except ImportError as e:
-    print(f"❌ Failed to import vosk: {e}")
-    exit(1)
-
+# vosk and sounddevice are imported on the loader thread, after the window is up
 try:
     print("📦 Importing other libraries...")
-    import wave
     import json
-    import sounddevice as sd
-    import tempfile
     import threading
-    from gtts import gTTS
-    import re
+    from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
     print("✅ All basic libraries imported successfully")
 except ImportError as e:
     print(f"❌ Failed to import basic libraries: {e}")
@@ -82,6 +84,8 @@ except Exception as e:
 
 print("🎯 All imports successful, proceeding with UI...")
 
+TTS_CACHE = TTSCache()
+
 class JeevaUI(BoxLayout):
     def __init__(self, **kwargs):
         print("📦 Initializing UI")
@@ -99,194 +103,424 @@ class JeevaUI(BoxLayout):
         from kivy.core.window import Window
         Window.bind(on_key_down=self.on_key_down)
 
-        try:
+        # Use optimal settings for Telugu recognition
+        self.samplerate = 16000  # Model rate; the microphone may run at its own rate
+        self.input_device = None  # PortAudio default until setup_audio probes
+        self.device_samplerate = None
+        self.device_channels = 1
+        self.duration = 10  # Longest utterance we will record
+        # "endpoint" stops as soon as the speaker goes quiet, "fixed" always records self.duration
+        self.capture_mode = "endpoint"
+        self.silence_ms = 700
+        self.pre_roll_ms = 300
+        self.partial_interval = 0.3  # Seconds between partial transcript updates on screen
+        # Utterances are only archived when JEEVA_ARCHIVE_DIR points at a directory
+        self.archive = archive_from_env()
+        
+        # With an ASR server configured this is a thin client and never loads the model
+        self.asr_server = os.environ.get("JEEVA_ASR_SERVER")
+        self.model = None
+        # "grammar" restricts Vosk to the intent vocabulary, re-decoding open-vocabulary when unsure
+        self.recognition_mode = os.environ.get("JEEVA_RECOGNITION_MODE", "open")
+        self.grammar = None
+        # "continuous" keeps the microphone open and wakes the recognizer on speech (hands-free);
+        # JEEVA_WAKE_WORD=1 additionally waits for "Jeeva" before each command
+        self.listen_mode = os.environ.get("JEEVA_LISTEN_MODE", "push")
+        self.wake_word = os.environ.get("JEEVA_WAKE_WORD") == "1"
+        self.listener = None
+        self.user_paused = False
+        self.processing = False
+        # JEEVA_BARGE_IN=1: the microphone stays open while Jeeva talks and speech cuts the reply
+        # short (implies continuous listening); the reply itself is suppressed as echo
+        self.barge_in = os.environ.get("JEEVA_BARGE_IN") == "1"
+        self.echo = EchoSuppressor(self.samplerate) if self.barge_in else None
+        if self.barge_in:
+            self.listen_mode = "continuous"
+
+        # Periodic Prometheus/JSON metrics when JEEVA_METRICS_FILE is set
+        start_exporter_from_env()
+
+        # One playback worker and mixer for the whole session
+        self.player = PlaybackService(TTS_CACHE, reference_rate=self.samplerate if self.barge_in else None,
+                                      on_start=self.speech_started)
+        # One capture worker and a small decode pool serve every request, instead of a thread per press.
+        # Push-to-talk takes one utterance at a time: presses are refused until the reply is shown.
+        self.requests = RequestScheduler(self.capture_request, self.process_request,
+                                         self.request_done, self.request_failed,
+                                         max_pending=1, workers=2, timeout_s=self.duration + 20,
+                                         exclusive=True, discard=self.discard_request)
+
+        # Guess the reply from partial transcripts and synthesize it while the user is still talking.
+        # Each utterance gets its own Speculator (see make_decoder); they share one prefetch thread.
+        self.prefetch = None
+        if os.environ.get("JEEVA_SPECULATE", "1") == "1":
+            self.prefetch = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jeeva-prefetch")
+
+        # Synthesize the fixed replies in the background so they play instantly later
+        threading.Thread(target=TTS_CACHE.prewarm, args=(assistant.knowledge().canned_responses(),),
+                         daemon=True).start()
+
+        # Pick up edits to knowledge_base.json without a restart
+        assistant.KNOWLEDGE.subscribe(self.knowledge_changed)
+        assistant.KNOWLEDGE.start()
+
+        # Model load and device probing happen off the UI thread; recording waits on this.
+        # Started last: the loader may start the listener, which uses everything above.
+        self.label.text = "⏳ Jeeva siddham avuthondi... (Loading)"
+        self.ready = load_in_background(self.load_resources)
+        self.ready.add_done_callback(self.resources_loaded)
+    
+    def load_resources(self):
+        """Runs on the loader thread: import vosk, load the model, probe audio devices."""
+        if self.asr_server:
+            print(f"🛰️ Using ASR server at {self.asr_server}")
+        else:
             print("📦 Loading Vosk model...")
+            import vosk
+            PROFILE.mark("vosk imported")
             self.model_path = ensure_model()
             self.model = vosk.Model(self.model_path)
+            PROFILE.mark("model loaded")
             print("✅ Vosk model loaded successfully")
-        except Exception as e:
-            print(f"❌ Failed to load model: {e}")
-            self.label.text = f"❌ Failed to load model: {e}"
-            return
-
-        # Use optimal settings for Telugu recognition
-        self.samplerate = 16000  # Standard rate
-        self.duration = 10
-        
-        # Set up audio with better quality - MODIFIED SECTION
-        try:
-            # Set the default host API to WASAPI for Windows
-            # You can check available host APIs with sd.query_hostapis()
-            # Find the index for 'Windows WASAPI' or 'WASAPI'
-            wasapi_index = -1
-            for i, api in enumerate(sd.query_hostapis()):
-                if 'WASAPI' in api['name']:
-                    wasapi_index = i
-                    break
-            
-            if wasapi_index != -1:
-                sd.default.hostapi = wasapi_index
-                print(f"📱 Set default host API to WASAPI (Index: {wasapi_index})")
-            else:
-                print("📱 WASAPI host API not found. Using default behavior.")
-
-            devices = sd.query_devices()
-            input_devices = [d for d in devices if d['max_input_channels'] > 0]
-            
-            if input_devices:
-                # Filter for the specific device name and then choose by API if needed
-                # Or, if WASAPI is set as default host API, sounddevice should pick the WASAPI version
-                
-                # Let's try to pick the first one that matches the name if multiple exist
-                # This is a fallback if WASAPI default doesn't auto-resolve
-                target_device_name = "Microphone Array (AMD Audio Device)"
-                
-                filtered_devices = [d for d in input_devices if target_device_name in d['name']]
-                
-                if filtered_devices:
-                    # Prefer the WASAPI version if available
-                    wasapi_device = next((d for d in filtered_devices if 'WASAPI' in d['name']), None)
-                    if wasapi_device:
-                        sd.default.device = (wasapi_device['name'], sd.default.device[1])
-                        self.samplerate = int(wasapi_device['default_samplerate']) 
-                        print(f"📱 Selected '{wasapi_device['name']}' using WASAPI.")
-                    else:
-                        # Fallback to the first found device with that name
-                        first_matching_device = filtered_devices[0]
-                        sd.default.device = (first_matching_device['name'], sd.default.device[1])
-                        self.samplerate = int(first_matching_device['default_samplerate'])
-                        print(f"📱 Selected '{first_matching_device['name']}' (first match).")
-                else:
-                    print(f"📱 No device matching '{target_device_name}' found. Using system default.")
+            if self.recognition_mode == "grammar":
+                self.grammar = GrammarRecognizers(self.model, self.samplerate)
+                phrases = assistant.grammar_phrases(self.model)
+                version = self.grammar.set_grammar(phrases)
+                print(f"📖 Grammar mode: {len(phrases)} phrases (version {version})")
+        self.setup_audio()
+        PROFILE.mark("audio devices probed")
+        if self.listen_mode == "continuous":
+            self.start_continuous()
+
+    def resources_loaded(self, future):
+        from kivy.clock import Clock
+        error = future.exception()
+        if error:
+            print(f"❌ Failed to load model: {error}")
+        else:
+            PROFILE.mark("ready")
+            PROFILE.report()
+
+        def update(dt):
+            if error:
+                self.label.text = f"❌ Failed to load model: {error}"
+            elif self.listener:
+                self.label.text = self.hands_free_prompt()
+            elif self.btn.disabled:  # A press arrived while loading and is now recording
+                self.label.text = "🎧 Vintunna... Dayachesi matladandi!"
             else:
-                print("📱 No input devices found with max_input_channels > 0. Using system default.")
+                self.label.text = "Telugu lo matladataniki tap cheyandi"
+        Clock.schedule_once(update)
 
+    def setup_audio(self):
+        # Probe once; the choice is saved and reused on the next start.
+        # Capture runs at the device's own rate and is resampled to the model's 16 kHz.
+        try:
+            device = probe_input_device()
+            self.input_device = device["index"]
+            self.device_samplerate = device["samplerate"]
+            self.device_channels = device["channels"]
+            print(f"📱 Selected '{device['name']}' [{device['hostapi']}] at "
+                  f"{device['samplerate']} Hz x {device['channels']} ch, resampled to {self.samplerate} Hz")
         except Exception as e:
             print(f"📱 Could not optimize audio device: {e}. Fallback to default audio settings.")
-        
-        # List available audio devices for debugging (this will now show which one is selected by default)
-        print("📱 Available audio devices:")
-        for i, device in enumerate(sd.query_devices()):
-            if device['max_input_channels'] > 0:
-                is_default = "*" if i == sd.default.device[0] else " " # Mark default device
-                print(f" {is_default}{i}: {device['name']} (inputs: {device['max_input_channels']}) [Host API: {sd.query_hostapis(device['hostapi'])['name']}]")
 
         print("📱 Audio setup complete")
-    
+
     def button_released(self, instance):
         print("Button released - this confirms button is working")
         
     def on_key_down(self, window, keycode, text, modifiers, scancode):
         # Press SPACE or ENTER to start listening
         if keycode in [32, 13]:  # 32 = space, 13 = enter
+            if self.btn.disabled:  # Same as the button: nothing while a request is in progress
+                return True
             self.start_listening(None)
             return True
         return False
 
+    def start_continuous(self):
+        """Hands-free: one always-open stream; the speech gate decides when to decode."""
+        wake = None
+        if self.wake_word and self.model is not None:
+            wake = WakeWordSpotter(self.model, self.samplerate)
+        gate = SpeechGate(self.samplerate)
+        gate.echo = self.echo
+        self.listener = ContinuousListener(
+            self.make_decoder, self.utterance_heard, samplerate=self.samplerate,
+            device=self.input_device, device_samplerate=self.device_samplerate,
+            channels=self.device_channels, pre_roll_ms=self.pre_roll_ms,
+            silence_ms=self.silence_ms, max_utterance_s=self.duration, gate=gate, wake=wake,
+            on_wake=self.speech_detected).start()
+
+    def hands_free_prompt(self):
+        if self.user_paused:
+            return "⏸️ Vinadam aapanu. Malli vinataniki tap cheyandi"
+        if self.listener.wake:
+            return "👂 'Jeeva' ani pilichi matladandi"
+        return "👂 Vintunna... Eppudaina matladandi"
+
+    def utterance_heard(self, decoder, audio):
+        """Runs on the listener thread when a hands-free utterance has ended."""
+        # Don't hear our own reply; resumed once it has been spoken (or, with barge-in, starts)
+        self.processing = True
+        self.listener.pause()
+        from kivy.clock import Clock
+        Clock.schedule_once(lambda dt: setattr(self.label, "text", "⏳ Alochisthunna..."))
+        self.requests.submit_captured((decoder, audio))
+
+    def resume_listening(self):
+        if self.listener and not self.user_paused and not self.processing:
+            self.listener.resume()
+
+    def speech_detected(self):
+        """Listener thread: the speech gate opened. With barge-in, the user talks over the reply."""
+        if self.barge_in and self.player.busy:
+            trace("🗣️ Barge-in, stopping playback")
+            METRICS.inc("barge_in_total")
+            self.player.stop()
+
     def start_listening(self, instance):
-        print("🎤 Start listening triggered!")
-        self.label.text = "🎧 Vintunna... Dayachesi matladandi!"
+        trace("🎤 Start listening triggered!")
+        if self.listen_mode == "continuous":
+            # Hands-free: the button pauses and resumes listening instead of recording
+            if self.listener:
+                self.user_paused = not self.user_paused
+                if self.user_paused:
+                    self.listener.pause()
+                else:
+                    self.stop_speaking()
+                    self.resume_listening()  # Not while an utterance is still being processed
+                self.label.text = self.hands_free_prompt()
+            return
+        # Key repeats and double taps inside the debounce window are dropped here
+        if self.requests.submit() is None:
+            trace("🎤 Press ignored, a request is already in progress")
+            return
+        self.stop_speaking()  # Don't record Jeeva's own reply
+        if self.ready.done():
+            self.label.text = "🎧 Vintunna... Dayachesi matladandi!"
+        else:
+            self.label.text = "⏳ Model load avuthondi, ayyaka vintanu..."
         self.btn.text = "🔴 Record chesthunna..."
         self.btn.disabled = True
-        threading.Thread(target=self.record_and_process).start()
 
-    def record_and_process(self):
-        try:
-            duration = self.duration
-            print(f"🎤 Recording for {duration} seconds...")
-            
-            audio = sd.rec(int(self.samplerate * duration), 
-                            samplerate=self.samplerate,
-                            channels=1, 
+    def capture_request(self, request):
+        """Capture worker: record one utterance (decoding as it arrives in endpoint mode)."""
+        # Re-raises a failed model load; a first-run download can take minutes, during
+        # which the request may be cancelled or time out
+        while True:
+            request.check()
+            try:
+                self.ready.result(timeout=0.25)
+                break
+            except FutureTimeout:
+                continue
+        duration = self.duration
+        if self.capture_mode == "endpoint":
+            trace("🎤 Recording until silence (max %s seconds)...", duration)
+            endpointer = Endpointer(samplerate=self.samplerate,
+                                    silence_ms=self.silence_ms,
+                                    max_utterance_s=duration,
+                                    pre_roll_ms=self.pre_roll_ms)
+            # Decode on the capture thread while the speaker is still talking
+            decoder = self.make_decoder()
+            audio = capture_utterance(samplerate=self.samplerate, endpointer=endpointer,
+                                      on_block=decoder.accept, device=self.input_device,
+                                      device_samplerate=self.device_samplerate,
+                                      channels=self.device_channels, stop_event=request.cancelled)
+            trace("🎤 Recording completed")
+            return decoder, audio
+
+        import sounddevice as sd
+        trace("🎤 Recording for %s seconds...", duration)
+        device_rate = self.device_samplerate or self.samplerate
+        with METRICS.stage("capture"):
+            audio = sd.rec(int(device_rate * duration), 
+                            samplerate=device_rate,
+                            channels=self.device_channels, 
+                            device=self.input_device,
                             dtype='int16',
                             blocking=True) # Keep blocking for simplicity with short commands
             sd.wait() # Ensure recording is complete
-            print("🎤 Recording completed")
-
-            # Create WAV file with better quality
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmpfile:
-                wav_file = tmpfile.name
-                with wave.open(wav_file, 'wb') as wf:
-                    wf.setnchannels(1)
-                    wf.setsampwidth(2)
-                    wf.setframerate(self.samplerate)
-                    wf.writeframes(audio.tobytes())
-
-            print("🎤 Processing audio with Vosk...")
-            
-            # Process with Vosk - simplified to process the whole audio for short clips
-            with wave.open(wav_file, "rb") as wf:
-                rec = vosk.KaldiRecognizer(self.model, self.samplerate)
-                
-                # Enable word-level timestamps and confidence
-                rec.SetWords(True)
-                
-                # Read all audio frames at once
-                data = wf.readframes(wf.getnframes())
-                
-                # Accept the waveform
-                rec.AcceptWaveform(data)
-                
-                # Get raw and parsed results for debugging
-                raw_result = rec.Result()
-                print(f"🎤 RAW Vosk result: {raw_result}")
-                result = json.loads(raw_result)
-                
-                raw_final_result = rec.FinalResult()
-                print(f"🎤 RAW Vosk FinalResult: {raw_final_result}")
-                final_result = json.loads(raw_final_result)
-
-                # Combine results
-                # Prioritize FinalResult as it often has a more complete utterance
-                recognized_text = final_result.get("text", "").strip()
-                if not recognized_text and "text" in result: # Fallback if final is empty but intermediate has something
-                    recognized_text = result.get("text", "").strip()
-
-                print(f"🎤 Complete recognized text (from Vosk): '{recognized_text}'")
-                
-                # Debugging word-level confidence
-                all_words = []
-                if 'result' in final_result:
-                    for word_info in final_result['result']:
-                        word = word_info.get('word', '')
-                        conf = word_info.get('conf', 0)
-                        all_words.append((word, conf))
-                        print(f"🎤 Word: '{word}' (confidence: {conf})")
-                elif 'result' in result: # Check intermediate result too
-                     for word_info in result['result']:
-                        word = word_info.get('word', '')
-                        conf = word_info.get('conf', 0)
-                        all_words.append((word, conf))
-                        print(f"🎤 Word: '{word}' (confidence: {conf})")
-                
-            os.remove(wav_file) # Clean up the temporary WAV file
-
-            # Apply phonetic correction AFTER initial Vosk recognition
-            if recognized_text:
-                recognized_text = self.improve_recognition(recognized_text)
-                print(f"🎤 After phonetic correction: '{recognized_text}'")
+        trace("🎤 Recording completed")
+        audio = Resampler(device_rate, self.samplerate).process(audio)
+        return None, AudioBuffer.from_array(audio, self.samplerate)
+
+    def process_request(self, request, payload):
+        """Decode pool: finish or run decoding, then everything after it."""
+        decoder, audio = payload
+        result = {}
+        if hasattr(decoder, "close"):
+            request.on_expire(decoder.close)  # Unblocks a finish() waiting on the ASR server
+        if decoder is not None:
+            final_result = decoder.finish()
+        elif self.asr_server or self.grammar:
+            decoder = self.make_decoder()
+            decoder.accept(audio.view())
+            final_result = decoder.finish()
+        else:
+            with METRICS.stage("decode"):
+                result, final_result = self.decode_recording(audio)
+        return self.process_recognition(result, final_result, audio, decoder)
+
+    def discard_request(self, request, payload):
+        """A captured request was dropped before processing: give back its decoder."""
+        decoder, _ = payload
+        if decoder is None:
+            return
+        if self.grammar and getattr(decoder, "rec", None) is not None:
+            self.grammar.release(decoder.rec)
+        if hasattr(decoder, "close"):
+            decoder.close()
+
+    def request_done(self, request, outcome):
+        from kivy.clock import Clock
+        recognized_text, response, reply = outcome
+        Clock.schedule_once(lambda dt: self.update_ui_after_processing(recognized_text, response, reply=reply))
+
+    def request_failed(self, request, e):
+        error_msg = f"❌ Error in record_and_process: {str(e)}"
+        print(error_msg)
+        if not isinstance(e, RequestTimeout):
+            import traceback
+            traceback.print_exception(type(e), e, e.__traceback__)
+        from kivy.clock import Clock
+        Clock.schedule_once(lambda dt: self.update_ui_after_processing("", error_msg, error=True))
+
+    def process_recognition(self, result, final_result, audio, decoder=None):
+        """Everything after decoding: archive, correct and pick the reply."""
+        if self.grammar and decoder is not None:
+            self.grammar.release(decoder.rec)
+            final_result = self.grammar_fallback(final_result, audio)
+
+        # Combine results
+        # Prioritize FinalResult as it often has a more complete utterance
+        recognized_text = final_result.get("text", "").strip()
+        if not recognized_text and "text" in result: # Fallback if final is empty but intermediate has something
+            recognized_text = result.get("text", "").strip()
+
+        trace("🎤 Complete recognized text (from Vosk): '%s'", recognized_text)
+        
+        # Debugging word-level confidence
+        all_words = []
+        if 'result' in final_result:
+            for word_info in final_result['result']:
+                word = word_info.get('word', '')
+                conf = word_info.get('conf', 0)
+                all_words.append((word, conf))
+                trace("🎤 Word: '%s' (confidence: %s)", word, conf)
+        elif 'result' in result: # Check intermediate result too
+             for word_info in result['result']:
+                word = word_info.get('word', '')
+                conf = word_info.get('conf', 0)
+                all_words.append((word, conf))
+                trace("🎤 Word: '%s' (confidence: %s)", word, conf)
+
+        # Apply phonetic correction AFTER initial Vosk recognition; repeats come from the reply cache
+        heard = recognized_text
+        reply = None
+        if "response" in final_result:
+            # The ASR server already corrected the transcript and picked the reply
+            reply = server_reply(final_result)
+            recognized_text = reply.corrected if reply else ""
+            trace("🎤 Corrected by the ASR server: '%s'", recognized_text)
+        elif recognized_text:
+            reply = self.understand(recognized_text)
+            recognized_text = reply.corrected
+            trace("🎤 After phonetic correction: '%s'", recognized_text)
+        
+        if not recognized_text:
+            response = assistant.knowledge().replies["no_speech"]
+            trace("🎤 No text recognized")
+        else:
+            response = reply.response
+            trace("🤖 Response generated: %s", response)
+
+        # Commit the reply audio prepared from this utterance's partials, if the guess was right
+        speculator = getattr(decoder, "speculator", None)
+        prefetched = speculator.resolve(response) if speculator else None
+        if prefetched is not None and reply is not None and reply.audio is None:
+            reply = reply._replace(audio=prefetched)
+            assistant.RESPONSE_CACHE.attach_audio(reply, prefetched)
+        self.archive_utterance(audio, heard, all_words, reply, response)
+
+        # The scheduler hands this to request_done, which updates the UI on the Kivy thread
+        return recognized_text, response, reply
             
-            if not recognized_text:
-                response = "Meeru edaina chebutara? Konchem gattiga matladandi (Please speak louder)"
-                print("🎤 No text recognized")
-            else:
-                response = self.generate_response(recognized_text)
-                print(f"🤖 Response generated: {response}")
+    def make_decoder(self):
+        # Speculation state belongs to the utterance: the capture thread feeds it partials
+        # while a pool thread may still be resolving the previous one
+        speculator = Speculator(TTS_CACHE, executor=self.prefetch) if self.prefetch else None
 
-            # UI update
-            # Using Kivy's Clock.schedule_once to update UI from a non-main thread
-            from kivy.clock import Clock
-            Clock.schedule_once(lambda dt: self.update_ui_after_processing(recognized_text, response))
+        def on_partial(text):
+            self.show_partial(text, speculator)
 
-        except Exception as e:
-            error_msg = f"❌ Error in record_and_process: {str(e)}"
-            print(error_msg)
-            import traceback
-            traceback.print_exc()
-            from kivy.clock import Clock
-            Clock.schedule_once(lambda dt: self.update_ui_after_processing("", error_msg, error=True))
-            
-    def update_ui_after_processing(self, recognized_text, response, error=False):
+        if self.asr_server:
+            decoder = RemoteDecoder(self.asr_server, self.samplerate, on_partial=on_partial)
+        else:
+            decoder = StreamingDecoder(self.model, self.samplerate,
+                                       on_partial=on_partial,
+                                       partial_interval=self.partial_interval,
+                                       recognizer=self.grammar.acquire() if self.grammar else None)
+        decoder.speculator = speculator  # Resolved in process_recognition
+        return decoder
+
+    def grammar_fallback(self, final_result, audio):
+        """Keep a confident grammar result, otherwise decode the same audio open-vocabulary."""
+        if self.grammar.confident(final_result):
+            METRICS.inc("grammar_accepted_total")
+            final_result["text"] = clean_text(final_result.get("text", ""))
+            final_result["result"] = [w for w in final_result.get("result", []) if w.get("word") != UNK]
+            return final_result
+        METRICS.inc("grammar_fallback_total")
+        trace("🎤 Low grammar confidence for '%s', decoding open-vocabulary", final_result.get("text", ""))
+        return decode_array(self.model, audio, self.samplerate)
+
+    def decode_recording(self, audio):
+        """Decode a fixed-length recording straight from memory."""
+        trace("🎤 Processing audio with Vosk...")
+        import vosk
+        rec = vosk.KaldiRecognizer(self.model, self.samplerate)
+        
+        # Enable word-level timestamps and confidence
+        rec.SetWords(True)
+        
+        # Hand the capture buffer to Vosk; it is copied once into the bytes the bindings take
+        accept_pcm(rec, audio.view())
+        
+        # Get raw and parsed results for debugging
+        raw_result = rec.Result()
+        trace("🎤 RAW Vosk result: %s", raw_result)
+        result = json.loads(raw_result)
+        
+        raw_final_result = rec.FinalResult()
+        trace("🎤 RAW Vosk FinalResult: %s", raw_final_result)
+        final_result = json.loads(raw_final_result)
+        return result, final_result
+
+    def archive_utterance(self, audio, text, words, reply, response):
+        """Queue the utterance for the session archive, only when archiving is turned on."""
+        if not self.archive:
+            return
+        if reply is None:
+            self.archive.submit(audio, text, words, response=response, source=self.listen_mode)
+            return
+        self.archive.submit(audio, text, words, reply.corrected, reply.intent, reply.score, response,
+                            reply.corrections, source=self.listen_mode)
+
+    def show_partial(self, text, speculator=None):
+        """Called from the capture thread with the running Vosk hypothesis of one utterance."""
+        from kivy.clock import Clock
+        text = clean_text(text)  # Grammar mode reports out-of-grammar speech as [unk]
+        if speculator:
+            try:
+                speculator.observe(text)
+            except Exception as e:
+                print(f"🔮 Speculation failed: {e}")
+        Clock.schedule_once(lambda dt: setattr(self.label, "text", f"🎧 {text}..."))
+
+    def update_ui_after_processing(self, recognized_text, response, error=False, reply=None):
         """Updates the UI elements on the main Kivy thread."""
         if error:
             self.label.text = response # In case of error, response is the error message
@@ -295,259 +529,84 @@ class JeevaUI(BoxLayout):
         
         self.btn.text = "🎙️ Matladandi"
         self.btn.disabled = False
+        self.processing = False
         
         if not error: # Only speak if there wasn't a major processing error
-            self.speak(response)
-
-    def improve_recognition(self, text):
-        """Improve recognition by correcting common misheard words using fuzzy matching."""
-        # Common misrecognitions and their corrections
-        # Keep this for common single-word corrections or distinct phrases
-        corrections_map = {
-            "bigg boss": "varsham",
-            "big boss": "varsham", 
-            "big bos": "varsham",
-            "bigg bos": "varsham",
-            "the boss": "varsham",
-            "be boss": "varsham",
-            "big bass": "varsham",
-            "bag boss": "varsham",
-            "pig boss": "varsham",
-            "pick boss": "varsham",
-            "varsam": "varsham",
-            "varsa": "varsham",
-            "varsha": "varsham",
-            "versa": "varsham",
-            "verso": "varsham",
-            "first": "varsham",
-            "worst": "varsham",
-            "horse": "varsham",
-            "course": "varsham",
-            "source": "varsham",
-            "force": "varsham",
-            "boss": "varsham",
-            "bos": "varsham",
-            "bass": "varsham",
-            "vas": "varsham",
-            "v": "varsham",
-            "vash": "varsham",
-            "vash vash vash": "varsham",
-            "vasss": "varsham",
-            "help": "sahayam",
-            "halp": "sahayam", 
-            "help me": "sahayam",
-            "hello": "namaskaram",
-            "helo": "namaskaram",
-            "halo": "namaskaram",
-            "fertilizer": "eruvu",
-            "fertiliser": "eruvu",
-            "fertalizer": "eruvu",
-            "price": "dhara",
-            "prise": "dhara",
-            "disease": "vyadi",
-            "desease": "vyadi",
-        }
-        
-        text_lower = text.lower()
-        corrected_text = text_lower
-
-        # Apply direct replacements first for strong matches
-        for wrong, correct in corrections_map.items():
-            if wrong in text_lower:
-                corrected_text = text_lower.replace(wrong, correct)
-                print(f"🔧 Direct corrected '{wrong}' to '{correct}'")
-                return corrected_text # Return after first direct match
-
-        # If no direct match, then try fuzzy matching against individual words
-        # This part assumes you might have single words that are slightly off
-        words = text_lower.split()
-        for i, word in enumerate(words):
-            for wrong, correct in corrections_map.items():
-                # Check for single word matches that are fuzzy
-                if len(wrong.split()) == 1: # Only apply fuzzy to single words in corrections map
-                    similarity = difflib.SequenceMatcher(None, word, wrong).ratio()
-                    if similarity > 0.75: # Higher threshold for single word fuzzy to prevent over-correction
-                        words[i] = correct
-                        print(f"🔧 Fuzzy corrected '{word}' to '{correct}' (similarity: {similarity:.2f})")
-                        return " ".join(words) # Return after first fuzzy match
-        
-        return corrected_text # Return original if no correction found
-
-    def generate_response(self, query):
-        query_lower = query.lower().strip()
-        print(f"🤖 Query process chesthunna: '{query_lower}'")
-        print(f"🤖 Query length: {len(query_lower)}")
-        
-        # Enhanced word lists with phonetic variations and common misrecognitions
-        eruvu_words = [
-            # English
-            "fertilizer", "fertiliser", "manure", "fertalizer", "fertlizer", "fertilizar",
-            # Telugu transliterations
-            "eruvu", "eruvulu", "eravu", "eruvula", "ervulu", "eravulu",
-            # Telugu script
-            "ఎరువు", "ఎరువులు", "ఎరవు", "మల ఎరువు", "సార ఎరువు",
-            # Common misrecognitions
-            "manyor", "manur", "manual", "annual", "air view", "eruvo" # Added more misrecognitions
-        ]
-        
-        varsham_words = [
-            "rain", "weather", "rein", "reyn", "wether", "wheather", "rainfall",
-            "varsham", "varsha", "varshalu", "varsam", "varsa", "versa", "verso",
-            "padathunga", "paduthunda", "paduthunga", "paduthanga",
-            "shan", "sham", "shum", "shaan", "shaanu", "shamu", 
-            "వర్షం", "వర్షలు", "వర్ష", "పడుతుంగా", "పడుతుందా", "వాతావరణం",
-            "bigg boss", "big boss", "big bos", "bigg bos", "the boss", "be boss",
-            "big bass", "bag boss", "pig boss", "pick boss", "first", "worst",
-            "horse", "course", "source", "force", "boss", "bos", "bass",
-            "vas","v","vash","vash vash vash","vasss", # Your previous additions
-            "vasham", "virsham", "barsham", "warsham", "versham" # More phonetic misrecognitions
-        ]
-
-        vyadi_words = [
-            # English
-            "disease", "pest", "problem", "desease", "disese", "illness", "sickness",
-            # Telugu transliterations
-            "vyadi", "vyaadi", "nivarana", "rogam", "roga", "rogalu", "kida", "insect",
-            # Telugu script
-            "వ్యాధి", "వ్యాధులు", "రోగం", "రోగాలు", "కీడు", "కీడులు", "నిర్మూలన",
-            # Common misrecognitions
-            "video", "ready", "study", "buddy", "body", "vaadi", "vyaadhi" # Added more
-        ]
-        
-        dhara_words = [
-            # English
-            "price", "rate", "cost", "prise", "pryse", "market", "markat", "value",
-            # Telugu transliterations
-            "dhara", "dara", "dhar", "rara", "vilava", "viluve", "dhara", "dhare",
-            # Telugu script
-            "ధర", "ధరలు", "దర", "దరలు", "విలువ", "విలువలు", "ధన", "ధనం",
-            # Common misrecognitions
-            "dollar", "data", "drama", "area", "sara", "para", "daraa", "thera" # Added more
-        ]
-        
-        namaskaram_words = [
-            # English
-            "hello", "hi", "hey", "hai", "helo", "halo", "hallo", "hullo",
-            # Telugu transliterations
-            "namaste", "namaskar", "namaskaram", "namasthe", "namaskaar", "namaskar",
-            # Telugu script
-            "నమస్తే", "నమస్కారం", "నమస్కార", "హలో", "హాయ్", "హాయి", "హే",
-            # Common misrecognitions
-            "name", "master", "pasta", "faster", "after", "water", "namaskaar", "namskar" # Added more
-        ]
-        
-        sahayam_words = [
-            # English
-            "help", "helap", "halp", "what", "whot", "wot", "how", "support",
-            # Telugu transliterations
-            "sahayam", "sahaya", "sahayamu", "enti", "ela", "emiti", "emti", "ela",
-            # Telugu script
-            "సహాయం", "సహాయము", "ఏమిటి", "ఎలా", "ఎంటి", "ఏమిటయ్యా", "సహాయ",
-            # Common misrecognitions
-            "saying", "playing", "staying", "paying", "laying", "praying", "sahayyam", "saayam" # Added more
-        ]
-        
-        # Enhanced matching function with fuzzy matching
-        def check_match(word_list, query_text, threshold=0.7):
-            from difflib import SequenceMatcher
-            
-            query_words = query_text.lower().split()
-
-            for word_in_list in word_list:
-                for q_word in query_words:
-                    similarity = SequenceMatcher(None, word_in_list.lower(), q_word).ratio()
-                    if similarity > threshold:
-                        print(f"🤖 Matched '{q_word}' ≈ '{word_in_list}' (similarity: {similarity:.2f})")
-                        return True
-            return False
-
-        # Prathi category check chesthunna with enhanced matching
-        print("🤖 Checking all categories...")
-        
-        # Increased threshold for more strict matching in check_match to balance with improve_recognition
-        eruvu_match = check_match(eruvu_words, query_lower, threshold=0.75) 
-        print(f"🤖 Eruvu match: {eruvu_match}")
-        
-        varsham_match = check_match(varsham_words, query_lower, threshold=0.70) # Slightly lower for "varsham" due to common issues
-        print(f"🤖 Varsham match: {varsham_match}")
-        
-        vyadi_match = check_match(vyadi_words, query_lower, threshold=0.75)
-        print(f"🤖 Vyadi match: {vyadi_match}")
-        
-        dhara_match = check_match(dhara_words, query_lower, threshold=0.75)
-        print(f"🤖 Dhara match: {dhara_match}")
-        
-        namaskaram_match = check_match(namaskaram_words, query_lower, threshold=0.75)
-        print(f"🤖 Namaskaram match: {namaskaram_match}")
-        
-        sahayam_match = check_match(sahayam_words, query_lower, threshold=0.75)
-        print(f"🤖 Sahayam match: {sahayam_match}")
-        
-        # Response ivvadaniki check chesthunna
-        if namaskaram_match:
-            print("🤖 Namaskaram response isthunna")
-            return "నమస్తే! నేను జీవ, మీకు వ్యవసాయంలో సహాయం చేస్తాను."
-        elif sahayam_match:
-            print("🤖 Sahayam response isthunna")
-            return "నేను మీకు వ్యవసాయం, ఎరువులు, వాతావరణం మరియు మార్కెట్ ధరల గురించి చెప్పగలను."
-        elif eruvu_match:
-            print("🤖 Eruvu response isthunna")
-            return "ఈ పంటకు ఆర్గానిక్ ఎరువులు, నైట్రోజన్ మరియు పొటాష్ వాడండి."
-        elif varsham_match:
-            print("🤖 Varsham response isthunna")
-            return "నేడు వర్షం పడే అవకాశం 60% ఉంది."
-        elif vyadi_match:
-            print("🤖 Vyadi response isthunna")
-            return "నీం ఆయిల్ వాడండి, ఇది వైరస్‌కు మంచిది."
-        elif dhara_match:
-            print("🤖 Dhara response isthunna")
-            return "ఈ రోజు మార్కెట్‌లో టమోటో ధర రూ.20 కిలోకు ఉంది."
+            self.speak(response, reply=reply)
         else:
-            print("🤖 No category match found")
-            # Check if query contains any meaningful words
-            if len(query_lower) > 2:
-                return f"మీరు '{query}' అని అన్నారు. దయచేసి వ్యవసాయం, ఎరువులు, వర్షం, వ్యాధులు లేదా ధరల గురించి అడగండి."
-            else:
-                return "దయచేసి మీ ప్రశ్నను స్పష్టంగా చెప్పండి. నేను వ్యవసాయ సలహాలు ఇస్తాను."
-
-    def speak(self, text, lang='te'):
-        try:
-            print(f"🔈 Speaking: {text}")
-            tts = gTTS(text=text, lang=lang)
-            audio_path = os.path.join(tempfile.gettempdir(), "response.mp3")
-            tts.save(audio_path)
-            
-            # Use pygame for cross-platform playback within Kivy applications
-            try:
-                import pygame
-                pygame.mixer.init()
-                pygame.mixer.music.load(audio_path)
-                pygame.mixer.music.play()
-                while pygame.mixer.music.get_busy():
-                    time.sleep(0.1) # Use time.sleep for non-blocking wait
-                pygame.mixer.quit() # Clean up pygame mixer
-            except ImportError:
-                print("🔈 Pygame not installed. Trying system default players.")
-                # Fallback to system specific commands if pygame is not available
-                if sys.platform == "win32":
-                    try:
-                        os.system(f'start wmplayer "{audio_path}"')
-                    except:
-                        os.system(f'start "" "{audio_path}"')
-                elif sys.platform == "darwin": # macOS
-                    os.system(f'afplay "{audio_path}"')
-                else: # Linux
-                    os.system(f'mpg123 "{audio_path}"') # Requires mpg123
-            
-        except Exception as e:
-            print(f"🔈 Error in TTS: {e}")
-            self.label.text += f"\n🔈 TTS Error: {e}"
+            self.resume_listening()
+
+    def understand(self, text):
+        """Correct common misheard words and pick the reply, memoized per transcript."""
+        trace("🤖 Query process chesthunna: '%s'", text)
+        reply = assistant.understand(text)
+        for wrong, correct, similarity in reply.corrections:
+            trace("🔧 Corrected '%s' to '%s' (similarity: %.2f)", wrong, correct, similarity)
+        match = reply.match
+        if match:
+            trace("🤖 %s response isthunna ('%s' ≈ '%s', similarity: %.2f)",
+                  match.intent.capitalize(), match.query_term, match.vocab_term, match.score)
+        else:
+            trace("🤖 No category match found")
+        return reply
+
+    def knowledge_changed(self, kb):
+        """Runs on the watcher thread after knowledge_base.json was recompiled."""
+        if self.grammar:
+            self.grammar.set_grammar(assistant.grammar_phrases(self.model, kb))
+        threading.Thread(target=TTS_CACHE.prewarm, args=(kb.canned_responses(),), daemon=True).start()
+
+    def speak(self, text, lang='te', reply=None):
+        """Queue text on the playback worker; returns immediately."""
+        trace("🔈 Speaking: %s", text)
+        audio = reply.audio if reply else None
+        return self.player.say(text, lang, audio=audio,
+                               on_done=lambda item, completed: self.speech_finished(item, completed, reply))
+
+    def stop_speaking(self):
+        self.player.stop()
+
+    def speech_started(self, item):
+        """Called on the playback thread when sound starts."""
+        if self.barge_in:
+            self.echo.start(item.reference, item.started_at)
+            self.resume_listening()
+
+    def speech_finished(self, item, completed, reply=None):
+        """Called on the playback thread when a reply ends."""
+        if self.echo:
+            self.echo.stop()
+        if reply and reply.audio is None and item.audio is not None:
+            assistant.RESPONSE_CACHE.attach_audio(reply, item.audio)
+        self.resume_listening()
+        if item.error:
+            from kivy.clock import Clock
+            Clock.schedule_once(lambda dt: setattr(self.label, "text",
+                                                   self.label.text + f"\n🔈 TTS Error: {item.error}"))
 
 
 class JeevaApp(App):
     def build(self):
         print("🏗️ Building JeevaApp UI")
-        return JeevaUI()
+        self.ui = JeevaUI()
+        PROFILE.mark("ui built")
+        from kivy.clock import Clock
+        Clock.schedule_once(lambda dt: PROFILE.mark("first frame"))
+        return self.ui
+
+    def on_stop(self):
+        listener = getattr(self.ui, "listener", None)
+        if listener:
+            listener.stop()
+        requests = getattr(self.ui, "requests", None)
+        if requests:
+            requests.shutdown()
+        player = getattr(self.ui, "player", None)
+        if player:
+            player.shutdown()
+        archive = getattr(self.ui, "archive", None)
+        if archive:
+            archive.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Latency buckets in seconds, Prometheus style (the +Inf bucket is implicit)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-utterance debug lines are only formatted and printed when this is set
+VERBOSE = os.environ.get("JEEVA_TRACE", "") not in ("", "0")
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def series_name(name, labels=()):
+    """`name{label="value",...}` as Prometheus writes it, or just `name` without labels."""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    """Counters and stage latency histograms for the speech pipeline."""
+
+    def __init__(self):
+        self.counters = {}  # (name, ((label, value), ...)) -> count
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter; `labels` (e.g. intent="weather") pick one of its series.
+
+        Names must be fixed identifiers: anything that comes from data
+        (intent names, user input) belongs in a label, where it is escaped.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.observe(name, elapsed)
+            if VERBOSE:
+                self.trace("⏱️ %s took %.1f ms", name, elapsed * 1000)
+
+    def start_trace(self, trace_id=None):
+        """Tag this thread's following trace lines with a per-utterance ID."""
+        self._local.trace_id = trace_id or uuid.uuid4().hex[:8]
+        self.inc("utterances_total")
+        return self._local.trace_id
+
+    def continue_trace(self, trace_id):
+        """Carry an utterance's trace ID over to the thread now working on it."""
+        self._local.trace_id = trace_id
+
+    @property
+    def trace_id(self):
+        return getattr(self._local, "trace_id", None)
+
+    def trace(self, message, *args):
+        # Formatting is deferred so disabled tracing costs one bool check
+        if VERBOSE:
+            print(f"[{self.trace_id or '-'}] " + (message % args if args else message))
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "time": time.time(),
+                "counters": {series_name(*key): value for key, value in self.counters.items()},
+                "stages": {
+                    name: {"count": h.count, "sum": h.sum,
+                           "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], h.counts))}
+                    for name, h in self.histograms.items()
+                },
+            }
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            typed = None
+            for (name, labels), value in sorted(self.counters.items()):
+                if name != typed:
+                    lines.append(f"# TYPE jeeva_{name} counter")
+                    typed = name
+                lines.append(f"jeeva_{series_name(name, labels)} {value}")
+            if self.histograms:
+                lines.append("# TYPE jeeva_stage_seconds histogram")
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip([*map(str, BUCKETS), "+Inf"], h.counts):
+                    cumulative += count
+                    lines.append(f'jeeva_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'jeeva_stage_seconds_sum{{stage="{stage}"}} {h.sum}')
+                lines.append(f'jeeva_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write a .prom textfile or a .json snapshot, atomically."""
+        if path.endswith(".json"):
+            data = json.dumps(self.snapshot(), indent=1)
+        else:
+            data = self.prometheus_text()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def start_exporter(self, path, interval=15.0):
+        """Rewrite `path` every `interval` seconds on a daemon thread."""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write(path)
+                except OSError as e:
+                    print(f"📈 Could not write metrics to {path}: {e}")
+
+        thread = threading.Thread(target=run, name="jeeva-metrics", daemon=True)
+        thread.start()
+        return thread
+
+
+METRICS = Metrics()
+stage = METRICS.stage
+trace = METRICS.trace
+inc = METRICS.inc
+
+
+def start_exporter_from_env():
+    """Honour JEEVA_METRICS_FILE (.prom or .json) and JEEVA_METRICS_INTERVAL."""
+    path = os.environ.get("JEEVA_METRICS_FILE")
+    if path:
+        METRICS.start_exporter(path, float(os.environ.get("JEEVA_METRICS_INTERVAL", "15")))
+    return path
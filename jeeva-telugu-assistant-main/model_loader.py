@@ -1,20 +1,219 @@
+import contextlib
+import hashlib
+import json
 import os
+import shutil
+import tempfile
+import time
 import urllib.request
 import zipfile
 
-def ensure_model():
-    model_dir = "vosk-model-small-te-0.42"
-    zip_url = "https://alphacephei.com/vosk/models/vosk-model-small-te-0.42.zip"
-    zip_name = "model.zip"
+MODEL_NAME = "vosk-model-small-te-0.42"
+MODEL_URL = "https://alphacephei.com/vosk/models/vosk-model-small-te-0.42.zip"
+# Pin for the archive. Without JEEVA_MODEL_SHA256 the digest of the first
+# verified download is recorded next to the cache and enforced from then on
+MODEL_SHA256 = os.environ.get("JEEVA_MODEL_SHA256")
+MANIFEST = ".jeeva-manifest.json"
+# Where the app used to extract the model, relative to the working directory
+LEGACY_DIRS = (MODEL_NAME, os.path.join(os.path.dirname(os.path.abspath(__file__)), MODEL_NAME))
 
-    if not os.path.exists(model_dir):
-        print("📥 Downloading Telugu model...")
-        urllib.request.urlretrieve(zip_url, zip_name)
+DEFAULT_CACHE_DIR = os.environ.get(
+    "JEEVA_MODEL_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "jeeva", "models"))
 
-        with zipfile.ZipFile(zip_name, 'r') as zip_ref:
-            zip_ref.extractall(".")
 
-        os.remove(zip_name)
-        print("✅ Model downloaded and extracted.")
+@contextlib.contextmanager
+def file_lock(path, poll=0.2):
+    """Exclusive lock shared between processes, so only one of them downloads."""
+    with open(path, "a+b") as f:
+        try:
+            import fcntl
+            fcntl.flock(f, fcntl.LOCK_EX)
+        except ImportError:  # Windows
+            import msvcrt
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    time.sleep(poll)
+        try:
+            yield
+        finally:
+            try:
+                import fcntl
+                fcntl.flock(f, fcntl.LOCK_UN)
+            except ImportError:
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def sha256_file(path, chunk=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def download(url, dest, chunk=1 << 16):
+    """Download `url` to `dest`, resuming from a previous `dest + ".part"`."""
+    part = dest + ".part"
+    have = os.path.getsize(part) if os.path.exists(part) else 0
+    request = urllib.request.Request(url)
+    if have:
+        request.add_header("Range", f"bytes={have}-")
+    try:
+        response = urllib.request.urlopen(request, timeout=30)
+    except urllib.error.HTTPError as e:
+        if e.code != 416:  # 416: the part file is already complete
+            raise
+        os.replace(part, dest)
+        return dest
+    with response:
+        # A server that ignores Range answers 200 with the whole file
+        mode = "ab" if have and response.status == 206 else "wb"
+        if mode == "ab":
+            print(f"📥 Resuming download at {have / 1e6:.1f} MB")
+        length = response.headers.get("Content-Length")
+        expected = int(length) + (have if mode == "ab" else 0) if length else None
+        with open(part, mode) as f:
+            shutil.copyfileobj(response, f, chunk)
+    # A dropped connection ends the copy early without an error; keep the part to resume
+    received = os.path.getsize(part)
+    if expected is not None and received != expected:
+        raise IOError(f"download of {url} stopped at {received} of {expected} bytes")
+    os.replace(part, dest)
+    return dest
+
+
+def extract_verified(archive, target):
+    """Extract into a temp dir next to `target`, write a manifest, then rename into place."""
+    parent = os.path.dirname(target)
+    tmp = tempfile.mkdtemp(prefix=".extract-", dir=parent)
+    try:
+        manifest = {}
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                # Drop the archive's top-level folder and refuse paths that escape it
+                rel = info.filename.split("/", 1)[1] if "/" in info.filename else info.filename
+                dest = os.path.normpath(os.path.join(tmp, rel))
+                if not dest.startswith(tmp + os.sep):
+                    raise ValueError(f"unsafe path in archive: {info.filename}")
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                digest = hashlib.sha256()
+                with zf.open(info) as src, open(dest, "wb") as out:
+                    for block in iter(lambda: src.read(1 << 20), b""):
+                        digest.update(block)
+                        out.write(block)
+                manifest[rel] = {"size": info.file_size, "sha256": digest.hexdigest()}
+        with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump({"archive_sha256": sha256_file(archive), "files": manifest}, f, indent=1)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target
+
+
+def write_manifest(model_dir, archive_sha256=None):
+    """Record the size and digest of every file already in `model_dir`."""
+    files = {}
+    for dirpath, _, names in os.walk(model_dir):
+        for filename in names:
+            path = os.path.join(dirpath, filename)
+            rel = os.path.relpath(path, model_dir).replace(os.sep, "/")
+            if rel != MANIFEST:
+                files[rel] = {"size": os.path.getsize(path), "sha256": sha256_file(path)}
+    with open(os.path.join(model_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump({"archive_sha256": archive_sha256, "files": files}, f, indent=1)
 
+
+def migrate_legacy(target, candidates=None):
+    """Move a model extracted by older versions into the cache instead of downloading it again."""
+    for legacy in LEGACY_DIRS if candidates is None else candidates:
+        # Older versions extracted in place, so only trust a folder with the model's key files
+        if not all(os.path.isfile(os.path.join(legacy, rel)) for rel in ("am/final.mdl", "conf/model.conf")):
+            continue
+        print(f"📦 Moving existing model {os.path.abspath(legacy)} into the cache")
+        write_manifest(legacy)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        shutil.move(legacy, target)
+        return verify_model(target)
+    return False
+
+
+def verify_model(model_dir, full=False):
+    """True if `model_dir` was completely extracted (and, with `full`, is unmodified)."""
+    try:
+        with open(os.path.join(model_dir, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    for rel, meta in manifest["files"].items():
+        path = os.path.join(model_dir, rel)
+        try:
+            if os.path.getsize(path) != meta["size"]:
+                return False
+        except OSError:
+            return False
+        if full and sha256_file(path) != meta["sha256"]:
+            return False
+    return True
+
+
+def fetch_archive(dest, url=MODEL_URL):
+    """Put the model zip at `dest` from a pre-seeded archive, a mirror, or upstream."""
+    seeded = os.environ.get("JEEVA_MODEL_ARCHIVE")
+    if seeded and os.path.exists(seeded):
+        print(f"📦 Using pre-seeded model archive {seeded}")
+        return seeded
+    mirror = os.environ.get("JEEVA_MODEL_MIRROR")
+    if mirror:
+        local = os.path.join(mirror, os.path.basename(url))
+        if os.path.exists(local):
+            print(f"📦 Using model archive from local mirror {local}")
+            return local
+        url = mirror.rstrip("/") + "/" + os.path.basename(url)
+    print(f"📥 Downloading Telugu model from {url}...")
+    return download(url, dest)
+
+
+def ensure_model(cache_dir=DEFAULT_CACHE_DIR, name=MODEL_NAME, url=MODEL_URL):
+    """Return the path of a complete, verified model, provisioning it if needed."""
+    os.makedirs(cache_dir, exist_ok=True)
+    model_dir = os.path.join(cache_dir, name)
+    if verify_model(model_dir):
+        return model_dir
+
+    with file_lock(os.path.join(cache_dir, name + ".lock")):
+        # Another process may have finished while we waited for the lock
+        if verify_model(model_dir):
+            return model_dir
+        if name == MODEL_NAME and migrate_legacy(model_dir):
+            return model_dir
+        archive_path = os.path.join(cache_dir, name + ".zip")
+        pin_path = os.path.join(cache_dir, name + ".sha256")
+        expected = MODEL_SHA256
+        if not expected and os.path.exists(pin_path):
+            with open(pin_path, encoding="utf-8") as f:
+                expected = f.read().strip()
+        archive = fetch_archive(archive_path, url)
+        digest = sha256_file(archive)
+        if expected and digest != expected.lower():
+            if archive == archive_path:
+                os.remove(archive_path)
+            raise ValueError(f"checksum mismatch for {archive}")
+        extract_verified(archive, model_dir)
+        if not expected:
+            with open(pin_path, "w", encoding="utf-8") as f:
+                f.write(digest + "\n")
+        if archive == archive_path:
+            os.remove(archive_path)
+        print("✅ Model downloaded and extracted.")
     return model_dir
@@ -0,0 +1,166 @@
+import io
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+
+class PlaybackItem:
+    """Handle for one queued reply; `cancel()` stops it whether queued or playing.
+
+    `audio` may be passed in when the caller already holds the synthesized
+    reply; otherwise it is set once the worker has fetched it.
+    """
+
+    def __init__(self, text, lang, on_done=None, audio=None):
+        self.text = text
+        self.lang = lang
+        self.on_done = on_done
+        self.audio = audio
+        self.reference = None   # Mono int16 copy of what is played, for echo suppression
+        self.started_at = None  # time.monotonic() when playback began
+        self.cancelled = threading.Event()
+        self.error = None
+
+    def cancel(self):
+        self.cancelled.set()
+
+
+class PlaybackService:
+    """Long-lived speech output worker.
+
+    The mixer is initialised once on the worker thread and every reply is
+    synthesized (through the TTS cache) and played there, so callers on the UI
+    thread only enqueue and return. `on_done(item, completed)` is invoked from
+    the worker when an item finishes, fails or is cancelled; UI code should
+    hop back to its own thread from there. With `reference_rate` set, each
+    reply is also decoded to mono PCM at that rate for echo suppression, and
+    `on_start(item)` runs the moment sound starts.
+    """
+
+    def __init__(self, tts_cache, poll_interval=0.05, reference_rate=None, on_start=None):
+        self.cache = tts_cache
+        self.poll_interval = poll_interval
+        self.reference_rate = reference_rate
+        self.on_start = on_start
+        self.queue = queue.Queue()
+        self.current = None
+        self._mixer = None
+        self._proc = None
+        self._thread = threading.Thread(target=self._run, name="jeeva-playback", daemon=True)
+        self._thread.start()
+
+    def say(self, text, lang="te", on_done=None, audio=None):
+        item = PlaybackItem(text, lang, on_done, audio)
+        self.queue.put(item)
+        return item
+
+    def stop(self):
+        """Cancel the reply being played and everything queued behind it."""
+        while True:
+            try:
+                self.queue.get_nowait().cancel()
+            except queue.Empty:
+                break
+        current = self.current
+        if current:
+            current.cancel()
+
+    @property
+    def busy(self):
+        return self.current is not None or not self.queue.empty()
+
+    def shutdown(self):
+        self.stop()
+        self.queue.put(None)
+        self._thread.join(timeout=2)
+
+    def _init_mixer(self):
+        try:
+            import pygame
+            pygame.mixer.init()
+            self._mixer = pygame.mixer
+        except Exception as e:
+            print(f"🔈 Pygame mixer unavailable ({e}). Using system default players.")
+            self._mixer = False
+
+    def _run(self):
+        self._init_mixer()
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            completed = False
+            if not item.cancelled.is_set():
+                self.current = item
+                try:
+                    completed = self._play(item)
+                except Exception as e:
+                    item.error = e
+                    print(f"🔈 Error in TTS: {e}")
+                finally:
+                    self.current = None
+            if item.on_done:
+                try:
+                    item.on_done(item, completed)
+                except Exception as e:
+                    print(f"🔈 Playback callback failed: {e}")
+        if self._mixer:
+            self._mixer.quit()
+
+    def _reference(self, data):
+        try:
+            import pygame
+            from audio_frontend import Resampler
+            samples = pygame.sndarray.array(self._mixer.Sound(io.BytesIO(data)))
+            return Resampler(self._mixer.get_init()[0], self.reference_rate).process(samples)
+        except Exception as e:
+            print(f"🔈 No echo reference for this reply: {e}")
+            return None
+
+    def _started(self, item):
+        item.started_at = time.monotonic()
+        if self.on_start:
+            try:
+                self.on_start(item)
+            except Exception as e:
+                print(f"🔈 Playback start callback failed: {e}")
+
+    def _play(self, item):
+        if self._mixer:
+            if item.audio is None:
+                item.audio = self.cache.get_bytes(item.text, item.lang)
+            data = item.audio
+            if self.reference_rate and item.reference is None:
+                item.reference = self._reference(data)
+            if item.cancelled.is_set():
+                return False
+            self._mixer.music.load(io.BytesIO(data), "mp3")
+            self._mixer.music.play()
+            self._started(item)
+            while self._mixer.music.get_busy():
+                if item.cancelled.wait(self.poll_interval):
+                    self._mixer.music.stop()
+                    return False
+            return True
+
+        path = self.cache.get_file(item.text, item.lang)
+        if item.cancelled.is_set():
+            return False
+        if sys.platform == "win32":
+            cmd = ["cmd", "/c", "start", "/wait", "", path]
+        elif sys.platform == "darwin":  # macOS
+            cmd = ["afplay", path]
+        else:  # Linux
+            cmd = ["mpg123", "-q", path]  # Requires mpg123
+        self._proc = subprocess.Popen(cmd)
+        self._started(item)
+        try:
+            while self._proc.poll() is None:
+                if item.cancelled.wait(self.poll_interval):
+                    self._proc.terminate()
+                    return False
+            return self._proc.returncode == 0
+        finally:
+            self._proc = None
@@ -0,0 +1,186 @@
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+# Pre-fork deployment of asr_server: the parent loads the Vosk model once,
+# binds the listening socket and forks the decode workers. The model's pages
+# are never written after loading, so every worker maps the parent's copy
+# (copy-on-write) instead of loading its own.
+
+
+def memory_usage(pid=None):
+    """Resident, shared, private and proportional (PSS) memory of a process, in bytes.
+
+    Read from /proc/<pid>/smaps_rollup, so Linux only; None elsewhere or if
+    the process is gone. PSS splits each shared page between the processes
+    mapping it, so the PSS of all workers adds up to their real footprint.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid or os.getpid()}/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        return None
+    return {
+        "rss": fields.get("Rss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+        "pss": fields.get("Pss", 0),
+    }
+
+
+class PreforkServer:
+    """N forked ASRServer processes accepting on one socket over one loaded model.
+
+    Each worker runs its own event loop, recognizer pool and decode threads,
+    so one process's GIL or a crashed worker never stalls the others; dead
+    workers are forked again from the parent, which still holds the model.
+    `server_kwargs` go to each worker's ASRServer.
+    """
+
+    def __init__(self, model, processes=4, host="127.0.0.1", port=2700, make_tts_cache=None,
+                 **server_kwargs):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("pre-fork workers need os.fork (Linux or macOS)")
+        self.model = model
+        self.processes = processes
+        self.host = host
+        self.port = port
+        self.make_tts_cache = make_tts_cache
+        self.server_kwargs = server_kwargs
+        self.workers = {}  # pid -> worker number
+        self.sock = None
+        self._stopping = False
+
+    def start(self):
+        self.sock = socket.create_server((self.host, self.port), backlog=128)
+        self.sock.set_inheritable(True)
+        # Move everything allocated so far out of the collector's reach: a collection in a
+        # worker would otherwise write to (and so un-share) every page holding an object header
+        gc.collect()
+        gc.freeze()
+        for number in range(1, self.processes + 1):
+            self._spawn(number)
+        print(f"🛰️ ASR server listening on ws://{self.host}:{self.port} "
+              f"with {self.processes} worker processes")
+        return self
+
+    def _spawn(self, number):
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = number
+            return pid
+        # Worker: Ctrl-C reaches the whole process group, but only the parent acts on it and
+        # then sends SIGTERM, which unwinds the worker so it can flush its archive
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        code = 0
+        try:
+            self._worker(number)
+        except Exception as e:
+            print(f"❌ Worker {number} failed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _worker(self, number):
+        import assistant
+        from asr_server import ASRServer
+        from metrics import METRICS
+        from session_archive import archive_from_env
+
+        path = os.environ.get("JEEVA_METRICS_FILE")
+        if path:
+            # One file per worker; the collector sums them
+            root, ext = os.path.splitext(path)
+            METRICS.start_exporter(f"{root}.worker{number}{ext}",
+                                   float(os.environ.get("JEEVA_METRICS_INTERVAL", "15")))
+        tts_cache = self.make_tts_cache() if self.make_tts_cache else None
+        archive = archive_from_env(f"worker{number}")
+        server = ASRServer(self.model, tts_cache=tts_cache, archive=archive, **self.server_kwargs)
+        # Threads do not survive the fork, so every worker watches the knowledge base itself
+        assistant.KNOWLEDGE.start()
+        try:
+            asyncio.run(server.serve(sock=self.sock))
+        finally:
+            assistant.KNOWLEDGE.stop()
+            if archive:
+                archive.close()
+
+    def report(self):
+        """Memory of the parent and every worker: [(name, pid, usage), ...], printed as a table."""
+        rows = [("parent", os.getpid(), memory_usage())]
+        rows += [(f"worker {n}", pid, memory_usage(pid)) for pid, n in sorted(self.workers.items(),
+                                                                              key=lambda w: w[1])]
+        mb = 1024 * 1024
+        for name, pid, usage in rows:
+            if usage is None:
+                print(f"🧠 {name} (pid {pid}): memory not available")
+                continue
+            print(f"🧠 {name} (pid {pid}): rss {usage['rss'] / mb:.1f} MB, shared "
+                  f"{usage['shared'] / mb:.1f} MB, private {usage['private'] / mb:.1f} MB, "
+                  f"pss {usage['pss'] / mb:.1f} MB")
+        known = [usage for _, _, usage in rows if usage]
+        if known:
+            print(f"🧠 Total: pss {sum(u['pss'] for u in known) / mb:.1f} MB "
+                  f"vs rss {sum(u['rss'] for u in known) / mb:.1f} MB if nothing were shared")
+        return rows
+
+    def supervise(self, report_interval=60.0, poll=1.0):
+        """Fork replacements for workers that die and report memory every `report_interval` seconds."""
+        next_report = time.monotonic() + min(report_interval, 10.0)  # First report once warmed up
+        # A service manager stops us with SIGTERM; shut the workers down as on Ctrl-C
+        signal.signal(signal.SIGTERM, lambda signum, frame: setattr(self, "_stopping", True))
+        try:
+            while not self._stopping:
+                try:
+                    pid, status = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if pid:
+                    number = self.workers.pop(pid, None)
+                    if number is not None and not self._stopping:
+                        print(f"⚠️ Worker {number} (pid {pid}) exited with status {status}, restarting")
+                        self._spawn(number)
+                    continue
+                if report_interval and time.monotonic() >= next_report:
+                    self.report()
+                    next_report = time.monotonic() + report_interval
+                time.sleep(poll)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self, timeout=5.0):
+        self._stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.workers.clear()
+        if self.sock:
+            self.sock.close()
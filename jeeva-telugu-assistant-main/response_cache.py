@@ -0,0 +1,84 @@
+import collections
+import threading
+import time
+
+from intent_engine import normalize
+from metrics import METRICS
+
+
+class Reply(collections.namedtuple("Reply", "key corrected match corrections response audio")):
+    """Everything the NLU stage produced for one transcript.
+
+    `audio` starts as None and is filled in with the synthesized reply the
+    first time it is played, so a repeat query can skip the TTS lookup too.
+    """
+
+    __slots__ = ()
+
+    @property
+    def intent(self):
+        return self.match.intent if self.match else None
+
+    @property
+    def score(self):
+        return round(self.match.score, 3) if self.match else 0.0
+
+
+class ResponseCache:
+    """Bounded LRU of replies keyed by (knowledge base version, normalized transcript).
+
+    Most traffic is the same handful of phrases, so a hit skips correction,
+    intent matching and response selection entirely. Entries expire after
+    `ttl` seconds; a new knowledge base version never sees old entries because
+    the version is part of the key, and `clear()` frees them on reload.
+    """
+
+    def __init__(self, max_items=256, ttl=3600.0, clock=time.monotonic):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text, version):
+        return version, normalize(text)
+
+    def get(self, text, version):
+        key = self.key(text, version)
+        now = self.clock()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry[1] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                METRICS.inc("reply_cache_hits_total")
+                return entry[0]
+            if entry:
+                del self.entries[key]
+            self.misses += 1
+        METRICS.inc("reply_cache_misses_total")
+        return None
+
+    def put(self, reply):
+        with self._lock:
+            self.entries[reply.key] = (reply, self.clock() + self.ttl)
+            self.entries.move_to_end(reply.key)
+            while len(self.entries) > self.max_items:
+                self.entries.popitem(last=False)
+
+    def attach_audio(self, reply, audio):
+        """Remember the synthesized audio for a cached reply, if it is still cached."""
+        with self._lock:
+            entry = self.entries.get(reply.key)
+            if entry and entry[0].response == reply.response:
+                self.entries[reply.key] = (entry[0]._replace(audio=audio), entry[1])
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
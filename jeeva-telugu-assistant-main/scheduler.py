@@ -0,0 +1,222 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import METRICS
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class RequestTimeout(Exception):
+    pass
+
+
+class Request:
+    """One utterance moving through the scheduler; `cancel()` drops it at the next stage.
+
+    `cancelled` is also set when the deadline passes, so a stage can stop
+    waiting on it (capture uses it as its stop event).
+    """
+
+    def __init__(self, timeout_s, payload=None):
+        self.created = time.monotonic()
+        self.deadline = self.created + timeout_s
+        self.payload = payload
+        self.trace_id = None
+        self.cancelled = threading.Event()
+        self.timed_out = False
+        self.timer = None
+        self._on_expire = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def expire(self):
+        """Called by the scheduler's watchdog at the deadline."""
+        with self._lock:
+            self.timed_out = True
+            callbacks, self._on_expire = self._on_expire, []
+        self.cancelled.set()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"⏱️ Cleanup after request timeout failed: {e}")
+
+    def on_expire(self, callback):
+        """Run `callback()` if the request times out, e.g. to close a decoder a stage is blocked on."""
+        with self._lock:
+            if not self.timed_out:
+                self._on_expire.append(callback)
+                return
+        callback()
+
+    def error(self):
+        return RequestTimeout(f"request took longer than {self.deadline - self.created:.1f}s")
+
+    def check(self):
+        """Raise if the request was cancelled or ran out of time."""
+        if self.timed_out or time.monotonic() > self.deadline:
+            raise self.error()
+        if self.cancelled.is_set():
+            raise RequestCancelled()
+
+
+class RequestScheduler:
+    """Long-lived workers for every press, key event and hands-free utterance.
+
+    Requests wait in a queue of at most `max_pending`; presses arriving
+    within `debounce_s` of the previous press, accepted or not (a held key
+    repeats for as long as it is held), or while the queue is full are
+    refused. With `exclusive`, so are presses while any request is still in
+    progress (push-to-talk: one utterance at a time). A single capture
+    worker owns the microphone, so captures never overlap, and decoding plus
+    NLU run on a pool of `workers` threads, which also bounds how many
+    recognizers exist at once. A watchdog fails each request `timeout_s`
+    after it was submitted, even if a stage is stuck; the stage is told
+    through `cancelled` and `on_expire()`, and whatever it returns later is
+    dropped. A captured payload that never reaches `process` (the request
+    was cancelled or timed out in between) goes to `discard(request,
+    payload)` so its resources can be released. `on_result(request, result)`
+    or `on_error(request, exc)` is
+    called exactly once per request, from a worker or the watchdog; UI code
+    hops to its own thread from there.
+    """
+
+    def __init__(self, capture, process, on_result, on_error, max_pending=2, workers=2,
+                 debounce_s=0.3, timeout_s=30.0, exclusive=False, discard=None):
+        self.capture = capture
+        self.process = process
+        self.discard = discard
+        self.on_result = on_result
+        self.on_error = on_error
+        self.debounce_s = debounce_s
+        self.timeout_s = timeout_s
+        self.exclusive = exclusive
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jeeva-decode")
+        self.active = set()
+        self._last_submit = 0.0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._capture_loop, name="jeeva-capture", daemon=True)
+        self._thread.start()
+
+    def submit(self):
+        """Queue a request that starts with a capture; None if debounced or full."""
+        now = time.monotonic()
+        with self._lock:
+            last, self._last_submit = self._last_submit, now
+            if now - last < self.debounce_s:
+                METRICS.inc("requests_debounced_total")
+                return None
+            if self.exclusive and self.active:
+                METRICS.inc("requests_rejected_total")
+                return None
+            request = Request(self.timeout_s)
+            try:
+                self.pending.put_nowait(request)
+            except queue.Full:
+                METRICS.inc("requests_rejected_total")
+                return None
+            self._start(request)
+        METRICS.inc("requests_submitted_total")
+        return request
+
+    def submit_captured(self, payload):
+        """Skip the capture stage for audio that was already recorded (hands-free)."""
+        request = Request(self.timeout_s, payload)
+        request.trace_id = METRICS.start_trace()
+        with self._lock:
+            self._start(request)
+        self.pool.submit(self._process, request)
+        return request
+
+    def cancel_all(self):
+        with self._lock:
+            for request in self.active:
+                request.cancel()
+
+    @property
+    def busy(self):
+        return bool(self.active)
+
+    def shutdown(self):
+        self.cancel_all()
+        self.pending.put(None)
+        self.pool.shutdown(wait=False)
+
+    def _capture_loop(self):
+        while True:
+            request = self.pending.get()
+            if request is None:
+                break
+            request.trace_id = METRICS.start_trace()
+            METRICS.observe("queue_wait", time.monotonic() - request.created)
+            try:
+                request.check()
+                request.payload = self.capture(request)
+                request.check()
+            except Exception as e:
+                self._discard(request)
+                self._fail(request, e)
+                continue
+            self.pool.submit(self._process, request)
+
+    def _process(self, request):
+        METRICS.continue_trace(request.trace_id)
+        try:
+            request.check()
+        except Exception as e:
+            self._discard(request)
+            self._fail(request, e)
+            return
+        try:
+            result = self.process(request, request.payload)
+            request.check()
+        except Exception as e:
+            self._fail(request, e)
+            return
+        if self._done(request):
+            self.on_result(request, result)
+
+    def _discard(self, request):
+        if self.discard is None or request.payload is None:
+            return
+        try:
+            self.discard(request, request.payload)
+        except Exception as e:
+            print(f"⚠️ Could not release a dropped request: {e}")
+
+    def _start(self, request):
+        # Called with self._lock held
+        self.active.add(request)
+        request.timer = threading.Timer(self.timeout_s, self._expire, (request,))
+        request.timer.daemon = True
+        request.timer.start()
+
+    def _expire(self, request):
+        request.expire()
+        self._fail(request, request.error())
+
+    def _fail(self, request, error):
+        if not self._done(request):
+            return  # Already reported, e.g. by the watchdog while this stage was stuck
+        if isinstance(error, RequestCancelled):
+            METRICS.inc("requests_cancelled_total")
+            return
+        METRICS.inc("requests_timed_out_total" if isinstance(error, RequestTimeout) else "errors_total")
+        self.on_error(request, error)
+
+    def _done(self, request):
+        """Retire `request`; False if it had already finished."""
+        with self._lock:
+            if request not in self.active:
+                return False
+            self.active.discard(request)
+        if request.timer:
+            request.timer.cancel()
+        return True
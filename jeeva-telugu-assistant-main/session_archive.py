@@ -0,0 +1,198 @@
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from metrics import METRICS
+
+# Field recordings for improving the vocabulary: compressed audio under
+# <root>/audio/<day>/ and one SQLite row per utterance in <root>/sessions.sqlite.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS utterances (
+    id TEXT PRIMARY KEY,
+    time REAL NOT NULL,
+    source TEXT,
+    duration REAL,
+    audio TEXT,
+    audio_bytes INTEGER,
+    text TEXT,
+    corrected TEXT,
+    words TEXT,
+    corrections TEXT,
+    intent TEXT,
+    score REAL,
+    response TEXT
+)
+"""
+
+
+def encode_audio(samples, samplerate, path, codec="flac"):
+    """Write int16 mono `samples` to `path` (extension added); returns the final path.
+
+    FLAC (lossless) or Opus in Ogg ("opus", about a tenth of the size) need
+    the optional `soundfile` package; without it the audio is kept as WAV.
+    """
+    try:
+        import soundfile as sf
+    except ImportError:
+        from audio_buffer import AudioBuffer
+        return AudioBuffer.from_array(samples, samplerate).save_wav(path + ".wav")
+    if codec == "opus":
+        sf.write(path + ".ogg", samples, samplerate, format="OGG", subtype="OPUS")
+        return path + ".ogg"
+    sf.write(path + ".flac", samples, samplerate, format="FLAC", subtype="PCM_16")
+    return path + ".flac"
+
+
+class SessionArchive:
+    """Keeps utterances, transcripts, word confidences and chosen intents, off the request path.
+
+    `submit()` only puts a record on a bounded queue and never waits: when
+    `max_pending` records are already queued the new one is dropped and
+    counted. A background writer takes records in batches of up to
+    `batch_size` (or whatever arrived within `flush_interval` seconds),
+    compresses their audio and inserts their metadata in one transaction.
+    Once the archive outgrows `max_bytes`, the oldest recordings are deleted
+    (their metadata rows stay, with no audio).
+    """
+
+    def __init__(self, root, max_bytes=1 << 30, max_pending=32, batch_size=16, flush_interval=5.0,
+                 codec="flac"):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.codec = codec
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.audio_bytes = 0
+        self._thread = None
+
+    def submit(self, audio, text, words=(), corrected=None, intent=None, score=None, response=None,
+               corrections=(), source="app"):
+        """Queue one utterance; False if the archive is overloaded and dropped it.
+
+        `audio` is an AudioBuffer the caller no longer writes to, `words` the
+        recognizer's (word, confidence) pairs and `corrections` the
+        (wrong, correct, similarity) triples that turned `text` into `corrected`.
+        """
+        record = (time.time(), source, audio, text, tuple(words), corrected, tuple(corrections),
+                  intent, score, response)
+        try:
+            self.pending.put_nowait(record)
+        except queue.Full:
+            METRICS.inc("archive_dropped_total")
+            return False
+        return True
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="jeeva-archive", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, timeout=5.0):
+        """Write what is still queued and stop the writer."""
+        if self._thread is None:
+            return
+        try:
+            self.pending.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        os.makedirs(self.root, exist_ok=True)
+        db = sqlite3.connect(os.path.join(self.root, "sessions.sqlite"))
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(SCHEMA)
+        self.audio_bytes = db.execute("SELECT COALESCE(SUM(audio_bytes), 0) FROM utterances").fetchone()[0]
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.pending.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if record is None:
+                    stopping = True
+                    break
+                batch.append(record)
+            if batch:
+                try:
+                    with METRICS.stage("archive_write"):
+                        self._write(db, batch)
+                except (OSError, sqlite3.Error) as e:
+                    METRICS.inc("archive_errors_total")
+                    print(f"🗄️ Could not archive {len(batch)} utterances: {e}")
+        db.close()
+
+    def _write(self, db, batch):
+        rows = []
+        for created, source, audio, text, words, corrected, corrections, intent, score, response in batch:
+            uid = uuid.uuid4().hex
+            day = time.strftime("%Y%m%d", time.localtime(created))
+            path, size = None, 0
+            if audio is not None and audio.duration:
+                os.makedirs(os.path.join(self.root, "audio", day), exist_ok=True)
+                base = os.path.join(self.root, "audio", day,
+                                    time.strftime("utt-%H%M%S-", time.localtime(created)) + uid[:8])
+                try:
+                    path = encode_audio(np.asarray(audio.view()), audio.samplerate, base, self.codec)
+                    size = os.path.getsize(path)
+                    path = os.path.relpath(path, self.root)
+                except Exception as e:  # Keep the transcript even if this recording cannot be encoded
+                    METRICS.inc("archive_errors_total")
+                    print(f"🗄️ Could not encode archived audio: {e}")
+                    path, size = None, 0
+            duration = audio.duration if audio is not None else None
+            rows.append((uid, created, source, duration, path, size, text, corrected,
+                         json.dumps(words, ensure_ascii=False), json.dumps(corrections, ensure_ascii=False),
+                         intent, score, response))
+            self.audio_bytes += size
+        with db:
+            db.executemany("INSERT INTO utterances VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        METRICS.inc("archive_written_total", len(rows))
+        if self.audio_bytes > self.max_bytes:
+            self._prune(db)
+
+    def _prune(self, db):
+        """Delete the oldest recordings until the audio fits in 90% of the quota."""
+        target = int(self.max_bytes * 0.9)
+        oldest = db.execute("SELECT id, audio, audio_bytes FROM utterances "
+                            "WHERE audio IS NOT NULL ORDER BY time")
+        pruned = []
+        for uid, path, size in oldest:
+            if self.audio_bytes <= target:
+                break
+            try:
+                os.remove(os.path.join(self.root, path))
+            except FileNotFoundError:
+                pass
+            self.audio_bytes -= size
+            pruned.append((uid,))
+        with db:
+            db.executemany("UPDATE utterances SET audio = NULL, audio_bytes = 0 WHERE id = ?", pruned)
+        METRICS.inc("archive_pruned_total", len(pruned))
+
+
+def archive_from_env(name=None):
+    """A started archive when JEEVA_ARCHIVE_DIR is set, otherwise None.
+
+    JEEVA_ARCHIVE_MAX_MB caps the stored audio (default 1024) and
+    JEEVA_ARCHIVE_CODEC picks "flac" (default) or "opus". A `name` gives the
+    caller its own subdirectory, database and quota (pre-fork workers).
+    """
+    root = os.environ.get("JEEVA_ARCHIVE_DIR")
+    if not root:
+        return None
+    max_bytes = int(float(os.environ.get("JEEVA_ARCHIVE_MAX_MB", "1024")) * 2 ** 20)
+    return SessionArchive(os.path.join(root, name) if name else root, max_bytes=max_bytes,
+                          codec=os.environ.get("JEEVA_ARCHIVE_CODEC", "flac")).start()
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import assistant
+from metrics import METRICS, trace
+
+
+class Speculator:
+    """Guesses the reply from partial transcripts and prepares its audio early.
+
+    Every partial hypothesis is corrected and matched (off the books: partials
+    touch neither the reply cache nor the stage metrics). Once the
+    same intent has been matched on `stable_partials` consecutive partials
+    with at least `min_score`, that intent's reply is fetched or synthesized
+    through the TTS cache in the background, while the user is still
+    talking. `resolve()` then commits the guess if the final transcript
+    produced the same reply, or discards it; either way the outcome is
+    counted as a speculation hit, miss or idle (no guess was made). Use one
+    instance per utterance; instances can share an `executor`.
+    """
+
+    def __init__(self, tts_cache, lang="te", min_score=0.85, stable_partials=2, web=False,
+                 executor=None):
+        self.tts_cache = tts_cache
+        self.lang = lang
+        self.min_score = min_score
+        self.stable_partials = stable_partials
+        self.web = web
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="jeeva-prefetch")
+        self.reset()
+
+    def reset(self):
+        self.intent = None
+        self.streak = 0
+        self.guess = None   # (intent, response)
+        self.audio = None   # Future for the guessed reply's audio
+
+    def observe(self, partial):
+        """Feed one partial transcript (from the capture or reader thread)."""
+        if not partial.strip():
+            return
+        kb = assistant.knowledge()
+        corrected, _ = assistant.CORRECTIONS.correct(partial)
+        match = kb.match(corrected) if corrected else None
+        if match is None or match.score < self.min_score:
+            self.intent, self.streak = None, 0
+            return
+        if match.intent == self.intent:
+            self.streak += 1
+        else:
+            self.intent, self.streak = match.intent, 1
+        if self.streak < self.stable_partials or (self.guess and self.guess[0] == match.intent):
+            return
+        response = kb.response_for(corrected, match, self.web)
+        trace("🔮 Speculating '%s' from partial '%s'", match.intent, partial)
+        METRICS.inc("speculation_started_total")
+        self.guess = (match.intent, response)
+        self.audio = self.executor.submit(self.tts_cache.get_bytes, response, self.lang)
+
+    def resolve(self, response):
+        """Commit or discard the guess for the final `response`; returns its audio if ready."""
+        guess, audio = self.guess, self.audio
+        self.reset()
+        if guess is None:
+            METRICS.inc("speculation_idle_total")
+            return None
+        if guess[1] != response:
+            trace("🔮 Speculation missed ('%s')", guess[0])
+            METRICS.inc("speculation_misses_total")
+            return None
+        METRICS.inc("speculation_hits_total")
+        # Still synthesizing: playback's TTS cache lookup waits for this synthesis
+        # instead of starting a second one
+        if not audio.done() or audio.exception() is not None:
+            return None
+        return audio.result()
@@ -0,0 +1,60 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+# Imported first by main.py, so this is as close to process start as we can get cheaply
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfile:
+    """Named milestones measured from process start, for cold-start tracking.
+
+    `python -X importtime main.py` gives the per-module import breakdown; this
+    records the bigger steps (UI shown, model loaded, devices probed) that a
+    user on a slow phone actually waits for.
+    """
+
+    def __init__(self):
+        self.marks = []
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def mark(self, name):
+        elapsed = time.perf_counter() - PROCESS_START
+        with self._lock:
+            self.marks.append((name, elapsed, threading.current_thread().name))
+        return elapsed
+
+    def report(self):
+        with self._lock:
+            if self._reported:
+                return
+            self._reported = True
+            marks = sorted(self.marks, key=lambda m: m[1])
+        print("⏱️ Startup profile:")
+        for name, elapsed, thread in marks:
+            print(f"   {elapsed * 1000:8.1f} ms  {name}  [{thread}]")
+        path = os.environ.get("JEEVA_STARTUP_PROFILE")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump([{"mark": n, "ms": round(e * 1000, 1), "thread": t} for n, e, t in marks], f, indent=1)
+
+
+PROFILE = StartupProfile()
+
+
+def load_in_background(fn, name="jeeva-loader"):
+    """Run `fn` on a daemon thread and return a Future for its result."""
+    future = Future()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
@@ -0,0 +1,93 @@
+import json
+import time
+
+import numpy as np
+
+from audio_buffer import AudioBuffer, accept_pcm
+from metrics import METRICS
+
+
+class StreamingDecoder:
+    """Feed audio into a KaldiRecognizer while it is still being captured.
+
+    Incoming blocks are regrouped into fixed `chunk_ms` chunks so Vosk sees a
+    steady stream regardless of the capture block size. Segment results that
+    Vosk finalises on its own are collected as they come, so `finish()` only
+    has to flush the last few hundred milliseconds of audio.
+    """
+
+    def __init__(self, model, samplerate=16000, chunk_ms=200, on_partial=None,
+                 partial_interval=0.3, words=True, recognizer=None):
+        if recognizer is None:
+            import vosk
+            recognizer = vosk.KaldiRecognizer(model, samplerate)
+        self.rec = recognizer
+        if words:
+            self.rec.SetWords(True)
+        self.samplerate = samplerate
+        self.chunk_samples = int(samplerate * chunk_ms / 1000)
+        self.on_partial = on_partial
+        self.partial_interval = partial_interval
+        self._pending = []
+        self._pending_len = 0
+        self._segments = []
+        self._last_partial = ""
+        self._last_partial_time = 0.0
+        self.samples_fed = 0
+
+    def accept(self, block):
+        block = np.asarray(block, dtype=np.int16).reshape(-1)
+        self._pending.append(block)
+        self._pending_len += len(block)
+        if self._pending_len >= self.chunk_samples:
+            chunk = np.concatenate(self._pending) if len(self._pending) > 1 else self._pending[0]
+            self._pending = []
+            self._pending_len = 0
+            self._decode(chunk)
+
+    def _decode(self, chunk):
+        self.samples_fed += len(chunk)
+        if accept_pcm(self.rec, chunk):
+            self._segments.append(json.loads(self.rec.Result()))
+        elif self.on_partial:
+            now = time.monotonic()
+            if now - self._last_partial_time < self.partial_interval:
+                return
+            partial = json.loads(self.rec.PartialResult()).get("partial", "")
+            if partial and partial != self._last_partial:
+                self._last_partial = partial
+                self._last_partial_time = now
+                self.on_partial(self._joined_text(partial))
+
+    def _joined_text(self, tail=""):
+        texts = [seg.get("text", "") for seg in self._segments] + [tail]
+        return " ".join(t for t in texts if t).strip()
+
+    def finish(self):
+        """Flush buffered audio and return {"text": ..., "result": [word infos]}."""
+        # Only the tail is decoded here; this is the wait the user sees after speaking
+        with METRICS.stage("decode_finish"):
+            if self._pending:
+                self._decode(np.concatenate(self._pending))
+                self._pending = []
+                self._pending_len = 0
+            self._segments.append(json.loads(self.rec.FinalResult()))
+        METRICS.inc("decoded_audio_samples_total", self.samples_fed)
+        words = []
+        for seg in self._segments:
+            words.extend(seg.get("result", []))
+        return {"text": self._joined_text(), "result": words}
+
+
+def decode_array(model, audio, samplerate=16000, chunk_ms=200, recognizer=None):
+    """Decode an already captured int16 array or AudioBuffer in chunks."""
+    if isinstance(audio, AudioBuffer):
+        samplerate = audio.samplerate
+        audio = audio.view()
+    with METRICS.stage("decode"):
+        decoder = StreamingDecoder(model, samplerate, chunk_ms=chunk_ms, recognizer=recognizer)
+        audio = np.asarray(audio, dtype=np.int16).reshape(-1)
+        step = decoder.chunk_samples
+        for start in range(0, len(audio), step):
+            decoder.accept(audio[start:start + step])
+        return decoder.finish()
@@ -0,0 +1,40 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The modules live flat in the project folder, next to this one
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLERATE = 16000
+
+
+def noise(seconds, dbfs, rng, samplerate=SAMPLERATE):
+    """Gaussian noise at `dbfs` RMS, as float samples."""
+    return rng.normal(0, 32768 * 10 ** (dbfs / 20), int(seconds * samplerate))
+
+
+def speech(seconds, rng, amplitude=6000, samplerate=SAMPLERATE):
+    """Syllable-modulated harmonics, like benchmarks/make_fixtures.py."""
+    t = np.arange(int(seconds * samplerate)) / samplerate
+    pitch = 140 + 20 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / samplerate
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = np.clip(np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)), 0, None) ** 0.5
+    return amplitude * voiced * envelope
+
+
+def pcm(samples):
+    return np.clip(samples, -32768, 32767).astype(np.int16)
+
+
+def blocks(samples, block_ms=30, samplerate=SAMPLERATE):
+    size = int(samplerate * block_ms / 1000)
+    for start in range(0, len(samples) - size + 1, size):
+        yield samples[start:start + size]
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
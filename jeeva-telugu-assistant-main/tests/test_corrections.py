@@ -0,0 +1,55 @@
+from corrections import CorrectionEngine
+
+CORRECTIONS = {
+    "varsham": ["big boss", "boss", "v", "vash vash vash"],
+    "sahayam": ["help", "help me"],
+    "vyadhi": ["disease"],
+}
+
+
+def engine():
+    return CorrectionEngine(CORRECTIONS)
+
+
+def test_longest_phrase_wins():
+    text, applied = engine().correct("big boss ekkada")
+    assert text == "varsham ekkada"
+    assert applied == [("big boss", "varsham", 1.0)]
+    assert engine().correct("help me please")[0] == "sahayam please"
+
+
+def test_leftmost_match_consumes_its_words():
+    # "vash vash vash" is one phrase; the fourth vash is left to the fuzzy index
+    text, applied = engine().correct("vash vash vash vash")
+    assert applied[0] == ("vash vash vash", "varsham", 1.0)
+    assert text.startswith("varsham ")
+
+
+def test_prefix_without_its_phrase_is_not_replaced():
+    # "big" alone starts "big boss" but is not an entry itself
+    assert engine().correct("big cow")[0] == "big cow"
+
+
+def test_only_whole_words_are_replaced():
+    text, applied = engine().correct("v vyadhi vivaram")
+    assert text == "varsham vyadhi vivaram"
+    assert applied == [("v", "varsham", 1.0)]
+
+
+def test_non_overlapping_replacements():
+    text, applied = engine().correct("boss help me v")
+    assert text == "varsham sahayam varsham"
+    assert [wrong for wrong, _, _ in applied] == ["boss", "help me", "v"]
+
+
+def test_fuzzy_fallback_for_single_words():
+    text, applied = engine().correct("diseese vachindi")
+    assert text == "vyadhi vachindi"
+    assert applied[0][:2] == ("diseese", "vyadhi")
+    assert 0.75 < applied[0][2] < 1.0
+
+
+def test_shipped_corrections_load():
+    corrections = CorrectionEngine.load()
+    assert corrections.phrase_count > 0
+    assert corrections.correct("big boss")[0] == "varsham"
@@ -0,0 +1,88 @@
+import types
+
+import numpy as np
+import pytest
+
+import listener
+from conftest import SAMPLERATE, blocks, noise, pcm, speech
+from listener import EchoSuppressor, SpeechGate
+
+BLOCK_S = 0.03
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """listener's time.monotonic, advanced by hand one block at a time."""
+    fake = types.SimpleNamespace(now=100.0)
+    monkeypatch.setattr(listener, "time", types.SimpleNamespace(monotonic=lambda: fake.now))
+    return fake
+
+
+def delayed(samples, delay_ms, gain_db):
+    shift = int(SAMPLERATE * delay_ms / 1000)
+    return np.concatenate([np.zeros(shift), samples[:len(samples) - shift]]) * 10 ** (gain_db / 20)
+
+
+def gate_opens(clock, mic, reference=None):
+    """Seconds into playback at which the gate first opens, or None."""
+    gate = SpeechGate(SAMPLERATE)
+    gate.echo = EchoSuppressor(SAMPLERATE)
+    for block in blocks(pcm(mic[:SAMPLERATE * 2])):  # Room noise before the reply
+        clock.now += BLOCK_S
+        assert not gate.update(block)
+    gate.echo.start(reference, started_at=clock.now)
+    for i, block in enumerate(blocks(pcm(mic[SAMPLERATE * 2:]))):
+        clock.now += BLOCK_S
+        if gate.update(block):
+            return i * BLOCK_S
+    return None
+
+
+def room(rng, seconds):
+    return noise(seconds, -55, rng)
+
+
+def playback(rng, gain_db, delay_ms=120, amplitude=8000):
+    """The reply, and six seconds at the mic: room noise, the reply's echo from 2 s on."""
+    reply = pcm(speech(4, rng, amplitude=amplitude))
+    mic = room(rng, 6)
+    mic[SAMPLERATE * 2:] += delayed(reply.astype(np.float64), delay_ms, gain_db)
+    return reply, mic
+
+
+@pytest.mark.parametrize("gain_db", [-26, -16, -10, -4])
+@pytest.mark.parametrize("delay_ms", [0, 120, 250])
+def test_reply_echo_does_not_open_the_gate(rng, clock, gain_db, delay_ms):
+    reply, mic = playback(rng, gain_db, delay_ms)
+    assert gate_opens(clock, mic, reply) is None
+
+
+@pytest.mark.parametrize("gain_db", [-16, -10, -4])
+def test_learned_gain_follows_the_echo_path(rng, clock, gain_db):
+    # Pauses between the reply's syllables used to drag the gain far below the real one
+    reply, mic = playback(rng, gain_db)
+    gate = SpeechGate(SAMPLERATE)
+    gate.echo = EchoSuppressor(SAMPLERATE)
+    gate.echo.start(reply, started_at=clock.now)
+    for block in blocks(pcm(mic[SAMPLERATE * 2:])):
+        clock.now += BLOCK_S
+        gate.update(block)
+    assert gate.echo.gain_db == pytest.approx(gain_db, abs=2.0)
+
+
+@pytest.mark.parametrize("gain_db", [-20, -16, -10, -4])
+def test_user_speaking_over_the_reply_opens_the_gate(rng, clock, gain_db):
+    # A frame has to beat the loudest echo of the delay window by margin_db, for
+    # min_speech_ms in a row, so the user needs to be about 20 dB above the echo
+    reply, mic = playback(rng, gain_db, amplitude=4000)
+    mic[SAMPLERATE * 4:SAMPLERATE * 5] += speech(1, rng, amplitude=4000 * 10 ** ((gain_db + 24) / 20))
+    opened = gate_opens(clock, mic, reply)
+    assert opened is not None and 2.0 <= opened <= 3.0
+
+
+def test_without_a_reference_the_threshold_is_raised(rng, clock):
+    reply, mic = playback(rng, -10)
+    assert gate_opens(clock, mic) is None
+    # Without suppression the same echo is taken for the user
+    gate = SpeechGate(SAMPLERATE)
+    assert any(gate.update(block) for block in blocks(pcm(mic)))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from audio_capture import Endpointer
+from conftest import SAMPLERATE, blocks, noise, pcm, speech
+from listener import SpeechGate
+
+
+def run(endpointer, samples):
+    for block in blocks(samples):
+        endpointer.feed(block)
+        if endpointer.done:
+            break
+    return endpointer
+
+
+@pytest.mark.parametrize("dbfs", [-60, -47, -41, -35])
+def test_steady_noise_alone_is_not_speech(rng, dbfs):
+    ep = run(Endpointer(SAMPLERATE), pcm(noise(12, dbfs, rng)))
+    assert ep.reason == "no_speech"
+    assert ep.total_samples <= 6.1 * SAMPLERATE
+
+
+@pytest.mark.parametrize("dbfs", [-60, -47, -41])
+def test_speech_in_noise_stops_after_the_speaker(rng, dbfs):
+    audio = noise(1.0 + 1.5 + 3.0, dbfs, rng)
+    audio[SAMPLERATE:SAMPLERATE + int(1.5 * SAMPLERATE)] += speech(1.5, rng)
+    ep = run(Endpointer(SAMPLERATE, silence_ms=700), pcm(audio))
+    assert ep.reason == "silence"
+    # Pre-roll + speech + hangover, nowhere near the 10 s limit
+    assert 1.5 <= ep.audio().duration <= 3.0
+
+
+def test_noise_that_starts_mid_capture_ends_the_utterance(rng):
+    # An engine starting looks like speech onset, but the floor catches up with it
+    audio = pcm(np.concatenate([noise(2, -60, rng), noise(8, -40, rng)]))
+    ep = run(Endpointer(SAMPLERATE), audio)
+    assert ep.reason == "silence"
+    assert ep.audio().duration < 5
+    assert ep.noise_floor_db > -45
+
+
+def test_seeded_floor_is_used_at_once(rng):
+    ep = Endpointer(SAMPLERATE)
+    ep.seed_noise_floor(-42.0)
+    run(ep, pcm(noise(0.5, -41, rng)))
+    assert not ep.triggered
+
+
+@pytest.mark.parametrize("dbfs", [-60, -47, -41])
+def test_gate_ignores_steady_noise_and_opens_on_speech(rng, dbfs):
+    gate = SpeechGate(SAMPLERATE)
+    assert not any(gate.update(b) for b in blocks(pcm(noise(5, dbfs, rng))))
+    audio = noise(1.0, dbfs, rng) + speech(1.0, rng)
+    assert any(gate.update(b) for b in blocks(pcm(audio)))
@@ -0,0 +1,27 @@
+import assistant
+from grammar_mode import UNK, build_grammar
+
+
+class Model:
+    """The part of vosk.Model build_grammar uses: a fixed word list."""
+
+    def __init__(self, words):
+        self.words = set(words)
+
+    def find_word(self, word):
+        return 0 if word in self.words else -1
+
+
+def test_grammar_holds_only_telugu_synonyms():
+    kb = assistant.knowledge()
+    phrases = assistant.grammar_phrases(kb=kb)
+    assert phrases[-1] == UNK
+    assert "వర్షం" in phrases and "ధర" in phrases
+    # English synonyms, aliases and the correction lists stay out of it
+    for english in ("hello", "help", "price", "fertilizer", "big boss", "varsham"):
+        assert english not in phrases
+
+
+def test_words_the_model_does_not_know_are_dropped():
+    synonyms = {"varsham": ("వర్షం", "వర్షం పడుతుందా", "rain"), "dhara": ("ధర", "వర్షం")}
+    assert build_grammar(synonyms, Model(["వర్షం", "ధర"])) == ["వర్షం", "ధర", UNK]
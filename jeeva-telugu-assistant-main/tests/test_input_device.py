@@ -0,0 +1,55 @@
+import json
+import sys
+import types
+
+import pytest
+
+from audio_frontend import probe_input_device
+
+
+@pytest.fixture
+def devices(monkeypatch):
+    """A fake sounddevice with a default mic and a USB headset."""
+    hostapis = [{"name": "MME", "default_input_device": 0}, {"name": "Windows WASAPI", "default_input_device": 0}]
+    listed = [
+        {"name": "Laptop Mic", "hostapi": 0, "max_input_channels": 2, "default_samplerate": 44100},
+        {"name": "USB Headset", "hostapi": 0, "max_input_channels": 1, "default_samplerate": 48000},
+        {"name": "USB Headset", "hostapi": 1, "max_input_channels": 1, "default_samplerate": 48000},
+        {"name": "Speakers", "hostapi": 0, "max_input_channels": 0, "default_samplerate": 48000},
+    ]
+    fake = types.SimpleNamespace(
+        query_hostapis=lambda index=None: hostapis if index is None else hostapis[index],
+        query_devices=lambda: listed,
+        default=types.SimpleNamespace(device=(0, 3), hostapi=0),
+    )
+    monkeypatch.setitem(sys.modules, "sounddevice", fake)
+    monkeypatch.delenv("JEEVA_INPUT_DEVICE", raising=False)
+    monkeypatch.delenv("JEEVA_AUDIO_REPROBE", raising=False)
+    return listed
+
+
+def test_saved_choice_is_reused(devices, tmp_path, monkeypatch):
+    path = str(tmp_path / "device.json")
+    assert probe_input_device(path=path)["name"] == "Laptop Mic"
+    sys.modules["sounddevice"].default.device = (1, 3)  # A fresh probe would take the headset
+    assert probe_input_device(path=path)["name"] == "Laptop Mic"
+    monkeypatch.setenv("JEEVA_AUDIO_REPROBE", "1")
+    assert probe_input_device(path=path)["name"] == "USB Headset"
+
+
+def test_preference_overrides_and_replaces_the_saved_choice(devices, tmp_path, monkeypatch):
+    path = str(tmp_path / "device.json")
+    probe_input_device(path=path)
+    monkeypatch.setenv("JEEVA_INPUT_DEVICE", "usb")
+    chosen = probe_input_device(path=path)
+    assert (chosen["name"], chosen["hostapi"]) == ("USB Headset", "Windows WASAPI")
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f)["name"] == "USB Headset"
+    monkeypatch.delenv("JEEVA_INPUT_DEVICE")
+    assert probe_input_device(path=path)["name"] == "USB Headset"
+
+
+def test_unmatched_preference_keeps_the_saved_choice(devices, tmp_path):
+    path = str(tmp_path / "device.json")
+    probe_input_device(path=path)
+    assert probe_input_device("bluetooth", path=path)["name"] == "Laptop Mic"
@@ -0,0 +1,98 @@
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from intent_engine import IntentIndex, _grams, min_shared_grams
+
+SYLLABLES = [c + v for c in "kgcjtdnpbmyrlvsh" for v in ("a", "aa", "i", "ee", "u", "oo", "e", "o", "ai")]
+
+
+def word(rnd):
+    return "".join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+
+
+def vocabulary(rnd, terms, thresholds=(0.6, 0.7, 0.75, 0.8)):
+    return {f"intent{i}": (rnd.choice(thresholds), [word(rnd) for _ in range(terms // 20)])
+            for i in range(20)}
+
+
+def brute_force(vocab, query):
+    """Every keyword of every intent scored against every query word, as before the index."""
+    best = {}
+    words = query.split()
+    for intent, (threshold, keywords) in vocab.items():
+        for keyword in keywords:
+            n = keyword.count(" ") + 1
+            for i in range(len(words) - n + 1):
+                q_term = " ".join(words[i:i + n])
+                score = SequenceMatcher(None, keyword, q_term).ratio()
+                if score > threshold and (intent not in best or score > best[intent][0]):
+                    best[intent] = (score, q_term, keyword)
+    return best
+
+
+def test_min_shared_grams_never_excludes_a_match():
+    rnd = random.Random(1)
+    letters = "aeikmnrstu"
+    for _ in range(20000):
+        a = "".join(rnd.choice(letters) for _ in range(rnd.randint(1, 10)))
+        b = "".join(rnd.choice(letters) for _ in range(rnd.randint(1, 10)))
+        threshold = rnd.choice([0.5, 0.6, 0.7, 0.8, 0.9])
+        if SequenceMatcher(None, a, b).ratio() <= threshold:
+            continue
+        shared = sum((_grams(a) & _grams(b)).values())
+        assert shared >= min_shared_grams(len(a), len(b), threshold), (a, b, threshold)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_scores_match_scoring_every_keyword(seed):
+    rnd = random.Random(seed)
+    vocab = vocabulary(rnd, 400)
+    index = IntentIndex(vocab)
+    for _ in range(100):
+        query = " ".join(word(rnd) for _ in range(3))
+        expected = brute_force(vocab, query)
+        got = index.scores(query)
+        assert got.keys() == expected.keys()
+        for intent, (score, _, _) in got.items():
+            assert score == pytest.approx(expected[intent][0])
+
+
+def test_most_of_a_large_vocabulary_is_never_scored():
+    rnd = random.Random(5)
+    # Below a 2/3 threshold whole term lengths have to be compared; knowledge_base.json uses 0.7-0.75
+    index = IntentIndex(vocabulary(rnd, 10000, thresholds=(0.7, 0.75)))
+    queries = [word(rnd) for _ in range(50)]
+    scored = sum(len(index._candidates(q)) for q in queries) / len(queries)
+    assert scored < 0.1 * len(index)
+
+
+def test_equal_scores_go_to_the_earlier_intent():
+    vocab = {"weather": (0.7, ["vaatavaranam"]), "time": (0.7, ["vaatavaranam"])}
+    assert IntentIndex(vocab).match("vaatavaranam").intent == "weather"
+    vocab = {"time": (0.7, ["vaatavaranam"]), "weather": (0.7, ["vaatavaranam"])}
+    assert IntentIndex(vocab).match("vaatavaranam").intent == "time"
+
+
+def test_higher_score_beats_priority():
+    vocab = {"first": (0.6, ["samayam"]), "second": (0.6, ["samayamu"])}
+    match = IntentIndex(vocab).match("ippudu samayamu entha")
+    assert match.intent == "second"
+    assert match.score == 1.0
+
+
+def test_each_intent_keeps_its_own_threshold():
+    vocab = {"strict": (0.97, ["namaskaram"]), "loose": (0.6, ["namaskaram"])}
+    best = IntentIndex(vocab).scores("namaskaaram")
+    assert set(best) == {"loose"}
+
+
+def test_multi_word_keywords_match_word_ngrams():
+    vocab = {"alarm": (0.8, ["alarm pettu"])}
+    match = IntentIndex(vocab).match("repu alarm pettu please")
+    assert match.query_term == "alarm pettu"
+
+
+def test_no_match_below_threshold():
+    assert IntentIndex({"weather": (0.8, ["vaatavaranam"])}).match("cinema") is None
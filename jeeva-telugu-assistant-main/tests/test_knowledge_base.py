@@ -0,0 +1,149 @@
+import json
+import os
+import time
+
+import pytest
+
+from knowledge_base import KnowledgeBase, KnowledgeBaseWatcher
+
+REPLIES = {"no_speech": "emi vinapadaledu", "unclear": "ardham kaaledu",
+           "unclear_echo": "{query} ardham kaaledu", "web_unclear": "malli cheppandi"}
+
+
+def data(*intents):
+    return {"replies": REPLIES, "intents": list(intents)}
+
+
+def intent(name, synonyms, response, priority=0, threshold=0.75):
+    return {"name": name, "priority": priority, "threshold": threshold, "synonyms": synonyms,
+            "response": response}
+
+
+WEATHER = intent("weather", ["vaatavaranam"], "enda ga undi")
+PRICE = intent("price", ["dhara"], "dhara ekkuva")
+
+
+def write(path, content, bump=0):
+    path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+    # Same-size rewrites within one clock tick would look unchanged to the watcher
+    stamp = os.stat(path).st_mtime_ns + bump * 10 ** 9
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_match_and_responses():
+    kb = KnowledgeBase(data(WEATHER, PRICE))
+    match = kb.match("repu vaatavaranam")
+    assert match.intent == "weather"
+    assert kb.response_for("repu vaatavaranam", match) == "enda ga undi"
+    assert kb.response_for("cinema", None) == "cinema ardham kaaledu"
+    assert kb.response_for("", None) == "ardham kaaledu"
+
+
+def test_higher_priority_wins_a_tie():
+    low = intent("low", ["samayam"], "low", priority=1)
+    high = intent("high", ["samayam"], "high", priority=5)
+    assert KnowledgeBase(data(low, high)).match("samayam").intent == "high"
+
+
+def test_is_read_only():
+    kb = KnowledgeBase(data(WEATHER))
+    with pytest.raises(AttributeError):
+        kb.version = "x"
+    with pytest.raises(TypeError):
+        kb.responses["weather"] = "x"
+
+
+@pytest.mark.parametrize("bad, message", [
+    ({"replies": REPLIES, "intents": []}, "no intents"),
+    ({"replies": {}, "intents": [WEATHER]}, "missing replies"),
+    (data(WEATHER, WEATHER), "duplicate"),
+])
+def test_invalid_data_is_rejected(bad, message):
+    with pytest.raises(ValueError, match=message):
+        KnowledgeBase(bad)
+
+
+def test_shipped_knowledge_base_loads():
+    kb = KnowledgeBase.load()
+    assert kb.intents
+    assert kb.canned_responses()
+
+
+def test_watcher_publishes_a_changed_file(tmp_path):
+    path = tmp_path / "kb.json"
+    write(path, data(WEATHER))
+    watcher = KnowledgeBaseWatcher(str(path))
+    seen = []
+    watcher.subscribe(seen.append)
+    old = watcher.current
+    assert not watcher.reload()
+
+    write(path, data(WEATHER, PRICE), bump=1)
+    assert watcher.reload()
+    assert watcher.current.version != old.version
+    assert watcher.current.match("dhara").intent == "price"
+    assert seen == [watcher.current]
+    assert old.match("dhara") is None  # Readers holding the old version are unaffected
+
+
+def test_watcher_keeps_the_last_good_version(tmp_path, capsys):
+    path = tmp_path / "kb.json"
+    write(path, data(WEATHER))
+    watcher = KnowledgeBaseWatcher(str(path))
+    seen = []
+    watcher.subscribe(seen.append)
+    good = watcher.current
+
+    write(path, "{not json", bump=1)
+    assert not watcher.reload()
+    write(path, data(), bump=2)
+    assert not watcher.reload()
+    assert watcher.current is good
+    assert seen == []
+    assert "could not load" in capsys.readouterr().out
+
+    path.unlink()
+    assert not watcher.reload()
+    assert watcher.current is good
+
+
+def test_same_content_is_not_republished(tmp_path):
+    path = tmp_path / "kb.json"
+    write(path, data(WEATHER))
+    watcher = KnowledgeBaseWatcher(str(path))
+    seen = []
+    watcher.subscribe(seen.append)
+    write(path, data(WEATHER), bump=1)
+    assert not watcher.reload()
+    assert seen == []
+
+
+def test_failing_listener_does_not_stop_the_others(tmp_path):
+    path = tmp_path / "kb.json"
+    write(path, data(WEATHER))
+    watcher = KnowledgeBaseWatcher(str(path))
+    seen = []
+    watcher.subscribe(lambda kb: 1 / 0)
+    watcher.subscribe(seen.append)
+    write(path, data(WEATHER, PRICE), bump=1)
+    assert watcher.reload()
+    assert seen == [watcher.current]
+
+
+def test_watcher_polls_until_stopped(tmp_path):
+    path = tmp_path / "kb.json"
+    write(path, data(WEATHER))
+    watcher = KnowledgeBaseWatcher(str(path), interval=0.02).start()
+    write(path, data(WEATHER, PRICE), bump=1)
+    for _ in range(100):
+        if watcher.current.match("dhara"):
+            break
+        time.sleep(0.02)
+    assert watcher.current.match("dhara").intent == "price"
+    thread = watcher._thread
+    watcher.stop()
+    assert not thread.is_alive()
+    version = watcher.current.version
+    write(path, data(PRICE), bump=2)
+    time.sleep(0.1)
+    assert watcher.current.version == version
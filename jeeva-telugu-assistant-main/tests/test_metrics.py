@@ -0,0 +1,25 @@
+import re
+
+from metrics import Metrics
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_]\w*="([^"\\\n]|\\.)*"(,[a-zA-Z_]\w*="([^"\\\n]|\\.)*")*\})? \S+$')
+
+
+def test_intent_counter_is_one_labelled_series_per_intent():
+    metrics = Metrics()
+    for intent in ("weather", "weather", "none", 'crop "price"\\today'):
+        metrics.inc("intent_total", intent=intent)
+    text = metrics.prometheus_text()
+    assert text.count("# TYPE jeeva_intent_total counter") == 1
+    assert 'jeeva_intent_total{intent="weather"} 2' in text
+    assert 'jeeva_intent_total{intent="crop \\"price\\"\\\\today"} 1' in text
+    for line in text.splitlines():
+        assert line.startswith("# ") or SAMPLE.match(line), line
+
+
+def test_unlabelled_counters_keep_their_names():
+    metrics = Metrics()
+    metrics.inc("utterances_total")
+    metrics.inc("capture_timeout_total", 2)
+    assert metrics.snapshot()["counters"] == {"utterances_total": 1, "capture_timeout_total": 2}
+    assert "jeeva_capture_timeout_total 2" in metrics.prometheus_text()
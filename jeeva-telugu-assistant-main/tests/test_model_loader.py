@@ -0,0 +1,75 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+import model_loader
+
+
+class Response(io.BytesIO):
+    """What urlopen returns, claiming `length` bytes but sending `body`."""
+
+    def __init__(self, body, length, status=200):
+        super().__init__(body)
+        self.status = status
+        self.headers = {"Content-Length": str(length)}
+
+
+def model_zip(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("model/am/final.mdl", b"acoustic")
+        zf.writestr("model/conf/model.conf", b"--min-active=200")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_short_download_is_kept_for_resuming(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_loader.urllib.request, "urlopen", lambda request, timeout: Response(b"x" * 10, 100))
+    dest = str(tmp_path / "model.zip")
+    with pytest.raises(IOError):
+        model_loader.download("https://example.invalid/model.zip", dest)
+    assert not os.path.exists(dest)
+    assert os.path.getsize(dest + ".part") == 10
+
+    sent = []
+
+    def resume(request, timeout):
+        sent.append(request.get_header("Range"))
+        return Response(b"y" * 90, 90, status=206)
+    monkeypatch.setattr(model_loader.urllib.request, "urlopen", resume)
+    model_loader.download("https://example.invalid/model.zip", dest)
+    assert sent == ["bytes=10-"]
+    assert os.path.getsize(dest) == 100
+
+
+def test_legacy_model_is_migrated_instead_of_downloaded(tmp_path, monkeypatch):
+    legacy = tmp_path / "legacy"
+    (legacy / "am").mkdir(parents=True)
+    (legacy / "conf").mkdir()
+    (legacy / "am" / "final.mdl").write_bytes(b"acoustic")
+    (legacy / "conf" / "model.conf").write_bytes(b"--min-active=200")
+    monkeypatch.setattr(model_loader, "LEGACY_DIRS", (str(tmp_path / "missing"), str(legacy)))
+    monkeypatch.setattr(model_loader, "fetch_archive", pytest.fail)
+    cache = tmp_path / "cache"
+    model_dir = model_loader.ensure_model(str(cache))
+    assert model_loader.verify_model(model_dir, full=True)
+    assert not legacy.exists()
+
+
+def test_first_download_pins_the_archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_loader, "LEGACY_DIRS", ())
+    monkeypatch.setattr(model_loader, "MODEL_SHA256", None)
+    archive = str(tmp_path / "seeded.zip")
+    model_zip(archive)
+    monkeypatch.setenv("JEEVA_MODEL_ARCHIVE", archive)
+    cache = tmp_path / "cache"
+    model_loader.ensure_model(str(cache))
+    assert (cache / (model_loader.MODEL_NAME + ".sha256")).read_text().strip() == model_loader.sha256_file(archive)
+
+    # A different archive later is refused
+    with zipfile.ZipFile(archive, "a") as zf:
+        zf.writestr("model/extra", b"tampered")
+    (cache / model_loader.MODEL_NAME / model_loader.MANIFEST).unlink()
+    with pytest.raises(ValueError):
+        model_loader.ensure_model(str(cache))
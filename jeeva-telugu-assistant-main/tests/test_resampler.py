@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from audio_frontend import Resampler
+
+
+def tone(freq, rate, seconds=1.0, amplitude=8000):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def streamed(resampler, samples, rng):
+    out, start = [], 0
+    while start < len(samples):
+        size = int(rng.integers(1, 2000))
+        out.append(resampler.process(samples[start:start + size]))
+        start += size
+    return np.concatenate(out)
+
+
+def rms(samples):
+    return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+
+@pytest.mark.parametrize("in_rate", [44100, 48000, 22050, 8000])
+def test_streamed_blocks_match_one_shot(rng, in_rate):
+    audio = (rng.standard_normal(in_rate * 2) * 3000).astype(np.int16)
+    one_shot = Resampler(in_rate).process(audio)
+    assert np.array_equal(streamed(Resampler(in_rate), audio, rng), one_shot)
+    assert abs(len(one_shot) - len(audio) * 16000 / in_rate) <= 1
+
+
+def test_tone_in_the_passband_keeps_its_level():
+    out = Resampler(48000).process(tone(1000, 48000))
+    steady = out[1000:-1000]
+    assert rms(steady) == pytest.approx(8000 / np.sqrt(2), rel=0.02)
+
+
+def test_tone_above_the_new_nyquist_is_filtered_out():
+    # 10 kHz would alias to 6 kHz at 16 kHz without the low-pass
+    out = Resampler(48000).process(tone(10000, 48000))
+    assert rms(out[1000:-1000]) < 0.01 * 8000
+
+
+def test_stereo_is_downmixed():
+    left = tone(1000, 48000)
+    stereo = np.stack([left, np.zeros_like(left)], axis=1)
+    out = Resampler(48000).process(stereo)
+    assert rms(out[1000:-1000]) == pytest.approx(rms(left) / 2, rel=0.03)
+
+
+def test_same_rate_passes_through():
+    audio = tone(440, 16000, 0.1)
+    assert np.array_equal(Resampler(16000).process(audio[:, None]), audio)
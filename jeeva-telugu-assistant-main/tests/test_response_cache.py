@@ -0,0 +1,87 @@
+import json
+
+import assistant
+from knowledge_base import KnowledgeBase
+from response_cache import Reply, ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def reply(text, version="v1", response="ok"):
+    return Reply(ResponseCache.key(text, version), text, None, (), response, None)
+
+
+def test_hit_after_put_with_normalized_key():
+    cache = ResponseCache()
+    cache.put(reply("repu vaatavaranam"))
+    assert cache.get("  Repu   VAATAVARANAM ", "v1").response == "ok"
+    assert cache.get("repu vaatavaranam", "v2") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResponseCache(max_items=2)
+    cache.put(reply("a"))
+    cache.put(reply("b"))
+    assert cache.get("a", "v1")  # a is now the most recent
+    cache.put(reply("c"))
+    assert len(cache) == 2
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") and cache.get("c", "v1")
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = ResponseCache(ttl=10, clock=clock)
+    cache.put(reply("a"))
+    clock.now = 9.9
+    assert cache.get("a", "v1")
+    clock.now = 10.0
+    assert cache.get("a", "v1") is None
+    assert len(cache) == 0  # The expired entry is dropped, not kept around
+
+
+def test_audio_attaches_only_to_the_same_reply():
+    cache = ResponseCache()
+    first = reply("a")
+    cache.put(first)
+    cache.attach_audio(first, b"mp3")
+    assert cache.get("a", "v1").audio == b"mp3"
+    cache.put(reply("a", response="changed"))
+    cache.attach_audio(first, b"stale")
+    assert cache.get("a", "v1").audio is None
+
+
+def test_knowledge_base_reload_clears_the_cache(tmp_path, monkeypatch):
+    kb_data = json.loads(open(assistant.KNOWLEDGE.path, encoding="utf-8").read())
+    path = tmp_path / "kb.json"
+    path.write_text(json.dumps(kb_data), encoding="utf-8")
+    watcher = assistant.KnowledgeBaseWatcher(str(path))
+    cache = ResponseCache()
+    watcher.subscribe(lambda kb: cache.clear())  # As assistant.py wires RESPONSE_CACHE
+    monkeypatch.setattr(assistant, "RESPONSE_CACHE", cache)
+
+    first = assistant.understand("hello", watcher.current)
+    assert assistant.understand("hello", watcher.current) is first
+    assert len(cache) == 1
+
+    kb_data["replies"]["unclear"] += "!"
+    path.write_text(json.dumps(kb_data), encoding="utf-8")
+    assert watcher.reload()
+    assert len(cache) == 0
+    second = assistant.understand("hello", watcher.current)
+    assert second is not first
+    assert second.key[0] == watcher.current.version != first.key[0]
+
+
+def test_versions_never_share_entries():
+    cache = ResponseCache()
+    kb = KnowledgeBase.load()
+    cache.put(reply("hello", kb.version))
+    assert cache.get("hello", kb.version + "/web") is None
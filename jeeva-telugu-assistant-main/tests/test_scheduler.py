@@ -0,0 +1,173 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import RequestCancelled, RequestScheduler, RequestTimeout
+
+
+class Recorder:
+    """A scheduler whose stages block until released, and the outcomes it reported."""
+
+    def __init__(self, **kwargs):
+        self.capture_gate = threading.Event()
+        self.process_gate = threading.Event()
+        self.results, self.errors = [], []
+        self.finished = threading.Event()
+        kwargs.setdefault("debounce_s", 0)
+        self.scheduler = RequestScheduler(self.capture, self.process, self.on_result, self.on_error,
+                                          **kwargs)
+
+    def capture(self, request):
+        self.capture_gate.wait(5)
+        return "audio"
+
+    def process(self, request, payload):
+        self.process_gate.wait(5)
+        return payload + " processed"
+
+    def on_result(self, request, result):
+        self.results.append(result)
+        self.finished.set()
+
+    def on_error(self, request, error):
+        self.errors.append(error)
+        self.finished.set()
+
+    def run_through(self):
+        self.capture_gate.set()
+        self.process_gate.set()
+
+
+@pytest.fixture
+def recorder():
+    made = []
+
+    def make(**kwargs):
+        made.append(Recorder(**kwargs))
+        return made[-1]
+    yield make
+    for r in made:
+        r.run_through()
+        r.scheduler.shutdown()
+
+
+def test_request_runs_through_both_stages(recorder):
+    r = recorder()
+    r.run_through()
+    assert r.scheduler.submit() is not None
+    assert r.finished.wait(2)
+    assert r.results == ["audio processed"]
+    assert not r.scheduler.busy
+
+
+def test_held_key_is_debounced_from_the_last_key_event(recorder):
+    r = recorder(debounce_s=0.2)
+    assert r.scheduler.submit() is not None
+    # Key repeat every 50 ms for half a second: every repeat restarts the window
+    for _ in range(10):
+        time.sleep(0.05)
+        assert r.scheduler.submit() is None
+    time.sleep(0.25)
+    r.run_through()
+    assert r.finished.wait(2)
+    assert r.scheduler.submit() is not None
+
+
+def test_exclusive_refuses_while_a_request_is_in_progress(recorder):
+    r = recorder(exclusive=True, max_pending=1)
+    first = r.scheduler.submit()
+    assert first is not None
+    time.sleep(0.05)  # Taken off the queue by the capture worker, so the queue has room
+    assert r.scheduler.submit() is None
+    r.run_through()
+    assert r.finished.wait(2)
+    assert r.scheduler.submit() is not None
+
+
+def test_full_queue_refuses(recorder):
+    r = recorder(max_pending=1)
+    assert r.scheduler.submit() is not None  # Capturing
+    time.sleep(0.05)
+    assert r.scheduler.submit() is not None  # Waiting in the queue
+    assert r.scheduler.submit() is None
+
+
+def test_cancelled_request_reports_nothing(recorder):
+    r = recorder()
+    request = r.scheduler.submit()
+    time.sleep(0.05)
+    request.cancel()
+    r.run_through()
+    time.sleep(0.1)
+    assert r.results == [] and r.errors == []
+    assert not r.scheduler.busy
+
+
+def test_stuck_stage_times_out_on_time(recorder):
+    r = recorder(timeout_s=0.2)
+    request = r.scheduler.submit()
+    closed = threading.Event()
+    request.on_expire(closed.set)
+    r.capture_gate.set()  # Processing never returns on its own
+    started = time.monotonic()
+    assert r.finished.wait(2)
+    assert time.monotonic() - started < 0.5
+    assert isinstance(r.errors[0], RequestTimeout)
+    assert closed.is_set() and request.cancelled.is_set()
+    assert not r.scheduler.busy
+    # The stuck stage finishing later reports nothing more
+    r.process_gate.set()
+    time.sleep(0.1)
+    assert r.results == [] and len(r.errors) == 1
+
+
+def test_on_expire_after_the_deadline_runs_at_once(recorder):
+    r = recorder(timeout_s=0.05)
+    request = r.scheduler.submit()
+    assert r.finished.wait(2)
+    called = []
+    request.on_expire(lambda: called.append(True))
+    assert called == [True]
+    with pytest.raises(RequestTimeout):
+        request.check()
+
+
+def test_cancel_without_timeout_raises_cancelled(recorder):
+    r = recorder(timeout_s=10)
+    request = r.scheduler.submit()
+    request.cancel()
+    with pytest.raises(RequestCancelled):
+        request.check()
+
+
+def test_payload_dropped_after_capture_is_discarded(recorder):
+    discarded = []
+    r = recorder(discard=lambda request, payload: discarded.append(payload))
+    request = r.scheduler.submit()
+    time.sleep(0.05)
+    request.cancel()  # While capturing
+    r.capture_gate.set()
+    time.sleep(0.1)
+    assert discarded == ["audio"]
+    assert r.results == [] and r.errors == []
+
+
+def test_payload_of_a_request_timed_out_during_capture_is_discarded(recorder):
+    discarded = []
+    r = recorder(timeout_s=0.1, discard=lambda request, payload: discarded.append(payload))
+    r.scheduler.submit()
+    assert r.finished.wait(2)
+    r.capture_gate.set()  # The capture returns after the watchdog fired
+    time.sleep(0.1)
+    assert discarded == ["audio"]
+    assert len(r.errors) == 1
+
+
+def test_processed_payload_is_not_discarded(recorder):
+    discarded = []
+    r = recorder(discard=lambda request, payload: discarded.append(payload))
+    r.run_through()
+    r.scheduler.submit()
+    assert r.finished.wait(2)
+    assert discarded == []
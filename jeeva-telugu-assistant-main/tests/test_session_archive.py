@@ -0,0 +1,88 @@
+import json
+import os
+import sqlite3
+
+import numpy as np
+
+from audio_buffer import AudioBuffer
+from conftest import SAMPLERATE, pcm, speech
+from metrics import METRICS
+from session_archive import SessionArchive
+
+
+def utterance(rng, seconds=1.0):
+    return AudioBuffer.from_array(pcm(speech(seconds, rng)), SAMPLERATE)
+
+
+def rows(root):
+    db = sqlite3.connect(os.path.join(root, "sessions.sqlite"))
+    try:
+        return db.execute("SELECT text, intent, words, audio, audio_bytes FROM utterances ORDER BY time").fetchall()
+    finally:
+        db.close()
+
+
+def counter(name):
+    return METRICS.snapshot()["counters"].get(name, 0)
+
+
+def test_submit_drops_when_the_queue_is_full(tmp_path, rng):
+    archive = SessionArchive(str(tmp_path), max_pending=2)  # Writer not started: nothing drains
+    dropped = counter("archive_dropped_total")
+    assert archive.submit(utterance(rng), "one")
+    assert archive.submit(utterance(rng), "two")
+    assert not archive.submit(utterance(rng), "three")
+    assert counter("archive_dropped_total") == dropped + 1
+    # What was queued is still written on close
+    archive.start().close()
+    assert [row[0] for row in rows(str(tmp_path))] == ["one", "two"]
+
+
+def test_records_are_written_with_their_metadata(tmp_path, rng):
+    archive = SessionArchive(str(tmp_path), batch_size=4, flush_interval=0.1).start()
+    archive.submit(utterance(rng), "varsham", words=[("varsham", 0.9)], corrected="varsham",
+                   intent="varsham", score=0.95, response="vaana")
+    archive.submit(None, "", response="emi vinapadaledu")
+    archive.close()
+    (text, intent, words, audio, size), (empty, _, _, no_audio, no_size) = rows(str(tmp_path))
+    assert (text, intent, json.loads(words)) == ("varsham", "varsham", [["varsham", 0.9]])
+    assert os.path.getsize(os.path.join(str(tmp_path), audio)) == size > 0
+    assert (empty, no_audio, no_size) == ("", None, 0)
+
+
+def test_a_batch_is_one_write(tmp_path, rng):
+    archive = SessionArchive(str(tmp_path), batch_size=8, flush_interval=60)
+    for i in range(8):
+        archive.submit(utterance(rng, 0.2), f"utterance {i}")
+    writes = METRICS.snapshot()["stages"].get("archive_write", {}).get("count", 0)
+    archive.start().close()
+    assert len(rows(str(tmp_path))) == 8
+    assert METRICS.snapshot()["stages"]["archive_write"]["count"] == writes + 1
+
+
+def test_oldest_audio_is_pruned_over_quota(tmp_path, rng):
+    one = 2 * SAMPLERATE  # About one second of 16-bit audio
+    archive = SessionArchive(str(tmp_path), max_bytes=3 * one, batch_size=1, flush_interval=0.05).start()
+    for i in range(6):
+        archive.submit(utterance(rng), f"utterance {i}")
+    archive.close()
+    stored = rows(str(tmp_path))
+    assert [row[0] for row in stored] == [f"utterance {i}" for i in range(6)]  # Transcripts all stay
+    kept = [row for row in stored if row[3] is not None]
+    assert 0 < len(kept) < 6
+    assert kept == stored[-len(kept):]  # Only the newest keep their audio
+    assert sum(row[4] for row in stored) <= 3 * one * 0.9 + one
+    on_disk = [os.path.join(dirpath, f) for dirpath, _, files in os.walk(os.path.join(str(tmp_path), "audio"))
+               for f in files]
+    assert len(on_disk) == len(kept)
+
+
+def test_reopened_archive_counts_existing_audio(tmp_path, rng):
+    archive = SessionArchive(str(tmp_path), batch_size=1, flush_interval=0.05).start()
+    archive.submit(utterance(rng), "first")
+    archive.close()
+    reopened = SessionArchive(str(tmp_path), batch_size=1, flush_interval=0.05).start()
+    reopened.submit(None, "second")
+    reopened.close()
+    assert reopened.audio_bytes == rows(str(tmp_path))[0][4] > 0
+    assert np.sum([row[4] for row in rows(str(tmp_path))]) == reopened.audio_bytes
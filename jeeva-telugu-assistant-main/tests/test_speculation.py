@@ -0,0 +1,74 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import assistant
+from speculation import Speculator
+from tts_cache import TTSCache
+
+
+@pytest.fixture
+def tts_cache(tmp_path):
+    return TTSCache(str(tmp_path), backend="local", synthesize=lambda text, lang: text.encode("utf-8"))
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        yield pool
+
+
+def response(text):
+    kb = assistant.knowledge()
+    return kb.response_for(text, kb.match(text))
+
+
+def speak(speculator, *partials):
+    for partial in partials:
+        speculator.observe(partial)
+
+
+def test_stable_guess_is_prepared_and_committed(tts_cache, executor):
+    speculator = Speculator(tts_cache, executor=executor)
+    speak(speculator, "help", "help me")
+    assert speculator.guess is not None
+    speculator.audio.result(timeout=5)
+    assert speculator.resolve(response("help me")) == response("help me").encode("utf-8")
+
+
+def test_wrong_or_missing_guess_returns_nothing(tts_cache, executor):
+    speculator = Speculator(tts_cache, executor=executor)
+    speak(speculator, "help", "help")
+    assert speculator.resolve(response("price")) is None
+    assert speculator.resolve(response("help")) is None  # Reset by the previous resolve
+    speak(speculator, "help")  # One partial is not stable yet
+    assert speculator.guess is None
+
+
+def test_overlapping_utterances_keep_their_own_guesses(tts_cache, executor):
+    # The next utterance is captured while a pool thread still resolves the previous one
+    first = Speculator(tts_cache, executor=executor)
+    speak(first, "help", "help me")
+    second = Speculator(tts_cache, executor=executor)
+    speak(second, "price", "price enta")
+    first.audio.result(timeout=5)
+    second.audio.result(timeout=5)
+    assert first.resolve(response("help me")) is not None
+    assert second.resolve(response("price enta")) is not None
+
+
+def test_hit_still_synthesizing_is_not_synthesized_twice(tmp_path, executor):
+    calls = []
+
+    def slow(text, lang):
+        calls.append(text)
+        time.sleep(0.2)
+        return text.encode("utf-8")
+
+    cache = TTSCache(str(tmp_path), backend="local", synthesize=slow)
+    speculator = Speculator(cache, executor=executor)
+    speak(speculator, "help", "help me")
+    assert speculator.resolve(response("help me")) is None  # Not ready at the endpoint
+    cache.get_file(response("help me"))  # What playback does next
+    assert calls == [response("help me")]
@@ -0,0 +1,74 @@
+import os
+import threading
+import time
+
+from tts_cache import TTSCache
+
+
+class SlowBackend:
+    """Synthesis stand-in that takes `delay` seconds and counts its calls."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, text, lang):
+        self.calls += 1
+        time.sleep(self.delay)
+        return text.encode("utf-8") * 100
+
+
+def test_lookup_during_synthesis_waits_instead_of_synthesizing_again(tmp_path):
+    backend = SlowBackend()
+    cache = TTSCache(str(tmp_path), backend="local", synthesize=backend)
+    speculated = threading.Thread(target=cache.get_bytes, args=("vaana padutundi",))
+    speculated.start()
+    time.sleep(0.05)  # Playback asks while the speculative synthesis is still running
+    with open(cache.get_file("vaana padutundi"), "rb") as f:
+        assert f.read() == b"vaana padutundi" * 100
+    speculated.join()
+    assert backend.calls == 1
+
+
+def test_failed_synthesis_lets_the_waiter_retry(tmp_path):
+    attempts = []
+
+    def flaky(text, lang):
+        attempts.append(text)
+        time.sleep(0.1)
+        if len(attempts) == 1:
+            raise OSError("network down")
+        return b"mp3"
+
+    cache = TTSCache(str(tmp_path), backend="local", synthesize=flaky)
+    errors = []
+
+    def first():
+        try:
+            cache.get_file("dhara")
+        except OSError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    time.sleep(0.03)
+    assert open(cache.get_file("dhara"), "rb").read() == b"mp3"
+    thread.join()
+    assert len(errors) == 1 and len(attempts) == 2
+
+
+def test_replaced_entry_is_counted_once(tmp_path):
+    cache = TTSCache(str(tmp_path), backend="local", synthesize=lambda text, lang: b"x" * 100)
+    path = cache.get_file("vaana")
+    cache._store(path, b"y" * 40)  # Written again, e.g. by another process sharing the directory
+    assert cache._disk_bytes == 40 == sum(size for _, size, _ in cache._disk_entries())
+
+
+def test_stale_temp_files_are_swept_at_startup(tmp_path):
+    stale, fresh = tmp_path / "crashed.part", tmp_path / "writing.part"
+    stale.write_bytes(b"half an mp3")
+    fresh.write_bytes(b"being written")
+    old = time.time() - 3600
+    os.utime(stale, (old, old))
+    TTSCache(str(tmp_path), backend="local")
+    assert not stale.exists() and fresh.exists()
@@ -0,0 +1,183 @@
+import collections
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from metrics import METRICS
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "JEEVA_TTS_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "jeeva", "tts"))
+
+
+def gtts_synthesize(text, lang):
+    from gtts import gTTS
+    fp = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(fp)
+    return fp.getvalue()
+
+
+class TTSCache:
+    """Content-addressed cache of synthesized speech.
+
+    Entries are keyed by (text, lang, backend). Hits are served from a small
+    in-memory LRU of the encoded MP3 bytes first, then from a size-bounded
+    directory of MP3 files whose mtimes double as the disk LRU order; only
+    misses go to the synthesis backend, once per entry: a lookup arriving
+    while the same entry is being synthesized (e.g. playback of a reply
+    prepared by speculation) waits for that synthesis instead of starting
+    another. Temp files left by a crash mid-write are removed at startup.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_disk_bytes=50 * 1024 * 1024,
+                 max_memory_items=32, backend="gtts", synthesize=gtts_synthesize,
+                 ext=".mp3", stale_part_s=60.0):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_items = max_memory_items
+        self.backend = backend
+        self.synthesize = synthesize
+        self.ext = ext
+        self.memory = collections.OrderedDict()
+        self.hits = collections.Counter()
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Event set when its synthesis has finished
+        os.makedirs(cache_dir, exist_ok=True)
+        self._sweep_parts(stale_part_s)
+        self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def key(self, text, lang):
+        return hashlib.sha256(f"{self.backend}\0{lang}\0{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + self.ext)
+
+    def _disk_entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.ext):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((name, st.st_size, st.st_mtime))
+        return entries
+
+    def _sweep_parts(self, older_than):
+        # Recent ones may belong to another process still writing into the same directory
+        cutoff = time.time() - older_than
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".part"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def get_file(self, text, lang="te"):
+        """Path of an MP3 for `text`, synthesizing it on a miss."""
+        key = self.key(text, lang)
+        path = self.path_for(key)
+        while True:
+            if os.path.exists(path):
+                self.hits["disk"] += 1
+                METRICS.inc("tts_cache_disk_hits_total")
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                return path
+            with self._lock:
+                done = self._inflight.get(key)
+                if done is None:
+                    done = self._inflight[key] = threading.Event()
+                    break
+            METRICS.inc("tts_cache_inflight_waits_total")
+            done.wait()  # Then a disk hit, or our turn if that synthesis failed
+        self.hits["miss"] += 1
+        METRICS.inc("tts_cache_misses_total")
+        try:
+            with METRICS.stage("tts_synthesis"):
+                data = self.synthesize(text, lang)
+            self._store(path, data)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+        return path
+
+    def get_bytes(self, text, lang="te"):
+        """MP3 bytes for `text` from the memory tier, filling it on a miss."""
+        key = self.key(text, lang)
+        with self._lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits["memory"] += 1
+                METRICS.inc("tts_cache_memory_hits_total")
+                return self.memory[key]
+        with open(self.get_file(text, lang), "rb") as f:
+            data = f.read()
+        with self._lock:
+            self.memory[key] = data
+            while len(self.memory) > self.max_memory_items:
+                self.memory.popitem(last=False)
+        return data
+
+    def _store(self, path, data):
+        # Write to a temp name first so a crash never leaves a truncated entry
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        with self._lock:
+            # A file replaced in place (e.g. written by another process meanwhile) is counted once
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+            self._disk_bytes += len(data) - replaced
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict(keep=path)
+
+    def _evict(self, keep):
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        self._disk_bytes = sum(size for _, size, _ in entries)
+        for name, size, _ in entries:
+            if self._disk_bytes <= self.max_disk_bytes:
+                break
+            path = os.path.join(self.cache_dir, name)
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                self._disk_bytes -= size
+            except FileNotFoundError:
+                pass
+
+    def prewarm(self, texts, lang="te"):
+        """Synthesize every text not yet on disk; returns the number that failed."""
+        failed = 0
+        for text in texts:
+            try:
+                self.get_file(text, lang)
+            except Exception as e:
+                failed += 1
+                print(f"🔈 Could not pre-synthesize '{text}': {e}")
+        return failed
+
+
+if __name__ == "__main__":
+    # Build step: python tts_cache.py [cache_dir]
+    from knowledge_base import KnowledgeBase
+
+    cache = TTSCache(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CACHE_DIR)
+    texts = KnowledgeBase.load().canned_responses()
+    failed = cache.prewarm(texts)
+    print(f"✅ {len(texts) - failed}/{len(texts)} responses cached in {cache.cache_dir}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,35 @@
+import asyncio
+import json
+import os
+import threading
+
+from asr_server import ASRServer
+
+HTML_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "web_capture.html")
+
+
+def start_server(model, host="0.0.0.0", port=2701, **kwargs):
+    """Run an ASRServer for browser clients on a daemon thread; returns the server.
+
+    The Streamlit script only renders the page, so recordings from any number
+    of web users are decoded here, bounded by the server's recognizer pool,
+    instead of each holding a script thread for the whole utterance.
+    """
+    server = ASRServer(model, **kwargs)
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(host, port),),
+                              name="jeeva-web-asr", daemon=True)
+    thread.start()
+    return server
+
+
+def render(url=None, port=2701, silence_ms=700, max_seconds=10, tts=True, height=260,
+           min_speech_ms=120, no_speech_s=6):
+    """Show the browser microphone widget, streaming to `url` (or this host at `port`)."""
+    import streamlit.components.v1 as components
+
+    with open(HTML_PATH, encoding="utf-8") as f:
+        html = f.read()
+    # The endpointer in the page mirrors audio_capture.Endpointer and its defaults
+    config = {"url": url, "port": port, "silence_ms": silence_ms, "max_seconds": max_seconds, "tts": tts,
+              "min_speech_ms": min_speech_ms, "no_speech_s": no_speech_s}
+    components.html(html.replace("__CONFIG__", json.dumps(config)), height=height)